@@ -0,0 +1,7 @@
+"""Benchmark suite for the pymath hot paths
+
+Run from the repository root:
+    python -m benchmarks run --output baseline.json
+    python -m benchmarks run --compare baseline.json
+    python -m benchmarks compare baseline.json current.json
+"""
@@ -0,0 +1,65 @@
+import argparse
+import sys
+
+from benchmarks import cases as _  # registers the cases
+from benchmarks import harness
+
+
+def print_result(key, result):
+    print('{:<32} min {:>10.6f}s  median {:>10.6f}s  p95 {:>10.6f}s  peak {:>12,d} B'.format(
+        key, result['min'], result['median'], result['p95'], result['peak_bytes']))
+
+
+def print_comparison(rows, threshold):
+    regressions = 0
+    for key, before, after, ratio, regressed in rows:
+        regressions += regressed
+        print('{:<32} {:>10.6f}s -> {:>10.6f}s  x{:<6.2f}{}'.format(
+            key, before, after, ratio, '  REGRESSION' if regressed else ''))
+    print('{} regression(s) beyond {:.0%}'.format(regressions, threshold))
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='pymath benchmark suite')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='run the benchmarks')
+    run.add_argument('-k', '--filter', help='only run cases whose name contains this text')
+    run.add_argument('-r', '--repeat', type=int, default=5, help='timed runs per benchmark')
+    run.add_argument('-w', '--warmup', type=int, default=1, help='untimed runs before timing')
+    run.add_argument('-s', '--sizes', type=int, nargs='+', help='override the sizes of every case')
+    run.add_argument('-o', '--output', help='write the results as JSON to this file')
+    run.add_argument('-c', '--compare', metavar='BASELINE', help='compare the results with a JSON baseline')
+    run.add_argument('-t', '--threshold', type=float, default=0.1, help='relative slowdown flagged as regression')
+    run.add_argument('-l', '--list', action='store_true', help='list the cases instead of running them')
+
+    compare = commands.add_parser('compare', help='compare two JSON result files')
+    compare.add_argument('baseline')
+    compare.add_argument('current')
+    compare.add_argument('-t', '--threshold', type=float, default=0.1, help='relative slowdown flagged as regression')
+
+    args = parser.parse_args(argv)
+    if args.command == 'compare':
+        rows = harness.compare(harness.load(args.baseline), harness.load(args.current), args.threshold)
+        return 1 if print_comparison(rows, args.threshold) else 0
+
+    selected = harness.cases(args.filter)
+    if args.list:
+        for c in selected:
+            print('{:<24} sizes {}'.format(c.name, ', '.join(map(str, c.sizes))))
+        return 0
+
+    document = harness.run(selected, args.repeat, args.warmup, args.sizes, print_result)
+    if args.output:
+        harness.save(document, args.output)
+    if args.compare:
+        rows = harness.compare(harness.load(args.compare), document, args.threshold)
+        return 1 if print_comparison(rows, args.threshold) else 0
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
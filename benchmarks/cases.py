@@ -0,0 +1,176 @@
+"""Benchmark cases for the matrix, LU, prime and vector hot paths"""
+import random
+
+from pymath import decomp, exact, iterative, lu, prime
+from pymath.matrix import Matrix
+from pymath.sparse import SparseMatrix
+from pymath.vector import Vector
+
+from benchmarks.harness import case
+
+
+def random_matrix(n, m=None, seed=0):
+    rnd = random.Random(seed)
+    m = n if m is None else m
+    return Matrix([rnd.uniform(-1, 1) for _ in range(n * m)], n, m)
+
+
+def well_conditioned_matrix(n, seed=0):
+    a = random_matrix(n, seed=seed)
+    for i in range(n):
+        a[i, i] += n
+    return a
+
+
+@case('matrix.matmul', sizes=(20, 50, 100, 200))
+def matmul(n):
+    a, b = random_matrix(n, seed=1), random_matrix(n, seed=2)
+    return lambda: Matrix._matmul(a, b)
+
+
+@case('matrix.T', sizes=(100, 500))
+def transpose(n):
+    a = random_matrix(n)
+    return lambda: a.T
+
+
+@case('matrix.T.copy', sizes=(100, 500))
+def transpose_copy(n):
+    a = random_matrix(n)
+    return lambda: a.T.copy()
+
+
+@case('lu.lu', sizes=(20, 50, 100))
+def lu_decomposition(n):
+    a = well_conditioned_matrix(n)
+    return lambda: lu.lu(a)
+
+
+@case('lu.solve', sizes=(20, 50, 100))
+def lu_solve(n):
+    a, b = well_conditioned_matrix(n), random_matrix(n, 4, seed=3)
+    return lambda: lu.solve(a, b)
+
+
+@case('decomp.cholesky_solve', sizes=(20, 50, 100))
+def cholesky_solve(n):
+    a, b = random_matrix(n, seed=1), random_matrix(n, 4, seed=3)
+    spd = a @ a.T + Matrix.identity(n)
+    return lambda: decomp.cholesky_solve(spd, b)
+
+
+@case('decomp.lstsq', sizes=(20, 50, 100))
+def lstsq(n):
+    a, b = random_matrix(2 * n, n, seed=1), random_matrix(2 * n, 4, seed=3)
+    return lambda: decomp.lstsq(a, b)
+
+
+def diffusion_matrix(m):
+    """Sparse 5-point Laplacian of an m x m grid, m^2 unknowns"""
+    entries = []
+    for i in range(m):
+        for j in range(m):
+            k = i * m + j
+            entries.append((k, k, 4.0))
+            entries.extend((k, k + d, -1.0) for d, inside in ((-m, i), (m, i < m - 1), (-1, j), (1, j < m - 1))
+                           if inside)
+    return SparseMatrix(m * m, m * m, entries)
+
+
+@case('iterative.cg', sizes=(30, 100))
+def cg(m):
+    a = diffusion_matrix(m)
+    b = [1.0] * (m * m)
+    return lambda: iterative.cg(a, b, tol=1e-6)
+
+
+@case('sparse.matvec', sizes=(100, 300))
+def sparse_matvec(m):
+    a = diffusion_matrix(m)
+    x = [1.0] * (m * m)
+    return lambda: a.matvec(x)
+
+
+def _exact_solve(solve):
+    def setup(n):
+        a = Matrix.random(n, n, -1000, 1000, dtype=int, seed=1)
+        b = Matrix.random(n, 1, -1000, 1000, dtype=int, seed=2)
+        return lambda: solve(a, b)
+
+    return setup
+
+
+case('exact.solve', sizes=(10, 20, 40))(_exact_solve(exact.solve))
+case('exact.solve_modular', sizes=(10, 20, 40))(_exact_solve(exact.solve_modular))
+
+
+@case('prime.primes', sizes=(10 ** 4, 10 ** 5, 10 ** 6))
+def primes(n):
+    return lambda: prime.primes(n)
+
+
+@case('prime.sundaram3', sizes=(10 ** 4, 10 ** 5, 10 ** 6))
+def sundaram3(n):
+    return lambda: prime.sundaram3(n)
+
+
+@case('prime.PrimeTable.lookup', sizes=(10 ** 4, 10 ** 6))
+def prime_table_lookup(n):
+    table = prime.PrimeTable(n)
+    numbers = random.Random(n).sample(range(n), 1000)
+    return lambda: [(table.is_prime(k), table.pi(k), table.next_prime(k)) for k in numbers]
+
+
+@case('prime.factors', sizes=(12, 18, 20))
+def factors(digits):
+    rnd = random.Random(digits)
+    numbers = [rnd.randrange(10 ** (digits - 1), 10 ** digits) for _ in range(20)]
+    return lambda: [prime.factors(n) for n in numbers]
+
+
+def _factor_many(cached):
+    def setup(n):
+        rnd = random.Random(n)
+        numbers = [rnd.randrange(10 ** 15, 2 * 10 ** 15) for _ in range(n)]
+        if cached:
+            def run():
+                cache = prime.FactorCache()
+                return [cache.factors(m) for m in numbers]
+
+            return run
+        return lambda: [prime.factors(m) for m in numbers]
+
+    return setup
+
+
+# A FactorCache filling up with distinct numbers must scale like plain factors, compare with
+# `python -m benchmarks run -k factor_many`
+case('prime.factor_many.cached', sizes=(1000, 4000))(_factor_many(True))
+case('prime.factor_many.uncached', sizes=(1000, 4000))(_factor_many(False))
+
+
+@case('prime.factor_range', sizes=(10 ** 4, 10 ** 5))
+def factor_range(n):
+    return lambda: list(prime.factor_range(10 ** 9, 10 ** 9 + n))
+
+
+@case('vector.dot', sizes=(1000, 100000))
+def dot(n):
+    rnd = random.Random(n)
+    a = Vector([rnd.random() for _ in range(n)])
+    b = Vector([rnd.random() for _ in range(n)])
+    return lambda: a.dot(b)
+
+
+def _matmul_algorithm(algorithm):
+    def setup(n):
+        a, b = random_matrix(n, seed=1), random_matrix(n, seed=2)
+        return lambda: a.matmul(b, algorithm)
+
+    return setup
+
+
+# Run with `python -m benchmarks run -k matmul.algorithm` to find where strassen overtakes the iterative kernel,
+# and set kernels.STRASSEN_THRESHOLD accordingly
+for _algorithm in ('naive', 'blocked', 'strassen'):
+    case('matmul.algorithm.' + _algorithm, sizes=(64, 128, 192, 256, 384))(_matmul_algorithm(_algorithm))
@@ -0,0 +1,141 @@
+"""Timing, memory measurement, baselines and comparison for the benchmark cases"""
+import gc
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+_cases = []
+
+
+class Case(object):
+    """A benchmark: setup(size) prepares the inputs and returns the callable that is timed"""
+
+    def __init__(self, name, setup, sizes):
+        self.name = name
+        self.setup = setup
+        self.sizes = sizes
+
+    def key(self, size):
+        return '{}[{}]'.format(self.name, size)
+
+
+def case(name, sizes):
+    """Decorator registering a setup function as a benchmark case run for every size"""
+    def register(setup):
+        _cases.append(Case(name, setup, tuple(sizes)))
+        return setup
+
+    return register
+
+
+def cases(pattern=None):
+    """Get the registered cases, optionally only those whose name contains pattern"""
+    return [c for c in _cases if pattern is None or pattern in c.name]
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of a list of values"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def measure(fn, repeat=5, warmup=1):
+    """Time repeated calls of fn after warmup calls, then measure its peak memory in one traced call
+
+    :return: dict with min, median and p95 wall clock seconds, the number of timed runs and peak_bytes
+    """
+    for _ in range(warmup):
+        fn()
+
+    timings = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'p95': percentile(timings, 95),
+        'runs': repeat,
+        'peak_bytes': peak,
+    }
+
+
+def run(selected, repeat=5, warmup=1, sizes=None, report=None):
+    """Run benchmark cases
+
+    :param selected: cases to run
+    :param repeat: timed runs per case and size
+    :param warmup: untimed runs before timing
+    :param sizes: override the sizes of every case
+    :param report: called with (key, result) after each measurement
+    :return: results document, ready to be written as JSON
+    """
+    results = {}
+    for c in selected:
+        for size in sizes or c.sizes:
+            result = measure(c.setup(size), repeat, warmup)
+            results[c.key(size)] = result
+            if report:
+                report(c.key(size), result)
+
+    return {
+        'meta': {
+            'python': sys.version.split()[0],
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(),
+            'platform': platform.platform(),
+            'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'repeat': repeat,
+            'warmup': warmup,
+        },
+        'results': results,
+    }
+
+
+def save(document, path):
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(baseline, current, threshold=0.1, stat='median'):
+    """Compare the results of two runs
+
+    :param baseline: results document of the reference run
+    :param current: results document of the new run
+    :param threshold: relative slowdown above which a benchmark is a regression, 0.1 is 10% slower
+    :param stat: timing statistic compared
+    :return: list of (key, baseline seconds, current seconds, ratio, regressed) for benchmarks in both runs
+    """
+    rows = []
+    old, new = baseline['results'], current['results']
+    for key in sorted(set(old) & set(new)):
+        before, after = old[key][stat], new[key][stat]
+        ratio = after / before if before else math.inf
+        rows.append((key, before, after, ratio, ratio > 1 + threshold))
+
+    return rows
@@ -0,0 +1,333 @@
+"""Stacks of same-shape matrices stored in one contiguous buffer
+
+Operating on many tiny matrices one Matrix at a time is dominated by per-object overhead. A MatrixBatch keeps
+all of them back to back in a single flat buffer and runs every operation as one loop over the batch, with
+unrolled kernels for 2x2, 3x3 and 4x4 matrices.
+"""
+from itertools import chain, repeat
+
+from pymath import kernels
+from pymath.matrix import Matrix, MatrixShape
+from pymath.storage import get_storage, promote
+
+
+def _matmul2(a, b):
+    a0, a1, a2, a3 = a
+    b0, b1, b2, b3 = b
+    return (
+        a0 * b0 + a1 * b2,
+        a0 * b1 + a1 * b3,
+        a2 * b0 + a3 * b2,
+        a2 * b1 + a3 * b3,
+    )
+
+
+def _matmul3(a, b):
+    a0, a1, a2, a3, a4, a5, a6, a7, a8 = a
+    b0, b1, b2, b3, b4, b5, b6, b7, b8 = b
+    return (
+        a0 * b0 + a1 * b3 + a2 * b6,
+        a0 * b1 + a1 * b4 + a2 * b7,
+        a0 * b2 + a1 * b5 + a2 * b8,
+        a3 * b0 + a4 * b3 + a5 * b6,
+        a3 * b1 + a4 * b4 + a5 * b7,
+        a3 * b2 + a4 * b5 + a5 * b8,
+        a6 * b0 + a7 * b3 + a8 * b6,
+        a6 * b1 + a7 * b4 + a8 * b7,
+        a6 * b2 + a7 * b5 + a8 * b8,
+    )
+
+
+def _matmul4(a, b):
+    a0, a1, a2, a3, a4, a5, a6, a7, a8, a9, a10, a11, a12, a13, a14, a15 = a
+    b0, b1, b2, b3, b4, b5, b6, b7, b8, b9, b10, b11, b12, b13, b14, b15 = b
+    return (
+        a0 * b0 + a1 * b4 + a2 * b8 + a3 * b12,
+        a0 * b1 + a1 * b5 + a2 * b9 + a3 * b13,
+        a0 * b2 + a1 * b6 + a2 * b10 + a3 * b14,
+        a0 * b3 + a1 * b7 + a2 * b11 + a3 * b15,
+        a4 * b0 + a5 * b4 + a6 * b8 + a7 * b12,
+        a4 * b1 + a5 * b5 + a6 * b9 + a7 * b13,
+        a4 * b2 + a5 * b6 + a6 * b10 + a7 * b14,
+        a4 * b3 + a5 * b7 + a6 * b11 + a7 * b15,
+        a8 * b0 + a9 * b4 + a10 * b8 + a11 * b12,
+        a8 * b1 + a9 * b5 + a10 * b9 + a11 * b13,
+        a8 * b2 + a9 * b6 + a10 * b10 + a11 * b14,
+        a8 * b3 + a9 * b7 + a10 * b11 + a11 * b15,
+        a12 * b0 + a13 * b4 + a14 * b8 + a15 * b12,
+        a12 * b1 + a13 * b5 + a14 * b9 + a15 * b13,
+        a12 * b2 + a13 * b6 + a14 * b10 + a15 * b14,
+        a12 * b3 + a13 * b7 + a14 * b11 + a15 * b15,
+    )
+
+
+def _det2(a):
+    a0, a1, a2, a3 = a
+    return a0 * a3 - a1 * a2
+
+
+def _det3(a):
+    a0, a1, a2, a3, a4, a5, a6, a7, a8 = a
+    return a0 * (a4 * a8 - a5 * a7) - a1 * (a3 * a8 - a5 * a6) + a2 * (a3 * a7 - a4 * a6)
+
+
+def _inv2(a, tol):
+    a0, a1, a2, a3 = a
+    d = a0 * a3 - a1 * a2
+    if abs(d) < tol:
+        raise ValueError('matrix is singular')
+    return a3 / d, -a1 / d, -a2 / d, a0 / d
+
+
+def _inv3(a, tol):
+    a0, a1, a2, a3, a4, a5, a6, a7, a8 = a
+    c0 = a4 * a8 - a5 * a7
+    c1 = a5 * a6 - a3 * a8
+    c2 = a3 * a7 - a4 * a6
+    d = a0 * c0 + a1 * c1 + a2 * c2
+    if abs(d) < tol:
+        raise ValueError('matrix is singular')
+    return (
+        c0 / d, (a2 * a7 - a1 * a8) / d, (a1 * a5 - a2 * a4) / d,
+        c1 / d, (a0 * a8 - a2 * a6) / d, (a2 * a3 - a0 * a5) / d,
+        c2 / d, (a1 * a6 - a0 * a7) / d, (a0 * a4 - a1 * a3) / d,
+    )
+
+
+_MATMUL_KERNELS = {2: _matmul2, 3: _matmul3, 4: _matmul4}
+_DET_KERNELS = {2: _det2, 3: _det3}
+_INV_KERNELS = {2: _inv2, 3: _inv3}
+
+
+class MatrixBatch(object):
+    """A stack of count matrices of the same shape stored in one flat buffer
+
+      Matrix k occupies entries k*rows*cols to (k+1)*rows*cols of the buffer, each in row-major order.
+
+      Can be created in two different ways:
+       - From an iterable of matrices (Matrix instances or list-of-lists) of the same shape:
+           b = MatrixBatch([Matrix([[1, 2], [3, 4]]), [[5, 6], [7, 8]]])
+
+       - Default created with count zero matrices of the given shape:
+           b = MatrixBatch(1000, 3, 3)
+    """
+
+    def __init__(self, *args, dtype=float, backend=None):
+        self._storage = get_storage(backend, dtype)
+        self.dtype = dtype
+        if len(args) == 1:
+            matrices = [m if isinstance(m, Matrix) else Matrix(m, dtype=dtype) for m in args[0]]
+            if not matrices:
+                raise ValueError('can not create a batch from no matrices')
+            shapes = {m.shape for m in matrices}
+            if len(shapes) > 1:
+                raise ValueError('matrices in a batch must have the same shape, got {}'.format(shapes))
+            self._count = len(matrices)
+            self._shape = matrices[0].shape
+            if all(m.backend == self._storage.name and m.dtype is dtype for m in matrices):
+                self._data = self._storage.concat([m._data for m in matrices])
+            else:
+                self._data = self._storage.fromiter(chain.from_iterable(m._data for m in matrices))
+        else:
+            count, rows, cols = args
+            self._count = count
+            self._shape = MatrixShape(rows, cols)
+            self._data = self._storage.zeros(count * rows * cols)
+
+    @classmethod
+    def from_flat(cls, data, count, rows, cols, dtype=float, backend=None):
+        """Create a batch from a flat sequence holding count row-major rows x cols matrices back to back"""
+        if len(data) != count * rows * cols:
+            raise ValueError('invalid data length: expected {}*{}*{} entries got {}'.format(count, rows, cols,
+                                                                                            len(data)))
+        storage = get_storage(backend, dtype)
+        return cls._wrap(storage.fromiter(data), count, rows, cols, storage)
+
+    @classmethod
+    def _wrap(cls, data, count, rows, cols, storage):
+        b = cls.__new__(cls)
+        b._storage = storage
+        b.dtype = storage.dtype
+        b._count = count
+        b._shape = MatrixShape(rows, cols)
+        b._data = data
+
+        return b
+
+    @property
+    def shape(self):
+        """Shape of every matrix in the batch"""
+        return self._shape
+
+    @property
+    def backend(self):
+        return self._storage.name
+
+    def __len__(self):
+        """Get number of matrices in the batch"""
+        return self._count
+
+    def _item_size(self):
+        return self._shape.rows * self._shape.columns
+
+    def _items(self):
+        size = self._item_size()
+        data = self._data
+        for k in range(self._count):
+            yield data[k * size: (k + 1) * size]
+
+    def __getitem__(self, k):
+        if not 0 <= k < self._count:
+            raise IndexError('batch index out of range')
+        size = self._item_size()
+
+        return Matrix._wrap(self._data[k * size: (k + 1) * size], *self._shape, self._storage)
+
+    def __setitem__(self, k, m):
+        if not 0 <= k < self._count:
+            raise IndexError('batch index out of range')
+        if m.shape != self._shape:
+            raise ValueError('matrix shape {} does not match batch shape {}'.format(tuple(m.shape),
+                                                                                    tuple(self._shape)))
+        size = self._item_size()
+        self._storage.assign(self._data, slice(k * size, (k + 1) * size), m._data)
+
+    def __iter__(self):
+        for k in range(self._count):
+            yield self[k]
+
+    def __eq__(self, other):
+        if not isinstance(other, MatrixBatch):
+            raise TypeError('MatrixBatch not comparable with {}'.format(type(other)))
+        return (self._count == other._count and self._shape == other._shape and
+                list(self._data) == list(other._data))
+
+    def _result(self, values, count, rows, cols, dtype=None):
+        storage = self._storage if dtype is None else get_storage(self.backend, dtype)
+        return self._wrap(storage.fromiter(values), count, rows, cols, storage)
+
+    def _float_dtype(self):
+        return float if self.dtype is int else self.dtype
+
+    def __matmul__(self, other):
+        """Batched product, pairwise with another batch of the same length or with one matrix for the whole batch"""
+        if isinstance(other, MatrixBatch):
+            if len(other) != self._count:
+                raise ValueError('batches of {} and {} matrices can not be multiplied'.format(self._count, len(other)))
+            rhs_items = other._items()
+        elif isinstance(other, Matrix):
+            rhs = other._data
+            rhs_items = (rhs for _ in range(self._count))
+        else:
+            return NotImplemented
+
+        n, k = self._shape
+        if other.shape.rows != k:
+            raise ValueError('matrices inner dimension does not match')
+        m = other.shape.columns
+
+        out = []
+        kernel = _MATMUL_KERNELS.get(n) if n == k == m else None
+        if kernel:
+            for a, b in zip(self._items(), rhs_items):
+                out.extend(kernel(a, b))
+        else:
+            for a, b in zip(self._items(), rhs_items):
+                out.extend(kernels.matmul(a, b, n, k, m))
+
+        return self._result(out, self._count, n, m, promote(self._storage, other.dtype).dtype)
+
+    @property
+    def T(self):
+        """Batch of the transposed matrices"""
+        rows, cols = self._shape
+        out = []
+        for a in self._items():
+            for c in range(cols):
+                out.extend(a[c::cols])
+
+        return self._result(out, self._count, cols, rows)
+
+    def _check_square(self):
+        if self._shape.rows != self._shape.columns:
+            raise ValueError('matrices in batch are not square')
+
+    def det(self):
+        """Get the determinants of all matrices in the batch as a list"""
+        self._check_square()
+        n = self._shape.rows
+        kernel = _DET_KERNELS.get(n)
+        if kernel:
+            return [kernel(a) for a in self._items()]
+
+        dets = []
+        for a in self._items():
+            data = list(a)
+            try:
+                piv = kernels.lu_factor_inplace(data, n, 0)
+            except ValueError:
+                dets.append(self._float_dtype()(0))
+                continue
+            d = kernels.permutation_sign(piv)
+            for i in range(n):
+                d *= data[i * n + i]
+            dets.append(d)
+
+        return dets
+
+    def inv(self, tol=1e-15):
+        """Get the batch of inverses, raises ValueError naming the first singular matrix"""
+        self._check_square()
+        n = self._shape.rows
+        kernel = _INV_KERNELS.get(n)
+        out = []
+        for k, a in enumerate(self._items()):
+            try:
+                if kernel:
+                    out.extend(kernel(a, tol))
+                else:
+                    out.extend(_lu_inverse(list(a), n, tol))
+            except ValueError:
+                raise ValueError('matrix {} of the batch is singular'.format(k)) from None
+
+        return self._result(out, self._count, n, n, self._float_dtype())
+
+    def solve(self, B, tol=1e-15):
+        """Solve A_k X_k = B_k for every matrix A_k of the batch with LU factorization and substitution
+
+        :param B: batch of right hand sides with one matrix per system, or a single matrix used for all of them
+        :param tol: pivots with smaller magnitude than this are treated as zero
+        :return: batch of solutions
+        """
+        self._check_square()
+        n = self._shape.rows
+        if B.shape.rows != n:
+            raise ValueError('right hand side has {} rows, expected {}'.format(B.shape.rows, n))
+        h = B.shape.columns
+        if isinstance(B, MatrixBatch):
+            if len(B) != self._count:
+                raise ValueError('batch of {} systems got {} right hand sides'.format(self._count, len(B)))
+            rhs_items = B._items()
+        else:
+            rhs_items = repeat(B._data, self._count)
+
+        out = []
+        for k, (a, b) in enumerate(zip(self._items(), rhs_items)):
+            data = list(a)
+            try:
+                piv = kernels.lu_factor_inplace(data, n, tol)
+            except ValueError:
+                raise ValueError('matrix {} of the batch is singular'.format(k)) from None
+            lower, upper, diag = kernels.lu_split(data, n)
+            columns = [kernels.lu_substitute(lower, upper, diag, [b[p * h + j] for p in piv]) for j in range(h)]
+            out.extend(columns[j][i] for i in range(n) for j in range(h))
+
+        return self._result(out, self._count, n, h, self._float_dtype())
+
+
+def _lu_inverse(data, n, tol):
+    piv = kernels.lu_factor_inplace(data, n, tol)
+    lower, upper, diag = kernels.lu_split(data, n)
+    columns = [kernels.lu_substitute(lower, upper, diag, [1 if p == j else 0 for p in piv]) for j in range(n)]
+
+    return [columns[j][i] for i in range(n) for j in range(n)]
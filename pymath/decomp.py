@@ -0,0 +1,228 @@
+"""Cholesky and QR factorizations and triangular solves
+
+The counterparts of pymath.lu for the systems LU is wasteful on:
+
+ - cholesky and CholeskyFactorization for symmetric positive definite matrices, A = LL^T. Only the lower
+   triangle of L is kept and the factorization takes half the flops of LU.
+ - qr, QRFactorization and lstsq for over-determined least squares problems, min ||AX - B||, with Householder
+   reflections, which are stable where the normal equations A^T A X = A^T B are not.
+ - solve_triangular for triangular systems with a block of right hand sides.
+
+All of them run on the substitution kernels of pymath.kernels shared with the LU solver.
+"""
+from itertools import chain
+
+from pymath import kernels
+from pymath.instrument import instrumented
+from pymath.matrix import Matrix
+from pymath.storage import get_storage
+
+
+def _float_storage(M):
+    return get_storage(M.backend, float if M.dtype is int else M.dtype)
+
+
+def _from_columns(columns, rows, storage):
+    """Get the matrix with the given column lists"""
+    return Matrix._wrap(storage.fromiter(chain.from_iterable(zip(*columns))), rows, len(columns), storage)
+
+
+def _check_rows(B, n):
+    if B.shape.rows != n:
+        raise ValueError('right hand side has {} rows, expected {}'.format(B.shape.rows, n))
+
+
+@instrumented('decomp.solve_triangular')
+def solve_triangular(T, B, lower=True, unit_diagonal=False):
+    """Solve TX = B for a triangular matrix T
+
+    Only the lower (or upper) triangle of T is read, so the packed factors of lu_factor can be passed directly.
+
+    :param T: square triangular matrix
+    :param B: right hand side matrix, one column per system
+    :param lower: T is lower triangular, otherwise upper triangular
+    :param unit_diagonal: assume the diagonal entries of T are 1 without reading them
+    :return: solution X
+    """
+    n, cols = T.shape
+    if n != cols:
+        raise ValueError('matrix is not square')
+    _check_rows(B, n)
+
+    rows, diag = kernels.triangle_rows(T._data, n, lower)
+    if unit_diagonal:
+        diag = None
+    elif not all(diag):
+        raise ValueError('matrix is singular')
+    substitute = kernels.forward_substitute if lower else kernels.backward_substitute
+    columns = [substitute(rows, diag, col) for col in kernels.columns(B._data, n, B.shape.columns)]
+
+    return _from_columns(columns, n, _float_storage(T))
+
+
+class CholeskyFactorization(object):
+    """Reusable Cholesky factorization A = LL^T of a symmetric positive definite matrix
+
+    Only the lower triangle of A is read and only the n(n+1)/2 entries of L are stored:
+        f = CholeskyFactorization(A)
+        X = f.solve(B)
+    """
+
+    def __init__(self, A, tol=0):
+        """
+        :param A: symmetric positive definite matrix
+        :param tol: diagonal entries of L must be larger than the square root of this
+        """
+        n, cols = A.shape
+        if n != cols:
+            raise ValueError('matrix is not square')
+        self.shape = A.shape
+        self._storage = _float_storage(A)
+        self._rows = kernels.cholesky_rows(A._data, n, tol)
+
+    @property
+    def L(self):
+        """Lower triangular factor"""
+        n = self.shape.rows
+        L = Matrix._wrap(self._storage.zeros(n * n), n, n, self._storage)
+        for i, row in enumerate(self._rows):
+            L[i * n: i * n + i + 1] = row
+
+        return L
+
+    def solve_vector(self, b):
+        """Solve Ax = b for a single right hand side
+
+        :param b: sequence of n entries
+        :return: solution as a list
+        """
+        n = self.shape.rows
+        if len(b) != n:
+            raise ValueError('right hand side has {} entries, expected {}'.format(len(b), n))
+
+        return kernels.cholesky_substitute(self._rows, list(b))
+
+    def solve(self, B):
+        """Solve AX = B for a whole block of right hand side columns
+
+        :param B: right hand side matrix, one column per system
+        :return: solution X
+        """
+        n = self.shape.rows
+        _check_rows(B, n)
+        columns = [kernels.cholesky_substitute(self._rows, col) for col in kernels.columns(B._data, n, B.shape.columns)]
+
+        return _from_columns(columns, n, self._storage)
+
+    def det(self):
+        """Determinant of the factorized matrix, the square of the product of the diagonal of L"""
+        d = 1
+        for i, row in enumerate(self._rows):
+            d *= row[i]
+
+        return d * d
+
+
+@instrumented('decomp.cholesky')
+def cholesky(A, tol=0):
+    """Cholesky factorize a symmetric positive definite matrix
+
+    :param A: symmetric positive definite matrix, only its lower triangle is read
+    :param tol: diagonal entries of L must be larger than the square root of this
+    :return: lower triangular L with A = LL^T
+    """
+    return CholeskyFactorization(A, tol).L
+
+
+@instrumented('decomp.cholesky_solve')
+def cholesky_solve(A, B):
+    """Solve AX = B for a symmetric positive definite matrix A"""
+    return CholeskyFactorization(A).solve(B)
+
+
+class QRFactorization(object):
+    """Reusable Householder QR factorization A = QR of an m x n matrix with m >= n
+
+    Q is kept as the n Householder reflectors, Q and R are the reduced factors (m x n and n x n):
+        f = QRFactorization(A)
+        X = f.solve(B)    # least squares solution
+    """
+
+    def __init__(self, A):
+        m, n = A.shape
+        if m < n:
+            raise ValueError('matrix has fewer rows than columns: {}x{}'.format(m, n))
+        self.shape = A.shape
+        self._storage = _float_storage(A)
+        cols = kernels.columns(A._data, m, n)
+        self._reflectors = kernels.householder_qr(cols, m)
+        self._upper = [col[:j] for j, col in enumerate(cols)]
+        self._diag = [col[j] for j, col in enumerate(cols)]
+
+    @property
+    def Q(self):
+        """Orthonormal m x n factor"""
+        m, n = self.shape
+        columns = []
+        for j in range(n):
+            e = [0.0] * m
+            e[j] = 1.0
+            columns.append(kernels.apply_reflectors(self._reflectors, e, transpose=False))
+
+        return _from_columns(columns, m, self._storage)
+
+    @property
+    def R(self):
+        """Upper triangular n x n factor"""
+        n = self.shape.columns
+        return _from_columns([upper + [d] + [0] * (n - j - 1) for j, (upper, d) in
+                              enumerate(zip(self._upper, self._diag))], n, self._storage)
+
+    def rank(self, tol=1e-12):
+        """Number of diagonal entries of R larger than tol relative to the largest one"""
+        largest = max(map(abs, self._diag), default=0)
+        return sum(1 for d in self._diag if abs(d) > tol * largest)
+
+    def solve(self, B, tol=1e-12):
+        """Solve the least squares problem min ||AX - B|| for a whole block of right hand side columns
+
+        X = R^-1 (Q^T B)[:n]. The residual of column j is the norm of the remaining m - n entries of Q^T B.
+
+        :param B: right hand side matrix with m rows, one column per problem
+        :param tol: A is rank deficient when a diagonal entry of R is not larger than tol times the largest one
+        :return: solution X, n x B.columns
+        """
+        m, n = self.shape
+        _check_rows(B, m)
+        if self.rank(tol) < n:
+            raise ValueError('matrix is rank deficient')
+
+        # The upper rows of R are its columns above the diagonal, read column wise
+        rows = [[self._upper[j][i] for j in range(i + 1, n)] for i in range(n)]
+        columns = []
+        for col in kernels.columns(B._data, m, B.shape.columns):
+            y = kernels.apply_reflectors(self._reflectors, col)
+            columns.append(kernels.backward_substitute(rows, self._diag, y[:n]))
+
+        return _from_columns(columns, n, self._storage)
+
+
+@instrumented('decomp.qr')
+def qr(A):
+    """Householder QR factorize an m x n matrix with m >= n
+
+    :return: Q, R with orthonormal columns Q (m x n), upper triangular R (n x n) and A = QR
+    """
+    f = QRFactorization(A)
+
+    return f.Q, f.R
+
+
+@instrumented('decomp.lstsq')
+def lstsq(A, B, tol=1e-12):
+    """Solve the least squares problem min ||AX - B|| for an m x n matrix A with m >= n of full column rank
+
+    :param tol: relative tolerance for the rank check, see QRFactorization.solve
+    :return: solution X
+    """
+    return QRFactorization(A).solve(B, tol)
@@ -0,0 +1,302 @@
+"""Exact linear algebra over the integers and the rationals
+
+Gaussian elimination on Fractions (what lu.lu does for a Fraction matrix) reduces every entry to lowest terms at
+every step, and the numerators and denominators still grow far beyond the size of the result. Here the matrices
+are scaled to integer rows and eliminated fraction-free instead:
+
+ - Bareiss elimination: every intermediate entry is a minor of the input, divided exactly by the previous pivot,
+   so the entries never grow beyond the size of the determinant. det, rank and solve run on it, and solve returns
+   the solution over the single denominator det(A).
+ - Multimodular: det_modular and solve_modular compute the same results modulo enough 62-bit primes to exceed
+   Hadamard's bound and combine them with the Chinese remainder theorem. Every prime is an independent machine
+   word sized computation, see parallel.det_modular and parallel.solve_modular to spread them over processes.
+
+Entries may be ints, Fractions or floats (taken at their exact binary value), results are ints or Fractions.
+"""
+import math
+from fractions import Fraction
+from operator import mul
+
+from pymath import prime
+from pymath.instrument import instrumented
+from pymath.matrix import Matrix
+
+# Moduli of the multimodular algorithms are the primes below 2^MODULUS_BITS
+MODULUS_BITS = 62
+
+
+def _integer_rows(data, rows, cols):
+    """Scale every row of the flat rows x cols matrix data to integers
+
+    :return: rows, scales where rows[i] is row i of data times the integer scales[i]
+    """
+    int_rows, scales = [], []
+    for r in range(rows):
+        row = [Fraction(v) for v in data[r * cols: (r + 1) * cols]]
+        scale = math.lcm(*(v.denominator for v in row))
+        int_rows.append([int(v * scale) for v in row])
+        scales.append(scale)
+
+    return int_rows, scales
+
+
+def _augmented(A, B):
+    n, cols = A.shape
+    if n != cols:
+        raise ValueError('matrix is not square')
+    if B.shape.rows != n:
+        raise ValueError('right hand side has {} rows, expected {}'.format(B.shape.rows, n))
+
+    # Scaling a row of [A | B] does not change the solution
+    a, b, h = A._data, B._data, B.shape.columns
+    data = [v for r in range(n) for v in (*a[r * n: (r + 1) * n], *b[r * h: (r + 1) * h])]
+
+    return _integer_rows(data, n, n + h)[0]
+
+
+def bareiss(rows, columns=None):
+    """Bareiss fraction-free elimination of the integer rows, in place, to row echelon form
+
+    Pivot k divides every update of step k + 1 exactly, so entry (i, j) after step k is the minor of the pivot
+    rows and columns so far plus row i and column j. Columns without a pivot are skipped.
+
+    :param rows: list of equal length lists of ints
+    :param columns: only look for pivots in the first columns, all by default
+    :return: rank, sign, pivots with the sign of the row exchanges and the pivot column of every pivot row. For a
+             full rank square matrix the last pivot is sign * det.
+    """
+    n = len(rows)
+    columns = len(rows[0]) if columns is None else columns
+    previous = 1
+    sign = 1
+    pivots = []
+    for c in range(columns):
+        r = len(pivots)
+        if r == n:
+            break
+        p = next((i for i in range(r, n) if rows[i][c]), None)
+        if p is None:
+            continue
+        if p != r:
+            rows[r], rows[p] = rows[p], rows[r]
+            sign = -sign
+
+        pivot_row = rows[r]
+        pivot = pivot_row[c]
+        tail = pivot_row[c + 1:]
+        for i in range(r + 1, n):
+            row = rows[i]
+            a = row[c]
+            row[c + 1:] = [(pivot * x - a * y) // previous for x, y in zip(row[c + 1:], tail)]
+            row[c] = 0
+        previous = pivot
+        pivots.append(c)
+
+    return len(pivots), sign, pivots
+
+
+@instrumented('exact.det')
+def det(A):
+    """Exact determinant of a square matrix with Bareiss elimination
+
+    :return: int, or Fraction for a matrix with non-integer entries
+    """
+    n, cols = A.shape
+    if n != cols:
+        raise ValueError('matrix is not square')
+    if not n:
+        return 1
+
+    rows, scales = _integer_rows(A._data, n, n)
+    rank, sign, _ = bareiss(rows)
+    d = sign * rows[-1][-1] if rank == n else 0
+
+    return Fraction(d, math.prod(scales)) if any(s != 1 for s in scales) else d
+
+
+@instrumented('exact.rank')
+def rank(A):
+    """Exact rank of a matrix"""
+    if not A.shape.rows:
+        return 0
+    return bareiss(_integer_rows(A._data, *A.shape)[0])[0]
+
+
+@instrumented('exact.solve_fraction_free')
+def solve_fraction_free(A, B):
+    """Solve AX = B exactly for a non-singular square A without leaving the integers
+
+    Bareiss elimination of [A | B] is followed by a fraction-free back substitution: the numerators of the
+    solution over the denominator d = det (of A with its rows scaled to integers) are integers by Cramer's rule,
+    so every division is exact.
+
+    :return: N, d with the int matrix N = dX and the int d
+    """
+    n = A.shape.rows
+    rows = _augmented(A, B)
+    rank, _, _ = bareiss(rows, n)
+    if rank < n:
+        raise ValueError('matrix is singular')
+
+    d = rows[-1][n - 1]
+    h = B.shape.columns
+    numerators = [[0] * h for _ in range(n)]
+    for i in range(n - 1, -1, -1):
+        row = rows[i]
+        for k in range(h):
+            s = d * row[n + k] - sum(row[j] * numerators[j][k] for j in range(i + 1, n))
+            numerators[i][k] = s // row[i]
+
+    return Matrix(numerators, dtype=int), d
+
+
+def _fractions(numerators, d, rows, cols):
+    return Matrix([Fraction(v, d) for v in numerators], rows, cols, dtype=Fraction)
+
+
+@instrumented('exact.solve')
+def solve(A, B):
+    """Solve AX = B exactly for a non-singular square A
+
+    :return: Fraction matrix X
+    """
+    N, d = solve_fraction_free(A, B)
+    return _fractions(N._data, d, *N.shape)
+
+
+def moduli(bits=MODULUS_BITS):
+    """Generate the primes below 2^bits in decreasing order"""
+    p = 1 << bits
+    table = prime.prime_table()
+    while True:
+        p = table.prev_prime(p)
+        yield p
+
+
+def hadamard_bound(rows, n):
+    """Bound on the absolute value of every n x n minor of the integer matrix with the given rows
+
+    The product of the n largest column norms bounds the determinant of any n of the columns (Hadamard).
+    """
+    norms = sorted((sum(row[j] * row[j] for row in rows) for j in range(len(rows[0]))), reverse=True)
+    return math.isqrt(math.prod(norms[:n])) + 1
+
+
+def modular_image(rows, n, p):
+    """Solve the system with the integer rows modulo the prime p
+
+    The first n columns are the matrix, the other columns the right hand sides. They are eliminated to a unit
+    upper triangle and the right hand sides back substituted.
+
+    :return: det, numerators with the determinant of the first n columns and the rows of the solution times it,
+             modulo p. numerators is None if the determinant is 0 modulo p.
+    """
+    rows = [[x % p for x in row] for row in rows]
+    d = 1
+    for c in range(n):
+        r = next((i for i in range(c, n) if rows[i][c]), None)
+        if r is None:
+            return 0, None
+        if r != c:
+            rows[c], rows[r] = rows[r], rows[c]
+            d = -d
+        pivot = rows[c][c]
+        d = d * pivot % p
+        inverse = pow(pivot, -1, p)
+        tail = rows[c][c + 1:] = [x * inverse % p for x in rows[c][c + 1:]]
+        for row in rows[c + 1:]:
+            a = row[c]
+            if a:
+                row[c + 1:] = [(x - a * y) % p for x, y in zip(row[c + 1:], tail)]
+
+    solution = [row[n:] for row in rows]
+    for i in range(n - 2, -1, -1):
+        row, x = rows[i], solution[i]
+        for j in range(i + 1, n):
+            u = row[j]
+            if u:
+                x = [(v - u * w) % p for v, w in zip(x, solution[j])]
+        solution[i] = x
+    d %= p
+
+    return d, [[v * d % p for v in x] for x in solution]
+
+
+def _image_task(rows, n, p):
+    return p, modular_image(rows, n, p)
+
+
+def _crt(residues, primes):
+    """Combine the lists of residues modulo every prime into the integers of least absolute value"""
+    M = math.prod(primes)
+    coefficients = [(M // p) * pow(M // p, -1, p) for p in primes]
+    half = M // 2
+    values = []
+    for column in zip(*residues):
+        v = sum(map(mul, column, coefficients)) % M
+        values.append(v - M if v > half else v)
+
+    return values
+
+
+def _multimodular(rows, n, mapper):
+    """Get det and the numerators of the solution (None for a det only) from images modulo enough primes
+
+    Primes dividing a non-zero det are dropped, the det is 0 if it is 0 modulo primes with a product beyond the
+    bound.
+    """
+    bound = 2 * hadamard_bound(rows, n)
+    primes = moduli()
+    good, images = [], []
+    product = zero_product = 1
+    while product <= bound:
+        needed = max(1, (bound // product).bit_length() // (MODULUS_BITS - 1) + 1)
+        tasks = [(rows, n, next(primes)) for _ in range(needed)]
+        for p, (d, numerators) in mapper(_image_task, *zip(*tasks)):
+            if d:
+                good.append(p)
+                images.append([d] + [x for row in numerators for x in row])
+                product *= p
+            else:
+                zero_product *= p
+        if not good and zero_product > bound:
+            return 0, None
+
+    values = _crt(images, good)
+
+    return values[0], values[1:]
+
+
+@instrumented('exact.det_modular')
+def det_modular(A, mapper=map):
+    """Exact determinant of a square matrix computed modulo many primes
+
+    :param mapper: map-like function computing the images modulo the primes, map computes them one by one
+    :return: int, or Fraction for a matrix with non-integer entries
+    """
+    n, cols = A.shape
+    if n != cols:
+        raise ValueError('matrix is not square')
+    if not n:
+        return 1
+
+    rows, scales = _integer_rows(A._data, n, n)
+    d, _ = _multimodular(rows, n, mapper)
+
+    return Fraction(d, math.prod(scales)) if any(s != 1 for s in scales) else d
+
+
+@instrumented('exact.solve_modular')
+def solve_modular(A, B, mapper=map):
+    """Solve AX = B exactly for a non-singular square A, modulo many primes
+
+    :param mapper: map-like function computing the images modulo the primes, map computes them one by one
+    :return: Fraction matrix X
+    """
+    n = A.shape.rows
+    rows = _augmented(A, B)
+    d, numerators = _multimodular(rows, n, mapper)
+    if not d:
+        raise ValueError('matrix is singular')
+
+    return _fractions(numerators, d, n, B.shape.columns)
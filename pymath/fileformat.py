@@ -0,0 +1,192 @@
+"""Binary on-disk formats for matrices
+
+The native format is a 32 byte header followed by the raw entries in row-major order:
+
+    offset  size
+         0     8  magic b'PYMATRIX'
+         8     1  format version (1)
+         9     1  byte order of the entries, b'<' for little endian
+        10     1  array typecode of the entries, b'd' for float or b'q' for int
+        11     5  padding
+        16     8  number of rows, unsigned little endian
+        24     8  number of columns, unsigned little endian
+
+The entries are always written little endian and start 8 byte aligned, so a file can be memory mapped and its
+entries used in place without parsing or copying. The .npy format of numpy (C ordered 2-dimensional '<f8' and '<i8'
+arrays) can be read and written as well, without numpy being installed.
+"""
+import ast
+import struct
+import sys
+from array import array
+from mmap import ACCESS_COPY, ACCESS_READ, ACCESS_WRITE, mmap as _memory_map
+
+from pymath.storage import typecode
+
+MAGIC = b'PYMATRIX'
+VERSION = 1
+
+_HEADER = struct.Struct('<8sBcc5xQQ')
+
+NPY_MAGIC = b'\x93NUMPY'
+
+_NPY_DESCR = {'d': 'f8', 'q': 'i8'}
+
+_DTYPES = {'d': float, 'q': int}
+
+# buffer formats holding the entries of a typecode, numpy exports 64 bit ints as 'l'
+_FORMATS = {'d': ('d',), 'q': ('q', 'l')}
+
+_ACCESS = {'r': ACCESS_READ, 'r+': ACCESS_WRITE, 'c': ACCESS_COPY}
+
+_NATIVE_ORDER = '<' if sys.byteorder == 'little' else '>'
+
+
+def _entries(data, code):
+    """Get the entries of a flat sequence as a buffer of native typecode code, copying only when needed"""
+    try:
+        view = memoryview(data)
+    except TypeError:
+        return array(code, data)
+
+    if view.contiguous and view.itemsize == array(code).itemsize and view.format.lstrip('@=') in _FORMATS[code]:
+        return view.cast('B')
+    return array(code, data)
+
+
+def _write_entries(f, data, code):
+    entries = _entries(data, code)
+    if _NATIVE_ORDER != '<':
+        entries = array(code, entries)
+        entries.byteswap()
+    f.write(entries)
+
+
+def save(path, data, shape, dtype):
+    """Write flat row-major entries to path in the native format
+
+    :param path: file name
+    :param data: flat sequence of rows*columns entries
+    :param shape: (rows, columns)
+    :param dtype: float or int
+    """
+    code = typecode(dtype)
+    rows, cols = shape
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, b'<', code.encode(), rows, cols))
+        _write_entries(f, data, code)
+
+
+def create(path, shape, dtype):
+    """Create a matrix file in the native format with all entries zero
+
+    The entries are not written, the file is only extended to its full size, so even a huge file is created
+    instantly (and sparse on most file systems). Map it with load(path, mode='r+') to fill it in.
+
+    :param path: file name
+    :param shape: (rows, columns)
+    :param dtype: float or int
+    """
+    code = typecode(dtype)
+    rows, cols = shape
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, b'<', code.encode(), rows, cols))
+        f.truncate(_HEADER.size + rows * cols * array(code).itemsize)
+
+
+def save_npy(path, data, shape, dtype):
+    """Write flat row-major entries to path in the numpy .npy format (version 1.0)
+
+    :param path: file name
+    :param data: flat sequence of rows*columns entries
+    :param shape: (rows, columns)
+    :param dtype: float or int
+    """
+    code = typecode(dtype)
+    header = "{{'descr': '<{}', 'fortran_order': False, 'shape': ({}, {}), }}".format(_NPY_DESCR[code], *shape)
+    # the header is padded with spaces and ends with a newline, so the entries start 64 byte aligned
+    header += ' ' * (-(len(NPY_MAGIC) + 2 + 2 + len(header) + 1) % 64) + '\n'
+    with open(path, 'wb') as f:
+        f.write(NPY_MAGIC + bytes((1, 0)) + struct.pack('<H', len(header)) + header.encode('latin1'))
+        _write_entries(f, data, code)
+
+
+def _read_native_header(f):
+    header = f.read(_HEADER.size)
+    if len(header) != _HEADER.size:
+        raise ValueError('truncated matrix file header')
+    magic, version, byteorder, code, rows, cols = _HEADER.unpack(header)
+    if version != VERSION:
+        raise ValueError('unsupported matrix file version {}'.format(version))
+    if byteorder not in (b'<', b'>') or code not in (b'd', b'q'):
+        raise ValueError('unsupported matrix file entries {!r}'.format((byteorder + code).decode()))
+
+    return _HEADER.size, byteorder.decode(), code.decode(), (rows, cols)
+
+
+def _read_npy_header(f):
+    version = f.read(2)
+    if len(version) != 2 or version[0] not in (1, 2, 3):
+        raise ValueError('unsupported .npy file version {}'.format(tuple(version)))
+    size_format = '<H' if version[0] == 1 else '<I'
+    header_size = struct.unpack(size_format, f.read(struct.calcsize(size_format)))[0]
+    header = ast.literal_eval(f.read(header_size).decode('latin1' if version[0] < 3 else 'utf8'))
+
+    descr = header['descr']
+    byteorder, kind = descr[:1], descr[1:]
+    code = {'f8': 'd', 'i8': 'q'}.get(kind)
+    if byteorder not in '<>|=' or code is None:
+        raise ValueError('unsupported .npy dtype {!r}, expected float64 or int64'.format(descr))
+    if byteorder in '|=':
+        byteorder = _NATIVE_ORDER
+    if header['fortran_order']:
+        raise ValueError('Fortran ordered .npy files are not supported')
+    if len(header['shape']) != 2:
+        raise ValueError('.npy file holds a {}-dimensional array, expected 2'.format(len(header['shape'])))
+
+    return f.tell(), byteorder, code, tuple(header['shape'])
+
+
+def load(path, mmap=True, mode='r'):
+    """Read the entries of a matrix file, in the native or the .npy format
+
+    With mmap the file is memory mapped and the entries are returned as a memoryview into the mapping: opening is
+    instant and the pages are read from disk when the entries are first touched. Files not stored in native byte
+    order are always read into memory.
+
+    :param path: file name
+    :param mmap: memory map the file instead of reading it
+    :param mode: mapping mode, 'r' read only, 'r+' writes go to the file, 'c' copy on write
+    :return: (entries, (rows, columns), dtype) with the entries as a flat array.array or memoryview
+    """
+    if mode not in _ACCESS:
+        raise ValueError('unknown mapping mode {!r}, expected one of {}'.format(mode, tuple(_ACCESS)))
+
+    with open(path, 'rb' if mode != 'r+' else 'r+b') as f:
+        magic = f.read(len(MAGIC))
+        if magic.startswith(NPY_MAGIC):
+            f.seek(len(NPY_MAGIC))
+            offset, byteorder, code, shape = _read_npy_header(f)
+        elif magic == MAGIC:
+            f.seek(0)
+            offset, byteorder, code, shape = _read_native_header(f)
+        else:
+            raise ValueError('{} is not a matrix file'.format(path))
+
+        rows, cols = shape
+        nbytes = rows * cols * array(code).itemsize
+        f.seek(0, 2)
+        if f.tell() < offset + nbytes:
+            raise ValueError('truncated matrix file, expected {} bytes of entries'.format(nbytes))
+
+        if mmap and nbytes and byteorder == _NATIVE_ORDER:
+            mapping = _memory_map(f.fileno(), 0, access=_ACCESS[mode])
+            return memoryview(mapping)[offset: offset + nbytes].cast(code), shape, _DTYPES[code]
+
+        f.seek(offset)
+        data = array(code)
+        data.frombytes(f.read(nbytes))
+        if byteorder != _NATIVE_ORDER:
+            data.byteswap()
+
+    return data, shape, _DTYPES[code]
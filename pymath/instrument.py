@@ -0,0 +1,237 @@
+"""Opt-in instrumentation of the matrix, LU and prime operations
+
+Operations decorated with instrumented record their calls, cumulative wall clock time, a histogram of their input
+shapes and the net number of memory blocks they leave allocated (their results, mostly), but only while a
+Collector is active. With no collector active an instrumented call costs one extra function call and a test.
+
+    with instrument.collect() as stats:
+        lu.solve(A, B)
+    print(stats.to_json(indent=2))
+
+A Collector is also a decorator collecting during every call of the decorated function, and instrument.enable()
+activates the module wide instrument.default collector until disable() is called:
+
+    instrument.enable()
+    ...
+    text = instrument.default.to_prometheus()
+
+profile(path) runs a scope under cProfile and writes the pstats dump to path.
+"""
+import cProfile
+import functools
+import inspect
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import ContextDecorator
+
+# Collectors recording instrumented operations, innermost last
+_active = []
+
+
+def describe(args):
+    """Get the histogram key of the inputs of an operation
+
+    Matrices and other arguments with a shape are described by their shape, integers by their bit length and
+    other sized arguments by their length, for instance '3x4,4x5' or 'bits=40'.
+    """
+    parts = []
+    for arg in args:
+        shape = getattr(arg, 'shape', None)
+        if shape is not None:
+            parts.append('x'.join(map(str, shape)))
+        elif isinstance(arg, int) and not isinstance(arg, bool):
+            parts.append('bits={}'.format(arg.bit_length()))
+        elif hasattr(arg, '__len__') and not isinstance(arg, (str, tuple)):
+            parts.append('len={}'.format(len(arg)))
+
+    return ','.join(parts)
+
+
+class OperationStats(object):
+    """Statistics of one operation recorded by a Collector"""
+
+    __slots__ = ('calls', 'seconds', 'min_seconds', 'max_seconds', 'allocations', 'shapes')
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.min_seconds = float('inf')
+        self.max_seconds = 0.0
+        self.allocations = 0
+        self.shapes = Counter()
+
+    def as_dict(self):
+        return {
+            'calls': self.calls,
+            'seconds': self.seconds,
+            'min_seconds': self.min_seconds if self.calls else 0.0,
+            'max_seconds': self.max_seconds,
+            'allocations': self.allocations,
+            'shapes': dict(self.shapes),
+        }
+
+
+class Collector(ContextDecorator):
+    """Statistics of the instrumented operations run while it is active, see the module documentation"""
+
+    def __init__(self):
+        self.operations = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        _active.append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _active.remove(self)
+        return False
+
+    def record(self, name, seconds, shape, allocations):
+        with self._lock:
+            stats = self.operations.get(name)
+            if stats is None:
+                stats = self.operations[name] = OperationStats()
+            stats.calls += 1
+            stats.seconds += seconds
+            stats.min_seconds = min(stats.min_seconds, seconds)
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.allocations += allocations
+            stats.shapes[shape] += 1
+
+    def reset(self):
+        """Forget all statistics recorded so far"""
+        with self._lock:
+            self.operations.clear()
+
+    def __getitem__(self, name):
+        return self.operations[name]
+
+    def as_dict(self):
+        """Get the statistics as a dict of operation name to a dict of its statistics"""
+        with self._lock:
+            return {name: stats.as_dict() for name, stats in sorted(self.operations.items())}
+
+    def to_json(self, indent=None):
+        return json.dumps(self.as_dict(), indent=indent)
+
+    def to_prometheus(self, prefix='pymath'):
+        """Get the statistics in the Prometheus text exposition format"""
+        metrics = (
+            ('operation_calls_total', 'counter', 'Number of calls of the operation', 'calls'),
+            ('operation_seconds_total', 'counter', 'Cumulative wall clock time of the operation', 'seconds'),
+            ('operation_max_seconds', 'gauge', 'Longest wall clock time of a call of the operation', 'max_seconds'),
+            ('operation_allocations_total', 'counter', 'Net memory blocks left allocated by the operation',
+             'allocations'),
+        )
+        operations = self.as_dict()
+        lines = []
+        for metric, kind, help_text, key in metrics:
+            lines.append('# HELP {}_{} {}'.format(prefix, metric, help_text))
+            lines.append('# TYPE {}_{} {}'.format(prefix, metric, kind))
+            for name, stats in operations.items():
+                lines.append('{}_{}{{operation="{}"}} {}'.format(prefix, metric, _escape(name), stats[key]))
+
+        lines.append('# HELP {}_operation_shape_calls_total Number of calls of the operation by input shape'.format(
+            prefix))
+        lines.append('# TYPE {}_operation_shape_calls_total counter'.format(prefix))
+        for name, stats in operations.items():
+            for shape, calls in sorted(stats['shapes'].items()):
+                lines.append('{}_operation_shape_calls_total{{operation="{}",shape="{}"}} {}'.format(
+                    prefix, _escape(name), _escape(shape), calls))
+
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(label):
+    return label.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def collect():
+    """Get a new Collector, to be used as a context manager or a decorator"""
+    return Collector()
+
+
+# Collector activated by enable()
+default = Collector()
+
+
+def enable():
+    """Start collecting into instrument.default everywhere, until disable() is called"""
+    if default not in _active:
+        default.__enter__()
+
+
+def disable():
+    if default in _active:
+        default.__exit__(None, None, None)
+
+
+def _record(name, args, started, blocks):
+    seconds = time.perf_counter() - started
+    allocations = sys.getallocatedblocks() - blocks
+    shape = describe(args)
+    for collector in _active:
+        collector.record(name, seconds, shape, allocations)
+
+
+def instrumented(name):
+    """Decorator recording the calls of an operation in the active collectors
+
+    Generator functions are timed over their whole iteration, and recorded when exhausted or closed.
+
+    :param name: operation name, such as 'matrix.matmul'
+    """
+    def decorate(fn):
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def generator_wrapper(*args, **kwargs):
+                if not _active:
+                    return (yield from fn(*args, **kwargs))
+                started, blocks = time.perf_counter(), sys.getallocatedblocks()
+                try:
+                    return (yield from fn(*args, **kwargs))
+                finally:
+                    _record(name, args, started, blocks)
+
+            return generator_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _active:
+                return fn(*args, **kwargs)
+            started, blocks = time.perf_counter(), sys.getallocatedblocks()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _record(name, args, started, blocks)
+
+        return wrapper
+
+    return decorate
+
+
+class profile(ContextDecorator):
+    """Run a scope under cProfile and write the statistics to a file readable with pstats
+
+        with instrument.profile('lu.prof'):
+            lu.solve(A, B)
+
+    then python -m pstats lu.prof, or pstats.Stats('lu.prof').sort_stats('cumulative').print_stats(20).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.profiler = None
+
+    def __enter__(self):
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+        return self.profiler
+
+    def __exit__(self, *exc_info):
+        self.profiler.disable()
+        self.profiler.dump_stats(self.path)
+        return False
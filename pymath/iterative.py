@@ -0,0 +1,387 @@
+"""Iterative solvers for large linear systems Ax = b
+
+The solvers only need the product of A with a vector, so they work on anything with a matvec(x) method returning
+the product as a sequence: a Matrix, a SparseMatrix or a LinearOperator wrapping a matrix-free function. Every
+iteration costs one product, O(nnz) for a sparse matrix, instead of the O(n^3) of a dense LU solve.
+
+ - cg: conjugate gradient, for symmetric positive definite A
+ - gmres: restarted GMRES(m), for general A
+ - jacobi and gauss_seidel: stationary iterations, for diagonally dominant A
+
+All solvers iterate until the relative residual ||b - Ax|| / ||b|| is at most tol or maxiter iterations are done,
+and return an IterativeResult with the solution, whether it converged and the residual history. A callback, when
+given, is called as callback(iteration, residual) after every iteration. cg and gmres take an optional
+preconditioner M, an operator whose matvec applies an approximate inverse of A: DiagonalPreconditioner or
+ILUPreconditioner, for instance.
+
+    A = SparseMatrix(n, n, entries)
+    result = iterative.cg(A, b, tol=1e-10, M=iterative.ILUPreconditioner(A))
+    if result.converged:
+        x = result.x
+"""
+import collections
+import math
+from operator import mul
+
+from pymath import kernels
+from pymath.instrument import instrumented
+from pymath.matrix import Matrix, MatrixShape
+from pymath.sparse import SparseMatrix
+from pymath.vector import Vector
+
+_sumprod = getattr(math, 'sumprod', None)
+
+# gmres stops a cycle when a pivot of its triangular factor is this small relative to its column
+BREAKDOWN_TOL = 1e-14
+
+IterativeResult = collections.namedtuple('IterativeResult', ['x', 'converged', 'iterations', 'residuals'])
+IterativeResult.__doc__ = """Outcome of an iterative solve
+
+x is the last iterate as a Vector, residuals the relative residual after every iteration (the initial one first).
+"""
+
+
+def _dot(x, y):
+    if _sumprod is not None:
+        return _sumprod(x, y)
+    return sum(map(mul, x, y))
+
+
+def _norm(x):
+    return math.sqrt(_dot(x, x))
+
+
+def _scale(a, x):
+    return [a * v for v in x]
+
+
+class LinearOperator(object):
+    """A linear map given by a function computing its product with a vector
+
+        laplacian = LinearOperator(lambda x: [2 * x[i] - x[i - 1] - x[i + 1] ...], (n, n))
+
+    :param matvec: function of a sequence x returning the sequence Ax
+    :param shape: (rows, columns) of the operator
+    :param diagonal: optional function returning the diagonal entries, used by jacobi and DiagonalPreconditioner
+    """
+
+    def __init__(self, matvec, shape, diagonal=None):
+        self._matvec = matvec
+        self.shape = MatrixShape(*shape)
+        self._diagonal = diagonal
+
+    def matvec(self, x):
+        return self._matvec(x)
+
+    def diagonal(self):
+        if self._diagonal is None:
+            raise TypeError('operator has no diagonal')
+        return list(self._diagonal())
+
+    def __repr__(self):
+        return 'LinearOperator({}x{})'.format(*self.shape)
+
+
+def as_operator(A, n=None):
+    """Get A as an object with a matvec method: matrices and operators as they are, functions wrapped
+
+    :param n: size of the square operator wrapped around a function
+    """
+    if hasattr(A, 'matvec'):
+        return A
+    if callable(A):
+        return LinearOperator(A, (n, n))
+
+    raise TypeError('{} is not a linear operator'.format(type(A).__name__))
+
+
+def diagonal(A):
+    """Get the diagonal entries of a Matrix, SparseMatrix or operator with a diagonal method as a list"""
+    if isinstance(A, Matrix):
+        n = min(A.shape)
+        return list(A._data[0: n * A.shape.columns: A.shape.columns + 1])
+
+    return list(A.diagonal())
+
+
+def _csr_rows(A):
+    """Get the rows of A as (columns, values) lists of its non-zero entries"""
+    if not isinstance(A, SparseMatrix):
+        if not isinstance(A, Matrix):
+            raise TypeError('{} has no accessible entries'.format(type(A).__name__))
+        A = SparseMatrix.from_matrix(A)
+
+    return [(list(columns), list(values)) for columns, values in A._rows()]
+
+
+class DiagonalPreconditioner(object):
+    """Jacobi preconditioner, applies the inverse of the diagonal of A"""
+
+    def __init__(self, A):
+        d = diagonal(A)
+        if not all(d):
+            raise ValueError('matrix has a zero on the diagonal')
+        self.shape = MatrixShape(len(d), len(d))
+        self._inverse = [1 / v for v in d]
+
+    def matvec(self, r):
+        return list(map(mul, self._inverse, r))
+
+
+class ILUPreconditioner(object):
+    """Incomplete LU preconditioner ILU(0)
+
+    A is factorized as LU by Gaussian elimination restricted to its sparsity pattern: every fill-in entry is
+    dropped, so L and U together have the non-zeros of A. Applying it solves LUz = r by sparse substitution.
+    """
+
+    def __init__(self, A):
+        rows = [dict(zip(columns, values)) for columns, values in _csr_rows(A)]
+        n = len(rows)
+        for i in range(n):
+            row = rows[i]
+            for k in sorted(c for c in row if c < i):
+                pivot = rows[k].get(k)
+                if not pivot:
+                    raise ValueError('zero pivot in incomplete factorization at row {}'.format(k))
+                l = row[k] = row[k] / pivot
+                for j, u in rows[k].items():
+                    if j > k and j in row:
+                        row[j] -= l * u
+
+        self.shape = MatrixShape(n, n)
+        self._lower = [([c for c in sorted(row) if c < i], [row[c] for c in sorted(row) if c < i])
+                       for i, row in enumerate(rows)]
+        self._upper = [([c for c in sorted(row) if c > i], [row[c] for c in sorted(row) if c > i])
+                       for i, row in enumerate(rows)]
+        self._diag = [row.get(i, 0) for i, row in enumerate(rows)]
+        if not all(self._diag):
+            raise ValueError('zero pivot in incomplete factorization')
+
+    def matvec(self, r):
+        z = list(r)
+        for i, (columns, values) in enumerate(self._lower):
+            if columns:
+                z[i] -= _dot(values, map(z.__getitem__, columns))
+        for i in range(len(z) - 1, -1, -1):
+            columns, values = self._upper[i]
+            s = z[i] - _dot(values, map(z.__getitem__, columns)) if columns else z[i]
+            z[i] = s / self._diag[i]
+
+        return z
+
+
+class _Monitor(object):
+    """Residual history and stopping test shared by the solvers"""
+
+    def __init__(self, b, tol, callback):
+        self.bnorm = _norm(b) or 1
+        self.tol = tol
+        self.callback = callback
+        self.residuals = []
+
+    def converged(self, rnorm):
+        residual = rnorm / self.bnorm
+        if self.residuals and self.callback is not None:
+            self.callback(len(self.residuals), residual)
+        self.residuals.append(residual)
+
+        return residual <= self.tol
+
+    def correct(self, rnorm):
+        """Replace the last residual recorded by the true one, and test it"""
+        self.residuals[-1] = rnorm / self.bnorm
+        return self.residuals[-1] <= self.tol
+
+    def result(self, x, converged):
+        return IterativeResult(Vector(x), converged, len(self.residuals) - 1, self.residuals)
+
+
+def _setup(A, b, x0, maxiter):
+    n = len(b)
+    A = as_operator(A, n)
+    x = [0.0] * n if x0 is None else [float(v) for v in x0]
+    if len(x) != n:
+        raise ValueError('initial guess has {} entries, expected {}'.format(len(x), n))
+
+    return A, list(b), x, 10 * n if maxiter is None else maxiter
+
+
+def _residual(A, b, x):
+    return [bi - v for bi, v in zip(b, A.matvec(x))]
+
+
+@instrumented('iterative.cg')
+def cg(A, b, x0=None, tol=1e-8, maxiter=None, M=None, callback=None):
+    """Solve Ax = b for a symmetric positive definite A with the (preconditioned) conjugate gradient method
+
+    :param A: matrix, operator or function x -> Ax
+    :param b: right hand side sequence
+    :param x0: initial guess, zero by default
+    :param tol: relative residual to reach
+    :param maxiter: maximum number of iterations, 10 * n by default
+    :param M: preconditioner, an operator applying an approximation of A^-1 that is symmetric positive definite
+    :param callback: called as callback(iteration, residual) after every iteration
+    :return: IterativeResult
+    """
+    A, b, x, maxiter = _setup(A, b, x0, maxiter)
+    monitor = _Monitor(b, tol, callback)
+    r = _residual(A, b, x)
+    if monitor.converged(_norm(r)):
+        return monitor.result(x, True)
+
+    z = r if M is None else M.matvec(r)
+    p = list(z)
+    rz = _dot(r, z)
+    for _ in range(maxiter):
+        Ap = A.matvec(p)
+        pAp = _dot(p, Ap)
+        if not pAp:
+            break
+        alpha = rz / pAp
+        x = kernels.axpy(alpha, p, x)
+        r = kernels.axpy(-alpha, Ap, r)
+        if monitor.converged(_norm(r)):
+            return monitor.result(x, True)
+
+        z = r if M is None else M.matvec(r)
+        rz, previous = _dot(r, z), rz
+        p = kernels.axpy(rz / previous, p, z)
+
+    return monitor.result(x, False)
+
+
+@instrumented('iterative.gmres')
+def gmres(A, b, x0=None, tol=1e-8, restart=30, maxiter=None, M=None, callback=None):
+    """Solve Ax = b with the restarted generalized minimal residual method GMRES(m)
+
+    Every cycle builds an orthonormal Krylov basis of at most restart vectors with modified Gram-Schmidt, and the
+    small least squares problem is kept triangular with Givens rotations, so the residual is known after every
+    iteration without forming x. The preconditioner is applied on the right, so the residuals are those of the
+    original system. The last residual of every cycle is the true residual of the updated x, and only that one
+    decides convergence.
+
+    When the Krylov space is exhausted without solving the system (A singular and b not in its range, for
+    instance) the least squares iterate is returned with converged False.
+
+    :param restart: number of iterations per cycle, m
+    :param maxiter: maximum total number of iterations, 10 * n by default
+    :return: IterativeResult
+    """
+    A, b, x, maxiter = _setup(A, b, x0, maxiter)
+    monitor = _Monitor(b, tol, callback)
+    precondition = (lambda v: v) if M is None else M.matvec
+    r = _residual(A, b, x)
+    beta = _norm(r)
+    if monitor.converged(beta):
+        return monitor.result(x, True)
+
+    iterations = 0
+    while iterations < maxiter:
+        basis = [_scale(1 / beta, r)]
+        columns = []
+        cs, sn = [], []
+        g = [beta]
+        estimate = breakdown = False
+        for j in range(min(restart, maxiter - iterations)):
+            w = A.matvec(precondition(basis[j]))
+            h = []
+            for v in basis:
+                hij = _dot(w, v)
+                w = kernels.axpy(-hij, v, w)
+                h.append(hij)
+            h_next = _norm(w)
+
+            for i in range(j):
+                h[i], h[i + 1] = cs[i] * h[i] + sn[i] * h[i + 1], -sn[i] * h[i] + cs[i] * h[i + 1]
+            d = math.hypot(h[j], h_next)
+            # A (numerically) zero pivot: A maps the new basis vector into the span of the basis, the Krylov space
+            # is exhausted and the column can not be used
+            if d <= BREAKDOWN_TOL * math.sqrt(_dot(h, h) + h_next * h_next):
+                breakdown = True
+                break
+            cs.append(h[j] / d)
+            sn.append(h_next / d)
+            h[j] = d
+            g.append(-sn[j] * g[j])
+            g[j] *= cs[j]
+            columns.append(h)
+
+            iterations += 1
+            estimate = monitor.converged(abs(g[j + 1]))
+            if estimate or not h_next:
+                breakdown = not estimate
+                break
+            basis.append(_scale(1 / h_next, w))
+
+        # columns[j] is column j of the triangular factor, so the system is solved column by column
+        k = len(columns)
+        if not k:
+            return monitor.result(x, False)
+        y = g[:k]
+        for j in range(k - 1, -1, -1):
+            y[j] /= columns[j][j]
+            y[:j] = kernels.axpy(-y[j], columns[j][:j], y[:j])
+        update = [0.0] * len(x)
+        for yj, v in zip(y, basis):
+            update = kernels.axpy(yj, v, update)
+        x = kernels.axpy(1, precondition(update), x)
+
+        # The Givens estimate is only trusted to end a cycle, convergence is decided on the true residual
+        r = _residual(A, b, x)
+        beta = _norm(r)
+        if monitor.correct(beta):
+            return monitor.result(x, True)
+        if breakdown:
+            return monitor.result(x, False)
+
+    return monitor.result(x, False)
+
+
+@instrumented('iterative.jacobi')
+def jacobi(A, b, x0=None, tol=1e-8, maxiter=None, callback=None):
+    """Solve Ax = b with the Jacobi iteration x <- x + D^-1 (b - Ax), converges for diagonally dominant A
+
+    Only needs the products with A and its diagonal, so it also runs on operators with a diagonal method.
+
+    :return: IterativeResult
+    """
+    A, b, x, maxiter = _setup(A, b, x0, maxiter)
+    monitor = _Monitor(b, tol, callback)
+    inverse = DiagonalPreconditioner(A)
+    r = _residual(A, b, x)
+    for _ in range(maxiter):
+        if monitor.converged(_norm(r)):
+            return monitor.result(x, True)
+        x = kernels.axpy(1, inverse.matvec(r), x)
+        r = _residual(A, b, x)
+
+    return monitor.result(x, monitor.converged(_norm(r)))
+
+
+@instrumented('iterative.gauss_seidel')
+def gauss_seidel(A, b, x0=None, tol=1e-8, maxiter=None, omega=1, callback=None):
+    """Solve Ax = b with Gauss-Seidel sweeps, or successive over-relaxation with omega != 1
+
+    Every sweep updates the entries of x in order, each from the entries updated before it. Converges for
+    diagonally dominant and for symmetric positive definite A (with 0 < omega < 2). A must be a Matrix or
+    SparseMatrix.
+
+    :param omega: relaxation factor
+    :return: IterativeResult
+    """
+    rows = _csr_rows(A)
+    A, b, x, maxiter = _setup(A, b, x0, maxiter)
+    monitor = _Monitor(b, tol, callback)
+    diag = diagonal(A)
+    if not all(diag):
+        raise ValueError('matrix has a zero on the diagonal')
+
+    for _ in range(maxiter):
+        if monitor.converged(_norm(_residual(A, b, x))):
+            return monitor.result(x, True)
+        for i, (columns, values) in enumerate(rows):
+            s = _dot(values, map(x.__getitem__, columns))
+            x[i] += omega * (b[i] - s) / diag[i]
+
+    return monitor.result(x, monitor.converged(_norm(_residual(A, b, x))))
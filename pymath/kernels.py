@@ -0,0 +1,444 @@
+"""Inner kernels working on flat row-major sequences
+
+The kernels take the flat entries of their operands together with the dimensions, and never go through the
+bounds checked Matrix indexing. They accept any sequence supporting slicing: lists, array.array and memoryviews.
+"""
+from itertools import chain, repeat
+from math import sqrt
+from operator import add, mul, sub
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# Products with at least this many multiply-adds (n*k*m) are handed to numpy when it is installed
+NUMPY_THRESHOLD = 32 ** 3
+
+# Tile edge used by matmul_blocked
+BLOCK_SIZE = 64
+
+
+def columns(b, k, m):
+    """Get the m columns of the flat k x m matrix b as separate lists"""
+    return [list(b[j: k * m: m]) for j in range(m)]
+
+
+def matmul(a, b, n, k, m):
+    """Multiply the flat n x k matrix a with the flat k x m matrix b
+
+    b is transposed once up front, so every entry of the result is a dot product of two contiguous lists.
+
+    :return: list with the n*m entries of the product
+    """
+    bt = columns(b, k, m)
+    out = []
+    extend = out.extend
+    for i in range(n):
+        row = a[i * k: (i + 1) * k]
+        extend([sum(map(mul, row, col)) for col in bt])
+
+    return out
+
+
+def matmul_blocked(a, b, n, k, m, block=BLOCK_SIZE):
+    """Multiply the flat n x k matrix a with the flat k x m matrix b in tiles of block x block entries
+
+    Uses i-k-j ordering inside a tile: a scaled row segment of b is added to a row segment of the result, so
+    both operands are walked contiguously and the result is written straight into its buffer.
+
+    :return: list with the n*m entries of the product
+    """
+    out = [0] * (n * m)
+    for i0 in range(0, n, block):
+        i1 = min(i0 + block, n)
+        for p0 in range(0, k, block):
+            p1 = min(p0 + block, k)
+            for j0 in range(0, m, block):
+                j1 = min(j0 + block, m)
+                for i in range(i0, i1):
+                    o0, o1 = i * m + j0, i * m + j1
+                    acc = out[o0:o1]
+                    for p in range(p0, p1):
+                        aip = a[i * k + p]
+                        if aip:
+                            acc = list(map(add, acc, map(mul, repeat(aip), b[p * m + j0: p * m + j1])))
+                    out[o0:o1] = acc
+
+    return out
+
+
+def matmul_numpy(a, b, n, k, m):
+    """Multiply the flat n x k matrix a with the flat k x m matrix b using numpy (and BLAS when numpy has it)
+
+    :return: flat ndarray with the n*m entries of the product
+    """
+    lhs = numpy.asarray(a).reshape(n, k)
+    rhs = numpy.asarray(b).reshape(k, m)
+
+    return numpy.dot(lhs, rhs).reshape(n * m)
+
+
+def use_numpy(n, k, m, dtype, typed=False):
+    """Check if a product of the given dimensions and dtype should be dispatched to numpy
+
+    :param typed: the operands are held in typed (int64 or float64) buffers. Int products only go to numpy then,
+                  the unbounded ints of list backed matrices would overflow numpy's int64.
+    """
+    if numpy is None or n * k * m < NUMPY_THRESHOLD:
+        return False
+
+    return dtype is float or (dtype is int and typed)
+
+
+def axpy(a, x, y):
+    """Get the list a*x + y of the equal length sequences x and y"""
+    return list(map(add, map(mul, repeat(a), x), y))
+
+
+def lu_split(lu, n):
+    """Split the packed flat n x n LU factors into row lists used by lu_substitute
+
+    :return: lower, upper, diag where lower[i] is row i of L left of the diagonal, upper[i] is row i of U right of
+             the diagonal and diag[i] the diagonal entry of U
+    """
+    rows = [lu[i * n: (i + 1) * n] for i in range(n)]
+    lower = [list(row[:i]) for i, row in enumerate(rows)]
+    upper = [list(row[i + 1:]) for i, row in enumerate(rows)]
+    diag = [row[i] for i, row in enumerate(rows)]
+
+    return lower, upper, diag
+
+
+def lu_substitute(lower, upper, diag, b):
+    """Solve LUx = b by forward and backward substitution, overwriting and returning the list b
+
+    L has a unit diagonal, the factors are given in the form returned by lu_split.
+    """
+    return backward_substitute(upper, diag, forward_substitute(lower, None, b))
+
+
+def forward_substitute(lower, diag, b):
+    """Solve Lx = b for lower triangular L, overwriting and returning the list b
+
+    :param lower: lower[i] is row i of L left of the diagonal
+    :param diag: diagonal entries of L, None for a unit diagonal
+    """
+    for i in range(len(b)):
+        s = b[i] - sum(map(mul, lower[i], b[:i]))
+        b[i] = s if diag is None else s / diag[i]
+
+    return b
+
+
+def backward_substitute(upper, diag, b):
+    """Solve Ux = b for upper triangular U, overwriting and returning the list b
+
+    :param upper: upper[i] is row i of U right of the diagonal
+    :param diag: diagonal entries of U, None for a unit diagonal
+    """
+    for i in range(len(b) - 1, -1, -1):
+        s = b[i] - sum(map(mul, upper[i], b[i + 1:]))
+        b[i] = s if diag is None else s / diag[i]
+
+    return b
+
+
+def triangle_rows(data, n, lower):
+    """Split the flat n x n matrix data into the row lists used by forward_substitute or backward_substitute
+
+    :return: rows, diag where rows[i] is row i of the lower (or upper) triangle without the diagonal and diag[i]
+             the diagonal entry
+    """
+    if lower:
+        rows = [list(data[i * n: i * n + i]) for i in range(n)]
+    else:
+        rows = [list(data[i * n + i + 1: (i + 1) * n]) for i in range(n)]
+
+    return rows, [data[i * n + i] for i in range(n)]
+
+
+def cholesky_rows(data, n, tol):
+    """Cholesky factorize the symmetric positive definite flat n x n matrix data, A = LL^T
+
+    Only the lower triangle of data is read. Every entry of L is a dot product of two rows computed so far, which
+    is half the work of an LU factorization. Raises ValueError when a diagonal entry of L would be the square root
+    of a number not larger than tol, that is when the matrix is not (numerically) positive definite.
+
+    :return: the n(n+1)/2 entries of L as rows, rows[i] is row i of L up to and including the diagonal
+    """
+    rows = []
+    for i in range(n):
+        row = list(data[i * n: i * n + i + 1])
+        for j, pivot_row in enumerate(rows):
+            row[j] = (row[j] - sum(map(mul, row[:j], pivot_row))) / pivot_row[j]
+        d = row[i] - sum(map(mul, row[:i], row[:i]))
+        if d <= tol:
+            raise ValueError('matrix is not positive definite')
+        row[i] = sqrt(d)
+        rows.append(row)
+
+    return rows
+
+
+def cholesky_substitute(rows, b):
+    """Solve LL^Tx = b, overwriting and returning the list b
+
+    L is given as the rows returned by cholesky_rows. The substitution through L^T runs over the columns of L^T,
+    which are the rows of L, so L^T is never formed.
+    """
+    for i, row in enumerate(rows):
+        b[i] = (b[i] - sum(map(mul, row, b[:i]))) / row[i]
+
+    for i in range(len(b) - 1, -1, -1):
+        row = rows[i]
+        x = b[i] = b[i] / row[i]
+        if x and i:
+            b[:i] = axpy(-x, row[:i], b[:i])
+
+    return b
+
+
+def householder_qr(cols, m):
+    """Householder QR factorize, in place, the m x n matrix (m >= n) given as the list of its n columns
+
+    Reflector k is H = I - beta v v^T acting on entries k.. of a column, with v[0] on the diagonal. The sign of the
+    reflected diagonal entry is chosen opposite to the original one, so forming v never cancels.
+
+    :param cols: n lists of m entries each, on return cols[j][:j + 1] is column j of R and the rest is zero
+    :return: reflectors as a list of (v, beta), Q^T = H_{n-1} ... H_1 H_0
+    """
+    reflectors = []
+    for k, col in enumerate(cols):
+        v = col[k:]
+        alpha = sqrt(sum(map(mul, v, v)))
+        if not alpha:
+            reflectors.append((v, 0))
+            continue
+        if v[0] > 0:
+            alpha = -alpha
+        beta = 1 / (alpha * (alpha - v[0]))
+        v[0] -= alpha
+        col[k:] = [alpha] + [0] * (m - k - 1)
+        for other in cols[k + 1:]:
+            s = beta * sum(map(mul, v, other[k:]))
+            if s:
+                other[k:] = axpy(-s, v, other[k:])
+        reflectors.append((v, beta))
+
+    return reflectors
+
+
+def apply_reflectors(reflectors, b, transpose=True):
+    """Multiply the list b by Q^T (or by Q with transpose=False) given as reflectors from householder_qr, in place"""
+    for k, (v, beta) in (enumerate(reflectors) if transpose else reversed(list(enumerate(reflectors)))):
+        s = beta * sum(map(mul, v, b[k:]))
+        if s:
+            b[k:] = axpy(-s, v, b[k:])
+
+    return b
+
+
+def broadcast(data, shape, target):
+    """Iterate over the entries of the flat rows x cols matrix data broadcast to the target shape
+
+    A dimension of length 1 is repeated to the length of the target dimension.
+    """
+    rows, cols = shape
+    target_rows, target_cols = target
+    if cols != target_cols:
+        if rows == 1:
+            return repeat(data[0], target_rows * target_cols)
+        data = chain.from_iterable(map(repeat, data, repeat(target_cols)))
+    if rows != target_rows:
+        return chain.from_iterable(repeat(data, target_rows))
+
+    return data
+
+
+def lu_factor_inplace(data, n, tol):
+    """Run Doolittle elimination with partial pivoting in place on the flat n x n list data
+
+    On return data holds the packed factors: L (without its unit diagonal) below the diagonal and U on and above
+    it. Raises ValueError when a pivot is smaller than tol in magnitude.
+
+    :return: pivot indices, row i of the factorized matrix is row piv[i] of the original
+    """
+    piv = list(range(n))
+    for j in range(n):
+        column = data[j * n + j: n * n: n]
+        p = max(range(len(column)), key=lambda i: abs(column[i])) + j
+        if p != j:
+            data[j * n: (j + 1) * n], data[p * n: (p + 1) * n] = data[p * n: (p + 1) * n], data[j * n: (j + 1) * n]
+            piv[j], piv[p] = piv[p], piv[j]
+
+        pivot = data[j * n + j]
+        if not pivot or abs(pivot) < tol:
+            raise ValueError('matrix is singular')
+
+        pivot_row = data[j * n + j + 1: (j + 1) * n]
+        for i in range(j + 1, n):
+            l = data[i * n + j] / pivot
+            data[i * n + j] = l
+            if l:
+                start, end = i * n + j + 1, (i + 1) * n
+                data[start:end] = axpy(-l, pivot_row, data[start:end])
+
+    return piv
+
+
+def permutation_sign(piv):
+    """Get the sign (1 or -1) of the permutation given as an index vector"""
+    sign = 1
+    seen = [False] * len(piv)
+    for start in range(len(piv)):
+        if seen[start]:
+            continue
+        length = 0
+        i = start
+        while not seen[i]:
+            seen[i] = True
+            i = piv[i]
+            length += 1
+        if length % 2 == 0:
+            sign = -sign
+
+    return sign
+
+
+# Strassen recursion hands sub-products of at most this size to matmul
+STRASSEN_CUTOFF = 128
+
+# Products whose dimensions are all at least this large use strassen when the algorithm is chosen automatically.
+# Measured crossover with `python -m benchmarks run -k matmul.algorithm`.
+STRASSEN_THRESHOLD = 192
+
+MATMUL_ALGORITHMS = ('auto', 'naive', 'blocked', 'strassen', 'numpy')
+
+
+def choose_matmul(n, k, m, dtype, typed=False):
+    """Choose the product algorithm for an n x k times k x m product from the shape heuristics
+
+    :param typed: the operands are held in typed buffers, see use_numpy
+    """
+    if use_numpy(n, k, m, dtype, typed):
+        return 'numpy'
+    smallest, largest = min(n, k, m), max(n, k, m)
+    if smallest >= STRASSEN_THRESHOLD and largest <= 2 * smallest:
+        return 'strassen'
+
+    return 'naive'
+
+
+def _quadrants(a, n):
+    h = n // 2
+    rows = [a[i * n: (i + 1) * n] for i in range(n)]
+    top, bottom = rows[:h], rows[h:]
+
+    def flat(part, lo, hi):
+        return [v for row in part for v in row[lo:hi]]
+
+    return flat(top, 0, h), flat(top, h, n), flat(bottom, 0, h), flat(bottom, h, n)
+
+
+def _join(c11, c12, c21, c22, h):
+    out = []
+    for top, bottom in ((c11, c12), (c21, c22)):
+        for i in range(h):
+            out.extend(top[i * h: (i + 1) * h])
+            out.extend(bottom[i * h: (i + 1) * h])
+
+    return out
+
+
+def _add(x, y):
+    return list(map(add, x, y))
+
+
+def _sub(x, y):
+    return list(map(sub, x, y))
+
+
+def _strassen(a, b, n, cutoff):
+    if n <= cutoff or n & 1:
+        return matmul(a, b, n, n, n)
+
+    h = n // 2
+    a11, a12, a21, a22 = _quadrants(a, n)
+    b11, b12, b21, b22 = _quadrants(b, n)
+
+    m1 = _strassen(_add(a11, a22), _add(b11, b22), h, cutoff)
+    m2 = _strassen(_add(a21, a22), b11, h, cutoff)
+    m3 = _strassen(a11, _sub(b12, b22), h, cutoff)
+    m4 = _strassen(a22, _sub(b21, b11), h, cutoff)
+    m5 = _strassen(_add(a11, a12), b22, h, cutoff)
+    m6 = _strassen(_sub(a21, a11), _add(b11, b12), h, cutoff)
+    m7 = _strassen(_sub(a12, a22), _add(b21, b22), h, cutoff)
+
+    c11 = _add(_sub(_add(m1, m4), m5), m7)
+    c12 = _add(m3, m5)
+    c21 = _add(m2, m4)
+    c22 = _add(_add(_sub(m1, m2), m3), m6)
+
+    return _join(c11, c12, c21, c22, h)
+
+
+def strassen_size(n, cutoff):
+    """Get the padded size used by strassen for a largest dimension n: the smallest c * 2^d >= n with c <= cutoff"""
+    halvings = 0
+    while -(-n // (1 << halvings)) > cutoff:
+        halvings += 1
+
+    return -(-n // (1 << halvings)) << halvings
+
+
+def _pad(a, rows, cols, size):
+    """Get the flat rows x cols matrix a zero padded to size x size"""
+    if rows == cols == size:
+        return list(a)
+
+    out = []
+    fill = [0] * (size - cols)
+    for i in range(rows):
+        out.extend(a[i * cols: (i + 1) * cols])
+        out.extend(fill)
+    out.extend([0] * (size * (size - rows)))
+
+    return out
+
+
+def strassen(a, b, n, k, m, cutoff=STRASSEN_CUTOFF):
+    """Multiply the flat n x k matrix a with the flat k x m matrix b using Strassen's recursive algorithm
+
+    The operands are zero padded to a square size that halves evenly down to at most cutoff, where the recursion
+    switches to matmul. Each level replaces 8 half size products with 7, so the operation count grows as
+    O(n^2.81) at the cost of some extra additions and temporaries.
+
+    :return: list with the n*m entries of the product
+    """
+    size = strassen_size(max(n, k, m), cutoff)
+    c = _strassen(_pad(a, n, k, size), _pad(b, k, m, size), size, cutoff)
+    if size == n == m:
+        return c
+
+    out = []
+    for i in range(n):
+        out.extend(c[i * size: i * size + m])
+
+    return out
+
+
+def matvec(a, rows, cols, x):
+    """Get the product of the flat rows x cols matrix a with the sequence x as a list"""
+    return [sum(map(mul, a[i * cols: (i + 1) * cols], x)) for i in range(rows)]
+
+
+def vecmat(a, rows, cols, x):
+    """Get the product of the sequence x, as a row vector, with the flat rows x cols matrix a as a list"""
+    out = [0] * cols
+    for i, xi in enumerate(x):
+        if xi:
+            out = axpy(xi, a[i * cols: (i + 1) * cols], out)
+
+    return out
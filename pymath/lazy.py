@@ -0,0 +1,259 @@
+"""Lazy matrix expressions evaluated with fused elementwise passes and optimized product chains
+
+Wrapping a matrix with lazy() (or Matrix.lazy()) makes the matrix operators build an expression tree instead of
+computing every intermediate result. The tree is evaluated when evaluate() is called:
+
+    E = A.lazy() @ B + lazy(C) * 2 - D
+    M = E.evaluate()
+
+Only operations with an expression operand are lazy: C * 2 on its own is still computed by Matrix right away.
+
+ - Elementwise operations (+, -, scalar * and /, negation) are fused: the whole elementwise part of the tree is
+   computed entry by entry in a single pass of chained iterators, so it allocates only the result.
+ - Scalar factors and negations of products are folded into the product, A @ (2 * B) @ C becomes 2 * (A @ B @ C),
+   and the scalar is applied to the smallest factor of the product instead of its result.
+ - Chains of products are flattened and multiplied in the order with the fewest scalar multiplications, found
+   with the classic matrix chain dynamic program.
+
+As with Matrix, * between two matrices is the matrix product.
+"""
+from itertools import repeat
+from numbers import Number
+from operator import add, mul, sub, truediv
+
+from pymath import kernels
+from pymath.matrix import Matrix, MatrixShape, _broadcast_shape, _check_equal_inner_dimensions
+from pymath.storage import get_storage, promote
+
+_SYMBOLS = {add: '+', sub: '-', mul: '*', truediv: '/'}
+
+
+def lazy(matrix):
+    """Start a lazy expression from a matrix"""
+    return Leaf(matrix)
+
+
+def _expression(operand):
+    if isinstance(operand, Expression):
+        return operand
+    if isinstance(operand, Matrix):
+        return Leaf(operand)
+    return None
+
+
+class Expression(object):
+    """Node of a lazy matrix expression tree, see the module documentation"""
+
+    shape = None
+
+    def evaluate(self):
+        """Compute the value of the expression
+
+        :return: matrix
+        """
+        raise NotImplementedError
+
+    def _elementwise(self, other, op, reflected=False):
+        if isinstance(other, Number):
+            if op is mul or (op is truediv and not reflected and isinstance(self, Product)):
+                return _scaled(self, other if op is mul else 1 / other)
+            return Elementwise(op, (other, self) if reflected else (self, other))
+
+        other = _expression(other)
+        if other is None:
+            return NotImplemented
+        return Elementwise(op, (other, self) if reflected else (self, other))
+
+    def __add__(self, other):
+        return self._elementwise(other, add)
+
+    def __radd__(self, other):
+        return self._elementwise(other, add, reflected=True)
+
+    def __sub__(self, other):
+        return self._elementwise(other, sub)
+
+    def __rsub__(self, other):
+        return self._elementwise(other, sub, reflected=True)
+
+    def __truediv__(self, other):
+        return self._elementwise(other, truediv)
+
+    def __rtruediv__(self, other):
+        return self._elementwise(other, truediv, reflected=True)
+
+    def __mul__(self, other):
+        if isinstance(other, (Matrix, Expression)):
+            return self @ other
+        return self._elementwise(other, mul)
+
+    def __rmul__(self, other):
+        if isinstance(other, (Matrix, Expression)):
+            return other @ self
+        return self._elementwise(other, mul, reflected=True)
+
+    def __neg__(self):
+        return _scaled(self, -1)
+
+    def __pos__(self):
+        return self
+
+    def __matmul__(self, other):
+        other = _expression(other)
+        if other is None:
+            return NotImplemented
+        return Product.of(self, other)
+
+    def __rmatmul__(self, other):
+        other = _expression(other)
+        if other is None:
+            return NotImplemented
+        return Product.of(other, self)
+
+
+class Leaf(Expression):
+    """A matrix operand of an expression"""
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self.shape = matrix.shape
+
+    def evaluate(self):
+        return self.matrix
+
+    def __repr__(self):
+        return 'Matrix({}x{})'.format(*self.shape)
+
+
+class Elementwise(Expression):
+    """Binary elementwise operation on expressions and scalars, broadcasting like Matrix"""
+
+    def __init__(self, op, operands):
+        self.op = op
+        self.operands = operands
+        shapes = [o.shape for o in operands if isinstance(o, Expression)]
+        self.shape = shapes[0] if len(shapes) == 1 else _broadcast_shape(*shapes)
+
+    def _inputs(self, matrices):
+        """Collect the non elementwise operands of the fused pass, evaluated"""
+        for o in self.operands:
+            if isinstance(o, Elementwise):
+                o._inputs(matrices)
+            elif isinstance(o, Expression):
+                matrices.append(o.evaluate())
+
+    def _entries(self, inputs):
+        """Build the iterator computing the entries of this node from iterators over the inputs"""
+        args = []
+        for o in self.operands:
+            if isinstance(o, Elementwise):
+                args.append(o._entries(inputs))
+            elif isinstance(o, Expression):
+                args.append(next(inputs))
+            else:
+                args.append(repeat(o))
+
+        return map(self.op, *args)
+
+    def _dtype(self, storage):
+        for o in self.operands:
+            if isinstance(o, Elementwise):
+                storage = o._dtype(storage)
+            elif not isinstance(o, Expression):
+                storage = promote(storage, type(o))
+        if self.op is truediv and storage.dtype is int:
+            storage = get_storage(storage.name, float)
+
+        return storage
+
+    def evaluate(self):
+        matrices = []
+        self._inputs(matrices)
+
+        storage = matrices[0]._storage
+        for m in matrices[1:]:
+            storage = promote(storage, m.dtype)
+        storage = self._dtype(storage)
+
+        inputs = iter([kernels.broadcast(m._data, m.shape, self.shape) for m in matrices])
+        data = storage.fromiter(self._entries(inputs))
+
+        return Matrix._wrap(data, *self.shape, storage)
+
+    def __repr__(self):
+        lhs, rhs = self.operands
+        return '({} {} {})'.format(lhs, _SYMBOLS[self.op], rhs)
+
+
+class Product(Expression):
+    """Chain of matrix products times a scalar"""
+
+    def __init__(self, factors, scale=1):
+        self.factors = factors
+        self.scale = scale
+        self.shape = MatrixShape(factors[0].shape.rows, factors[-1].shape.columns)
+
+    @classmethod
+    def of(cls, lhs, rhs):
+        """Get the product lhs @ rhs, flattening chains and pulling out scalar factors"""
+        factors = []
+        scale = 1
+        for e in (lhs, rhs):
+            if isinstance(e, Elementwise) and e.op in (mul, truediv) and isinstance(e.operands[1], Number):
+                op, (e, s) = e.op, e.operands
+                scale *= s if op is mul else 1 / s
+            if isinstance(e, Product):
+                factors.extend(e.factors)
+                scale *= e.scale
+            else:
+                factors.append(e)
+        _check_equal_inner_dimensions(lhs, rhs)
+
+        return cls(factors, scale)
+
+    def evaluate(self):
+        matrices = [f.evaluate() for f in self.factors]
+        if self.scale != 1:
+            smallest = min(range(len(matrices)), key=lambda i: matrices[i].size)
+            matrices[smallest] = matrices[smallest] * self.scale
+
+        dims = [m.shape.rows for m in matrices] + [matrices[-1].shape.columns]
+        return _multiply(matrices, chain_order(dims), 0, len(matrices) - 1)
+
+    def __repr__(self):
+        chain = ' @ '.join(map(repr, self.factors))
+        return '({} * {})'.format(self.scale, chain) if self.scale != 1 else '({})'.format(chain)
+
+
+def _scaled(e, scale):
+    """Get scale * e, folding the scalar into products"""
+    if isinstance(e, Product):
+        return Product(e.factors, e.scale * scale)
+
+    return Elementwise(mul, (e, scale))
+
+
+def chain_order(dims):
+    """Find the cheapest order of the product of a chain of matrices
+
+    :param dims: dims[i] x dims[i + 1] is the shape of the i-th matrix of the chain
+    :return: table split, the product of matrices i..j is best split as (i..k) @ (k+1..j) with k = split[i][j]
+    """
+    n = len(dims) - 1
+    cost = [[0] * n for _ in range(n)]
+    split = [[0] * n for _ in range(n)]
+    for length in range(1, n):
+        for i in range(n - length):
+            j = i + length
+            cost[i][j], split[i][j] = min(
+                (cost[i][k] + cost[k + 1][j] + dims[i] * dims[k + 1] * dims[j + 1], k) for k in range(i, j))
+
+    return split
+
+
+def _multiply(matrices, split, i, j):
+    if i == j:
+        return matrices[i]
+    k = split[i][j]
+
+    return Matrix._matmul(_multiply(matrices, split, i, k), _multiply(matrices, split, k + 1, j))
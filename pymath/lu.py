@@ -1,5 +1,16 @@
 
-from matrix import Matrix, argmax
+import collections
+from numbers import Rational
+from operator import mul
+
+from pymath import kernels
+from pymath.instrument import instrumented
+from pymath.matrix import Matrix, argmax
+from pymath.storage import get_storage
+from pymath.vector import Vector, typecode_of
+
+
+LUFactor = collections.namedtuple('LUFactor', ['lu', 'piv'])
 
 
 def pivot_matrix(M):
@@ -13,61 +24,249 @@ def pivot_matrix(M):
     return im
 
 
-def lu(M, tol=1e-15):
-    n = M.shape.rows
-    L = Matrix(n, n)
-    U = Matrix(n, n)
-    P = pivot_matrix(M)
-    PA = P @ M
-    for j in range(n):
-        L[j, j] = 1
-        for i in range(j + 1):
-            s1 = sum(U[k, j] * L[i, k] for k in range(i))
-            U[i, j] = PA[i, j] - s1
+@instrumented('lu.lu_factor')
+def lu_factor(M, overwrite=False, tol=1e-15):
+    """LU factorize a square matrix with partial pivoting, PA = LU
 
-        for i in range(j, n):
-            s2 = sum(U[k, j] * L[i, k] for k in range(j))
-            if abs(U[j, j]) < tol:
-                raise ValueError('matrix is singular')
-            L[i, j] = (PA[i, j] - s2) / U[j, j]
+    The elimination runs in a single packed buffer: the strictly lower part holds L (whose unit diagonal is not
+    stored) and the upper part holds U. The pivot row is chosen from the remaining rows as each column is
+    eliminated, and the permutation is kept as an index vector: row i of PA is row piv[i] of A.
 
-    return P, L, U
+    :param M: square matrix to factorize
+    :param overwrite: allow the factorization to reuse the storage of M, destroying its contents.
+                      Integer matrices and views are always copied.
+    :param tol: pivots with smaller magnitude than this are treated as zero. Ignored for exact rational dtypes
+                (such as Fraction), for which only a zero pivot is singular; see pymath.exact for fraction-free
+                elimination.
+    :return: LUFactor(lu, piv) with the packed factors and the pivot indices
+    """
+    n, cols = M.shape
+    if n != cols:
+        raise ValueError('matrix is not square')
 
+    dtype = float if M.dtype is int else M.dtype
+    if issubclass(dtype, Rational):
+        tol = 0
+    if overwrite and dtype is M.dtype and not M.is_view:
+        LU = M
+    else:
+        storage = get_storage(M.backend, dtype)
+        LU = Matrix._wrap(storage.fromiter(M._data), n, n, storage)
+
+    if LU.backend == 'list':
+        piv = kernels.lu_factor_inplace(LU._data, n, tol)
+    else:
+        data = LU._storage.tolist(LU._data)
+        piv = kernels.lu_factor_inplace(data, n, tol)
+        LU._storage.assign(LU._data, slice(None), data)
+
+    return LUFactor(LU, piv)
 
-def _forward_substitute(P, L, B):
-    n = L.shape.rows
-    h = B.shape.columns
-    PB = P @ B
-    Y = Matrix(n, h)
-    for j in range(h):
-        Y[0, j] = PB[0, j] / L[0, 0]
-        for i in range(1, n):
-            s = sum(L[i, k] * Y[k, j] for k in range(i - 1))
-            Y[i, j] = (PB[i, j] - s) / L[i, i]
 
-    return Y
+@instrumented('lu.lu_solve')
+def lu_solve(factor, B):
+    """Solve AX = B given the LU factorization of A from lu_factor
 
+    :param factor: LUFactor of A
+    :param B: right hand side matrix, one column per system
+    :return: solution X
+    """
+    LU, piv = factor
+    return _solve_columns(LU, piv, kernels.lu_split(LU._data, LU.shape.rows), B)
 
-def _backward_substitute(U, Y):
-    n = U.shape.rows
-    h = Y.shape.columns
-    m = n - 1
-    X = Matrix(n, h)
+
+def _solve_columns(LU, piv, split, B):
+    n = LU.shape.rows
+    if B.shape.rows != n:
+        raise ValueError('right hand side has {} rows, expected {}'.format(B.shape.rows, n))
+
+    lower, upper, diag = split
+    h = B.shape.columns
+    b = B._data
+    X = Matrix(n, h, dtype=LU.dtype, backend=LU.backend)
     for j in range(h):
-        X[m, j] = Y[m, j] / U[m, m]
-        for i in range(m, 0, -1):
-            s = sum(U[i - 1, k] * X[k, j] for k in range(i, n))
-            X[i - 1, j] = (Y[i - 1, j] - s) / U[i - 1, i - 1]
+        x = kernels.lu_substitute(lower, upper, diag, [b[p * h + j] for p in piv])
+        X[j: n * h: h] = x
 
     return X
 
 
-def solve(A, B):
-    P, L, U = lu(A)
-    Y = _forward_substitute(P, L, B)
-    X = _backward_substitute(U, Y)
+class LUFactorization(object):
+    """Reusable LU factorization of a square matrix
 
-    return X
+    The matrix is factorized once on creation, every solve after that only does the O(n^2) substitutions:
+        f = LUFactorization(A)
+        X = f.solve(B)
+        for x in f.solve_iter(rhs_vectors):
+            ...
+    """
+
+    def __init__(self, A, tol=1e-15):
+        n = A.shape.rows
+        self._norm = max(sum(abs(v) for v in A[c: len(A): n]) for c in range(n)) if n else 0
+        self.factor = lu_factor(A, tol=tol)
+        self._lower, self._upper, self._diag = kernels.lu_split(self.factor.lu._data, n)
+        self._transposed = None
+        self._plu = None
+
+    @property
+    def shape(self):
+        return self.factor.lu.shape
+
+    @property
+    def piv(self):
+        """Pivot indices, row i of PA is row piv[i] of A"""
+        return self.factor.piv
+
+    def _factors(self):
+        if self._plu is None:
+            LU, piv = self.factor
+            n = LU.shape.rows
+            P = Matrix(n, n, dtype=LU.dtype, backend=LU.backend)
+            L = Matrix.identity(n, dtype=LU.dtype, backend=LU.backend)
+            U = Matrix(n, n, dtype=LU.dtype, backend=LU.backend)
+            for i, p in enumerate(piv):
+                P[i, p] = 1
+                L[i * n: i * n + i] = self._lower[i]
+                U[i * n + i: (i + 1) * n] = [self._diag[i]] + self._upper[i]
+            self._plu = P, L, U
+
+        return self._plu
+
+    @property
+    def P(self):
+        """Permutation matrix"""
+        return self._factors()[0]
+
+    @property
+    def L(self):
+        """Unit lower triangular factor"""
+        return self._factors()[1]
+
+    @property
+    def U(self):
+        """Upper triangular factor"""
+        return self._factors()[2]
+
+    @instrumented('lu.solve_vector')
+    def solve_vector(self, b):
+        """Solve Ax = b for a single right hand side
+
+        :param b: sequence of n entries
+        :return: solution as a list
+        """
+        n = self.shape.rows
+        if len(b) != n:
+            raise ValueError('right hand side has {} entries, expected {}'.format(len(b), n))
+
+        return kernels.lu_substitute(self._lower, self._upper, self._diag, [b[p] for p in self.piv])
+
+    def solve(self, B):
+        """Solve AX = B for a whole block of right hand side columns
+
+        :param B: right hand side matrix, one column per system
+        :return: solution X
+        """
+        return _solve_columns(self.factor.lu, self.piv, (self._lower, self._upper, self._diag), B)
+
+    def solve_iter(self, rhs_iterable):
+        """Lazily solve Ax = b for every right hand side vector b of an iterable
+
+        :param rhs_iterable: iterable of sequences with n entries each
+        :return: generator of solution vectors
+        """
+        typecode = typecode_of(self.factor.lu.dtype)
+        for b in rhs_iterable:
+            yield Vector(self.solve_vector(b), typecode)
+
+    @instrumented('lu.solve_transposed')
+    def solve_transposed(self, b):
+        """Solve A^T x = b for a single right hand side
+
+        A^T = U^T L^T P, so b is substituted through U^T and L^T before the pivots are undone.
+
+        :param b: sequence of n entries
+        :return: solution as a list
+        """
+        n = self.shape.rows
+        if self._transposed is None:
+            lu_data = self.factor.lu._data
+            upper_columns = [list(lu_data[i: i * n + i: n]) for i in range(n)]
+            lower_columns = [list(lu_data[(i + 1) * n + i: n * n: n]) for i in range(n)]
+            self._transposed = upper_columns, lower_columns
+
+        upper_columns, lower_columns = self._transposed
+        y = list(b)
+        for i in range(n):
+            y[i] = (y[i] - sum(map(mul, upper_columns[i], y[:i]))) / self._diag[i]
+        for i in range(n - 2, -1, -1):
+            y[i] -= sum(map(mul, lower_columns[i], y[i + 1:]))
+
+        x = [0] * n
+        for i, p in enumerate(self.piv):
+            x[p] = y[i]
+
+        return x
+
+    def det(self):
+        """Determinant of the factorized matrix, the product of the pivots with the sign of the permutation"""
+        d = kernels.permutation_sign(self.piv)
+        for u in self._diag:
+            d *= u
+
+        return d
+
+    def inverse(self):
+        """Inverse of the factorized matrix"""
+        n = self.shape.rows
+        return self.solve(Matrix.identity(n, dtype=self.factor.lu.dtype, backend=self.factor.lu.backend))
+
+    def cond(self, maxiter=5):
+        """Estimate the 1-norm condition number ||A|| * ||A^-1|| from the stored factors
+
+        ||A^-1|| is estimated with Hager's method (as refined by Higham), using a few solves with A and A^T instead
+        of forming the inverse.
+
+        :param maxiter: maximum number of estimation steps
+        :return: condition number estimate, a lower bound of the true value. 0 for a 0x0 matrix
+        """
+        n = self.shape.rows
+        if not n:
+            return 0
+        x = [1 / n] * n
+        estimate = 0
+        for _ in range(maxiter):
+            y = self.solve_vector(x)
+            estimate = sum(abs(v) for v in y)
+            z = self.solve_transposed([1 if v >= 0 else -1 for v in y])
+            j = argmax(z)
+            if abs(z[j]) <= sum(map(mul, z, x)):
+                break
+            x = [0] * n
+            x[j] = 1
+
+        alt = [(-1) ** i * (1 + i / (n - 1)) for i in range(n)] if n > 1 else [1]
+        estimate = max(estimate, 2 * sum(abs(v) for v in self.solve_vector(alt)) / (3 * n))
+
+        return self._norm * estimate
+
+
+@instrumented('lu.lu')
+def lu(M, tol=1e-15):
+    """LU factorize a square matrix with partial pivoting
+
+    :param M: square matrix to factorize
+    :param tol: pivots with smaller magnitude than this are treated as zero
+    :return: P, L, U with PM = LU
+    """
+    f = LUFactorization(M, tol=tol)
+
+    return f.P, f.L, f.U
+
+
+@instrumented('lu.solve')
+def solve(A, B):
+    return lu_solve(lu_factor(A), B)
 
 
 def main():
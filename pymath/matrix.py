@@ -1,4 +1,16 @@
 import collections
+import csv
+import os
+import random
+from array import array
+from itertools import chain, repeat
+from numbers import Number
+from operator import add, eq, ge, gt, le, lt, mul, neg, sub, truediv
+
+from pymath import fileformat, kernels
+from pymath.instrument import instrumented
+from pymath.storage import get_storage, numpy, promote, typecode
+from pymath.vector import Vector, typecode_of
 
 
 def argmax(lst, begin=0):
@@ -9,9 +21,22 @@ def argmax(lst, begin=0):
 MatrixShape = collections.namedtuple('MatrixShape', ['rows', 'columns'])
 
 
-def _check_operand_types(lhs, rhs, operand):
-    if not (isinstance(rhs, Matrix) and isinstance(lhs, Matrix)):
-        raise TypeError("unsupported operand type for '{}}': {}/{}".format(type(lhs), type(rhs), operand))
+def _broadcast_shape(lhs, rhs):
+    """Get the shape resulting from broadcasting matrices of shapes lhs and rhs against each other"""
+    shape = []
+    for a, b in zip(lhs, rhs):
+        if a != b and a != 1 and b != 1:
+            raise ValueError('matrix shapes {} and {} can not be broadcast together'.format(tuple(lhs), tuple(rhs)))
+        shape.append(max(a, b))
+
+    return MatrixShape(*shape)
+
+
+def _coerce(storage, values, trusted):
+    """Get storage data holding the values, trusted values are not coerced one by one by the 'list' backend"""
+    if trusted and storage.name == 'list':
+        return list(values)
+    return storage.fromiter(values)
 
 
 def _check_equal_shape(lhs, rhs):
@@ -38,47 +63,268 @@ class Matrix(object):
 
        - With initial data in the form of a list (or any iterable) and number of rows and columns specified
            m = Matrix([1,2,3,4], 2, 2)
+
+      The entries are stored in a flat row-major sequence selected by the backend argument, see pymath.storage:
+           m = Matrix(1000, 1000, backend='array')
+      A matrix created as a copy of another matrix keeps the dtype and backend of the original unless a dtype or
+      backend is given, the entries are converted through a given dtype:
+           m = Matrix(other, dtype=int)
+
+      With trusted=True the initial data is assumed to be well formed and of the right dtype: the row lengths are
+      not checked and the 'list' backend does not coerce every entry through dtype.
+
+      The classmethods zeros, full, identity, diag, random, from_flat, from_buffer, from_rows_iter, from_csv and
+      from_stream create matrices directly in their storage, without going through nested lists.
     """
 
-    def __init__(self, *args, dtype=float):
+    def __init__(self, *args, dtype=None, backend=None, trusted=False):
         nargs = len(args)
-        self.dtype = dtype
         if nargs == 1 and isinstance(args[0], Matrix):
-            self._init_from_other_matrix(args[0])
-        elif nargs == 1 and hasattr(args[0], '__iter__'):
-            self._init_from_list_of_lists(args[0], dtype)
+            self._init_from_other_matrix(args[0], dtype, backend)
+            return
+
+        dtype = float if dtype is None else dtype
+        self.dtype = dtype
+        self._storage = get_storage(backend, dtype)
+        if nargs == 1 and hasattr(args[0], '__iter__'):
+            self._init_from_list_of_lists(args[0], dtype, trusted)
         elif nargs == 3 and hasattr(args[0], '__iter__'):
-            self._init_from_single_list(args[0], args[1], args[2], dtype)
+            self._init_from_single_list(args[0], args[1], args[2], dtype, trusted)
         else:
             rows, cols = args
             self._shape = MatrixShape(rows, cols)
-            self._data = [dtype(0) for _ in range(rows * cols)]
+            self._data = self._storage.zeros(rows * cols)
+
+    @classmethod
+    def _wrap(cls, data, rows, cols, storage):
+        """Create a matrix around already coerced storage data without copying it"""
+        m = cls.__new__(cls)
+        m.dtype = storage.dtype
+        m._storage = storage
+        m._shape = MatrixShape(rows, cols)
+        m._data = data
+
+        return m
+
+    @classmethod
+    def identity(cls, n, dtype=float, backend=None):
+        return cls.diag(repeat(1, n), dtype=dtype, backend=backend)
+
+    @classmethod
+    def zeros(cls, rows, cols, dtype=float, backend=None):
+        storage = get_storage(backend, dtype)
+        return cls._wrap(storage.zeros(rows * cols), rows, cols, storage)
+
+    @classmethod
+    def full(cls, rows, cols, value, dtype=float, backend=None):
+        """Create a rows x cols matrix with every entry equal to value"""
+        storage = get_storage(backend, dtype)
+        return cls._wrap(storage.full(rows * cols, value), rows, cols, storage)
+
+    @classmethod
+    def diag(cls, values, dtype=float, backend=None):
+        """Create a square diagonal matrix with the given diagonal entries"""
+        values = list(values)
+        n = len(values)
+        m = cls.zeros(n, n, dtype=dtype, backend=backend)
+        m._storage.assign(m._data, slice(0, n * n, n + 1), values)
+
+        return m
+
+    @classmethod
+    def random(cls, rows, cols, low=0, high=1, dtype=float, backend=None, seed=None):
+        """Create a matrix of uniformly distributed random entries
+
+        Float entries are drawn from [low, high), int entries from range(low, high).
+
+        :param seed: seed of the random generator, for reproducible matrices
+        """
+        rnd = random.Random(seed)
+        n = rows * cols
+        if issubclass(dtype, int):
+            values = (rnd.randrange(low, high) for _ in range(n))
+        else:
+            width = high - low
+            values = (low + width * rnd.random() for _ in range(n))
+        storage = get_storage(backend, dtype)
+
+        return cls._wrap(_coerce(storage, values, trusted=True), rows, cols, storage)
+
+    @classmethod
+    def from_flat(cls, data, rows, cols, dtype=float, backend=None, copy=True):
+        """Create a matrix from its entries in a flat row-major sequence
+
+        :param copy: with copy=False a list (for the 'list' backend), an array.array or memoryview of the dtype
+                     (for 'array') or a numpy array (for 'numpy') is used as the storage of the matrix as it is,
+                     without copying or coercing its entries
+        """
+        if len(data) != rows * cols:
+            raise ValueError('invalid initialization data length: expected {}*{} entries got {}'.format(
+                rows, cols, len(data)))
+        storage = get_storage(backend, dtype)
+
+        return cls._wrap(storage.fromiter(data) if copy else storage.wrap(data), rows, cols, storage)
+
+    @classmethod
+    def from_buffer(cls, buffer, rows, cols, dtype=float, backend='array', copy=False):
+        """Create a matrix over the raw native entries of any object supporting the buffer protocol
+
+        bytes, bytearray, array.array, mmap and numpy arrays all work. Without copy the matrix shares the memory
+        of the buffer (read only if the buffer is).
+
+        :param buffer: rows*cols native float64 (dtype float) or int64 (dtype int) entries
+        """
+        storage = get_storage(backend, dtype)
+        view = memoryview(buffer).cast('B').cast(typecode(dtype))
+        if len(view) != rows * cols:
+            raise ValueError('buffer holds {} entries, expected {}*{}'.format(len(view), rows, cols))
+
+        return cls._wrap(storage.fromiter(view) if copy else storage.wrap(view), rows, cols, storage)
+
+    @classmethod
+    def from_rows_iter(cls, rows, cols=None, dtype=float, backend=None, trusted=False):
+        """Create a matrix from an iterable of rows, consumed one row at a time
+
+        The rows are appended straight to the storage, so a stream of rows (from a file, a generator, ...) is
+        never held as a list of lists.
+
+        :param rows: iterable of sequences of entries
+        :param cols: number of columns, by default the length of the first row
+        :param trusted: skip checking the length of every row
+        """
+        storage = get_storage(backend, dtype)
+        data = array(typecode(dtype)) if storage.name != 'list' else []
+        coerce = storage.name == 'list' and not trusted
+        count = 0
+        for row in rows:
+            if cols is None:
+                cols = len(row)
+            elif not trusted and len(row) != cols:
+                raise ValueError('row {} has {} entries, expected {}'.format(count, len(row), cols))
+            data.extend(map(dtype, row) if coerce else row)
+            count += 1
+        if not count or not cols:
+            raise ValueError('Initialization data has invalid shape: {} rows {} columns'.format(count, cols))
+
+        return cls._wrap(storage.wrap(data), count, cols, storage)
+
+    @classmethod
+    def from_csv(cls, file, dtype=float, backend=None, delimiter=',', skip_header=False, trusted=False):
+        """Read a matrix from comma separated text, one row per line
+
+        :param file: file name or text file object
+        :param skip_header: ignore the first line
+        :param trusted: skip checking the length of every row
+        """
+        if isinstance(file, (str, bytes, os.PathLike)):
+            with open(file, newline='') as f:
+                return cls.from_csv(f, dtype, backend, delimiter, skip_header, trusted)
+
+        reader = csv.reader(file, delimiter=delimiter)
+        if skip_header:
+            next(reader, None)
+        rows = (list(map(dtype, row)) for row in reader if row)
+
+        return cls.from_rows_iter(rows, dtype=dtype, backend=backend, trusted=trusted)
 
     @classmethod
-    def identity(cls, n, dtype=float):
-        i = Matrix([dtype(0)] * (n * n), n, n)
-        i[0: n*n: n+1] = [dtype(1)] * n
+    def from_stream(cls, stream, rows, cols, dtype=float, backend=None):
+        """Read rows*cols raw native float64 (dtype float) or int64 (dtype int) entries from a binary stream
 
-        return i
+        The entries are read straight into a typed buffer. See load for the self describing file format.
+        """
+        storage = get_storage(backend, dtype)
+        data = array(typecode(dtype), bytes(rows * cols * array(typecode(dtype)).itemsize))
+        view = memoryview(data).cast('B')
+        filled = 0
+        while filled < len(view):
+            count = stream.readinto(view[filled:])
+            if not count:
+                raise ValueError('stream ended after {} of {} bytes'.format(filled, len(view)))
+            filled += count
+        view.release()
+
+        return cls._wrap(storage.wrap(data), rows, cols, storage)
 
     @property
     def shape(self):
         return self._shape
 
     @property
-    def size(self):
-        return len(self._data)
+    def backend(self):
+        """Name of the storage backend holding the entries ('list', 'array' or 'numpy')"""
+        return self._storage.name
+
+    def memoryview(self):
+        """Get a 2-dimensional memoryview sharing the entries of this matrix
+
+        Only available for the typed 'array' and 'numpy' backends. Writes through the view change the matrix.
+
+        :return: memoryview with shape (rows, columns)
+        """
+        return self._storage.buffer(self._data, *self._shape)
+
+    def __buffer__(self, flags):
+        return self.memoryview()
+
+    def save(self, path):
+        """Write this matrix to a binary file, see pymath.fileformat
+
+        A path ending in .npy is written in the numpy .npy format, any other path in the native format.
+
+        :param path: file name
+        """
+        write = fileformat.save_npy if str(path).endswith('.npy') else fileformat.save
+        write(path, self._data, self._shape, self.dtype)
+
+    @classmethod
+    def load(cls, path, mmap=True, mode='r', backend='array'):
+        """Read a matrix written by save, or a 2-dimensional float64 or int64 .npy file
+
+        With mmap the matrix is backed directly by the memory mapped file, so even huge matrices open instantly and
+        their entries are only read from disk when used. The 'list' backend always reads the whole file.
+
+        :param path: file name
+        :param mmap: memory map the file instead of reading it
+        :param mode: mapping mode, 'r' read only, 'r+' writes to the matrix go to the file, 'c' copy on write
+        :param backend: storage backend of the matrix, 'array', 'numpy' or 'list'
+        :return: matrix
+        """
+        data, (rows, cols), dtype = fileformat.load(path, mmap=mmap and backend != 'list', mode=mode)
+        storage = get_storage(backend, dtype)
+        if storage.name == 'numpy':
+            data = numpy.frombuffer(data, dtype=storage.typecode)
+        elif storage.name == 'list':
+            data = storage.fromiter(data)
+
+        return Matrix._wrap(data, rows, cols, storage)
 
-    def _init_from_other_matrix(self, other):
-        self._data = other[0:]
+    @property
+    def size(self):
+        return self._shape.rows * self._shape.columns
+
+    is_view = False
+
+    def _init_from_other_matrix(self, other, dtype, backend):
+        backend = other.backend if backend is None else backend
+        self.dtype = other.dtype if dtype is None else dtype
+        if backend == other.backend and self.dtype is other.dtype:
+            self._storage = other._storage
+            self._data = other._storage.copy(other._data)
+        elif self.dtype is other.dtype:
+            self._storage = get_storage(backend, self.dtype)
+            self._data = self._storage.fromiter(other._data)
+        else:
+            self._storage = get_storage(backend, self.dtype)
+            self._data = self._storage.fromiter(map(self.dtype, other._data))
         self._shape = other.shape
 
-    def _init_from_list_of_lists(self, data, dtype):
+    def _init_from_list_of_lists(self, data, dtype, trusted):
         rows = len(data)
         if rows == 0:
             raise ValueError('Initialization data has invalid shape: {} rows'.format(rows))
 
-        cols = {len(r) if hasattr(r, '__len__') else 1 for r in data}
+        cols = {len(data[0])} if trusted else {len(r) if hasattr(r, '__len__') else 1 for r in data}
         if len(cols) > 1:
             raise ValueError('Initialization data has inconsistent shapes: {} rows {} columns'.format(rows, cols))
 
@@ -86,19 +332,21 @@ class Matrix(object):
         if cols == 0:
             raise ValueError('Initialization data has invalid shape: {} rows {} columns'.format(rows, cols))
 
-        self._data = [dtype(data[r][c]) for r in range(rows) for c in range(cols)]
+        self._data = _coerce(self._storage, chain.from_iterable(data), trusted)
         self._shape = MatrixShape(rows, cols)
 
-    def _init_from_single_list(self, data, rows, cols, dtype):
+    def _init_from_single_list(self, data, rows, cols, dtype, trusted):
         self._shape = MatrixShape(rows, cols)
         if len(data) != rows * cols:
-            raise ValueError('invalid initialization data length: expected {}*{} entries got {}'.format(rows, cols, rows * cols))
+            raise ValueError('invalid initialization data length: expected {}*{} entries got {}'.format(rows, cols, len(data)))
 
-        self._data = [dtype(data[r * cols + c]) for r in range(rows) for c in range(cols)]
+        self._data = _coerce(self._storage, data, trusted)
 
     def __getitem__(self, item):
         if isinstance(item, slice):
-            return self._data[item]
+            return self._storage.tolist(self._data[item])
+        elif isinstance(item, tuple) and len(item) == 2 and _has_slice(item):
+            return self._view(*item)
         elif isinstance(item, tuple) and len(item) == 2:
             r, c = item
             if r >= self.shape.rows:
@@ -111,16 +359,18 @@ class Matrix(object):
             if item >= self.shape.rows:
                 raise IndexError('row index out of range')
 
-            return self._data[item * self.shape.columns: (item + 1) * self.shape.columns]
+            return self._storage.tolist(self._data[item * self.shape.columns: (item + 1) * self.shape.columns])
 
     def __setitem__(self, item, val):
-        if isinstance(item, int) and len(val) == self.shape.columns:
+        if isinstance(item, tuple) and len(item) == 2 and _has_slice(item):
+            self._view(*item).fill(val)
+        elif isinstance(item, int) and len(val) == self.shape.columns:
             if item >= self.shape.rows:
                 raise IndexError('row index out of range')
 
             start = item * self.shape.columns
             end = start + self.shape.columns
-            self._data[start:end] = map(self.dtype, val)
+            self._storage.assign(self._data, slice(start, end), val)
             return
         elif isinstance(item, tuple) and len(item) == 2:
             r, c = item
@@ -129,9 +379,11 @@ class Matrix(object):
             if c >= self.shape.columns:
                 raise IndexError('column index out of range')
 
-            self._data[r * self._shape.columns + c] = self.dtype(val)
+            if self._storage.name == 'list':
+                val = self.dtype(val)
+            self._data[r * self._shape.columns + c] = val
         elif isinstance(item, slice):
-            self._data[item] = val
+            self._storage.assign(self._data, item, val)
 
     def __str__(self):
         rows, cols = self.shape
@@ -169,77 +421,334 @@ class Matrix(object):
 
     def __len__(self):
         """Get number of elements in matrix (rows*columns)"""
-        return len(self._data)
+        return self.size
+
+    def _view(self, rows, cols):
+        """Get the view selecting rows and cols, each an index or a slice"""
+        r0, nrows, rstep = _view_range(rows, self._shape.rows, 'row')
+        c0, ncols, cstep = _view_range(cols, self._shape.columns, 'column')
+        row_stride, col_stride = self._strides()
+
+        return MatrixView(self._base(), self._offset() + r0 * row_stride + c0 * col_stride, (nrows, ncols),
+                          (row_stride * rstep, col_stride * cstep))
+
+    def _base(self):
+        return self
+
+    @staticmethod
+    def _offset():
+        return 0
+
+    def _strides(self):
+        return self._shape.columns, 1
 
     @property
     def T(self):
-        """Get the transpose of this matrix
+        """Get the transpose of this matrix as a view sharing its entries, see MatrixView
 
         :return: matrix transpose
         """
-        cols = self.shape.columns
-        end = len(self._data)
-        mt = [self[c: end: cols] for c in range(cols)]
+        rows, cols = self.shape
+        row_stride, col_stride = self._strides()
 
-        return Matrix(mt)
+        return MatrixView(self._base(), self._offset(), (cols, rows), (col_stride, row_stride))
+
+    def copy(self):
+        """Get a copy of this matrix with its own contiguous storage"""
+        return Matrix(self)
+
+    def lazy(self):
+        """Start a lazy expression from this matrix, see pymath.lazy
+
+            M = (A.lazy() @ B - D).evaluate()
+        """
+        from pymath.lazy import lazy
+        return lazy(self)
+
+    def fill(self, val):
+        """Assign to every entry, from a matrix of the same shape or a single value"""
+        rows, cols = self._shape
+        if isinstance(val, Matrix):
+            _check_equal_shape(self, val)
+            values = val._data
+        else:
+            values = [val] * (rows * cols)
+        for r in range(rows):
+            self[r] = values[r * cols: (r + 1) * cols]
 
     def __eq__(self, other):
         if not isinstance(other, Matrix):
             raise TypeError('Matrix not comparable with {}'.format(type(other)))
-        return self.shape == other.shape and self._data == other._data
+        if self.shape != other.shape:
+            return False
+        if self.backend == 'list' and other.backend == 'list':
+            return self._data == other._data
+
+        return all(map(eq, self._data, other._data))
+
+    @instrumented('matrix.elementwise')
+    def _elementwise(self, other, op, dtype=None, out=None, reflected=False):
+        """Apply the binary op entry by entry, broadcasting a scalar, a row or a column operand
+
+        :param other: scalar or matrix, a 1 by n or n by 1 matrix is repeated along the missing dimension
+        :param op: binary function
+        :param dtype: dtype of the result, by default the promotion of the operand dtypes
+        :param out: matrix receiving the result instead of a new matrix
+        :param reflected: compute op(other, self) instead of op(self, other)
+        :return: result matrix, or NotImplemented for unsupported operand types
+        """
+        if isinstance(other, Matrix):
+            rows, cols = _broadcast_shape(self._shape, other._shape)
+            lhs = kernels.broadcast(self._data, self._shape, (rows, cols))
+            rhs = kernels.broadcast(other._data, other._shape, (rows, cols))
+            other_dtype = other.dtype
+        elif isinstance(other, Number):
+            rows, cols = self._shape
+            lhs, rhs = self._data, repeat(other)
+            other_dtype = type(other)
+        else:
+            return NotImplemented
+
+        if reflected:
+            lhs, rhs = rhs, lhs
+        if dtype is None:
+            storage = promote(self._storage, other_dtype)
+        elif dtype is bool and self.backend != 'list':
+            # Typed buffers have no boolean typecode, comparison results are stored as 0 and 1
+            storage = get_storage(self.backend, int)
+        else:
+            storage = get_storage(self.backend, dtype)
+
+        return self._result(map(op, lhs, rhs), rows, cols, storage, out)
+
+    def _result(self, values, rows, cols, storage, out):
+        """Wrap the values in a new matrix, or store them in out"""
+        if out is None:
+            return self._wrap(storage.fromiter(values), rows, cols, storage)
+
+        if out.shape != (rows, cols):
+            raise ValueError('output matrix has shape {}, expected {}'.format(tuple(out.shape), (rows, cols)))
+        if promote(out._storage, storage.dtype) is not out._storage:
+            raise TypeError('result of dtype {} can not be stored in a matrix of dtype {}'.format(
+                storage.dtype.__name__, out.dtype.__name__))
+
+        if out.is_view:
+            out.fill(Matrix._wrap(out._storage.fromiter(values), rows, cols, out._storage))
+        else:
+            out._storage.assign(out._data, slice(None), values)
+
+        return out
+
+    def _inplace(self, other, op, dtype=None):
+        if isinstance(other, Matrix) and _broadcast_shape(self._shape, other._shape) != self._shape:
+            raise ValueError('matrix shape {} can not be broadcast to {}'.format(tuple(other.shape), tuple(self.shape)))
+
+        return self._elementwise(other, op, dtype, out=self)
+
+    def add(self, other, out=None):
+        """Entrywise sum with a scalar or a (broadcast) matrix, optionally stored in the matrix out"""
+        return self._elementwise(other, add, out=out)
+
+    def subtract(self, other, out=None):
+        """Entrywise difference with a scalar or a (broadcast) matrix, optionally stored in the matrix out"""
+        return self._elementwise(other, sub, out=out)
+
+    def multiply(self, other, out=None):
+        """Entrywise (Hadamard) product with a scalar or a (broadcast) matrix, optionally stored in the matrix out"""
+        return self._elementwise(other, mul, out=out)
+
+    def divide(self, other, out=None):
+        """Entrywise quotient by a scalar or a (broadcast) matrix, optionally stored in the matrix out"""
+        return self._elementwise(other, truediv, self._division_dtype(), out=out)
+
+    def power(self, other, out=None):
+        """Entrywise power by a scalar or a (broadcast) matrix, optionally stored in the matrix out"""
+        return self._elementwise(other, pow, self._power_dtype(other), out=out)
+
+    def apply(self, func, dtype=None, out=None):
+        """Apply a unary function to every entry, e.g. m.apply(math.sqrt)
+
+        :param func: unary function
+        :param dtype: dtype of the result, defaults to float for int matrices and to the matrix dtype otherwise
+        :param out: matrix receiving the result instead of a new matrix
+        :return: result matrix
+        """
+        if dtype is None:
+            dtype = self._division_dtype()
+
+        return self._result(map(func, self._data), *self._shape, get_storage(self.backend, dtype), out)
+
+    def _division_dtype(self):
+        return float if self.dtype is int else self.dtype
+
+    def _power_dtype(self, exponent):
+        if self.dtype is int and not (isinstance(exponent, int) and exponent >= 0):
+            return float
+        return None
 
     def __add__(self, other):
-        _check_operand_types(self, other, '+')
-        _check_equal_shape(self, other)
-        rows, cols = self._shape
+        return self._elementwise(other, add)
 
-        return Matrix([self[r, c] + other[r, c] for r in range(rows) for c in range(cols)], *self._shape)
+    def __radd__(self, other):
+        return self._elementwise(other, add, reflected=True)
+
+    def __iadd__(self, other):
+        return self._inplace(other, add)
 
     def __sub__(self, other):
-        _check_operand_types(self, other, '-')
-        _check_equal_shape(self, other)
-        rows, cols = self._shape
+        return self._elementwise(other, sub)
+
+    def __rsub__(self, other):
+        return self._elementwise(other, sub, reflected=True)
+
+    def __isub__(self, other):
+        return self._inplace(other, sub)
+
+    def __truediv__(self, other):
+        return self._elementwise(other, truediv, self._division_dtype())
+
+    def __rtruediv__(self, other):
+        return self._elementwise(other, truediv, self._division_dtype(), reflected=True)
+
+    def __itruediv__(self, other):
+        return self._inplace(other, truediv, self._division_dtype())
+
+    def __pow__(self, other):
+        return self._elementwise(other, pow, self._power_dtype(other))
+
+    def __rpow__(self, other):
+        return self._elementwise(other, pow, float if self.dtype is int else None, reflected=True)
+
+    def __ipow__(self, other):
+        return self._inplace(other, pow, self._power_dtype(other))
+
+    def __lt__(self, other):
+        return self._elementwise(other, lt, bool)
+
+    def __le__(self, other):
+        return self._elementwise(other, le, bool)
+
+    def __gt__(self, other):
+        return self._elementwise(other, gt, bool)
+
+    def __ge__(self, other):
+        return self._elementwise(other, ge, bool)
+
+    def __neg__(self):
+        return self._result(map(neg, self._data), *self._shape, self._storage, None)
+
+    def __pos__(self):
+        return self.copy()
 
-        return Matrix([self[r, c] - other[r, c] for r in range(rows) for c in range(cols)], *self._shape)
+    def __abs__(self):
+        return self._result(map(abs, self._data), *self._shape, self._storage, None)
 
     @staticmethod
-    def _matmul(lhs, rhs):
+    @instrumented('matrix.matmul')
+    def _matmul(lhs, rhs, algorithm='auto', cutoff=None):
         _check_equal_inner_dimensions(lhs, rhs)
-        rows, cols = lhs.shape.rows, rhs.shape.columns
+        rows, inner = lhs.shape
+        cols = rhs.shape.columns
+        storage = promote(lhs._storage, rhs.dtype)
+
+        if algorithm == 'auto':
+            numeric = lhs.dtype if rhs.dtype in (float, int) else rhs.dtype
+            typed = lhs.backend != 'list' and rhs.backend != 'list'
+            algorithm = kernels.choose_matmul(rows, inner, cols, numeric, typed)
+
+        if algorithm == 'naive':
+            data = kernels.matmul(lhs._data, rhs._data, rows, inner, cols)
+        elif algorithm == 'blocked':
+            data = kernels.matmul_blocked(lhs._data, rhs._data, rows, inner, cols, cutoff or kernels.BLOCK_SIZE)
+        elif algorithm == 'strassen':
+            data = kernels.strassen(lhs._data, rhs._data, rows, inner, cols, cutoff or kernels.STRASSEN_CUTOFF)
+        elif algorithm == 'numpy':
+            if kernels.numpy is None:
+                raise ValueError('the numpy algorithm requires numpy to be installed')
+            data = kernels.matmul_numpy(lhs._data, rhs._data, rows, inner, cols)
+            if storage.name != 'numpy':
+                data = data.tolist()
+        else:
+            raise ValueError('unknown matmul algorithm {!r}, expected one of {}'.format(
+                algorithm, kernels.MATMUL_ALGORITHMS))
 
-        m = Matrix(rows, cols)
-        inner = lhs.shape.columns
-        for r in range(rows):
-            for c in range(cols):
-                m[r, c] = sum([lhs[r, i] * rhs[i, c] for i in range(inner)])
+        if storage.name == 'numpy' and hasattr(data, 'dtype'):
+            return Matrix._wrap(data.astype(storage.typecode, copy=False), rows, cols, storage)
 
-        return m
+        return Matrix._wrap(storage.fromiter(data), rows, cols, storage)
 
     def __mul__(self, other):
         if isinstance(other, Matrix):
             return self._matmul(self, other)
 
-        rows, cols = self._shape
-
-        m = [self[r, c] * other for r in range(rows) for c in range(cols)]
-
-        return Matrix(m, rows, cols)
+        return self._elementwise(other, mul)
 
     def __rmul__(self, other):
         if isinstance(other, Matrix):
             return self._matmul(other, self)
 
-        rows, cols = self._shape
-        m = [self[r, c] * other for r in range(rows) for c in range(cols)]
+        return self._elementwise(other, mul, reflected=True)
 
-        return Matrix(m, rows, cols)
+    def __imul__(self, other):
+        if isinstance(other, Matrix):
+            return NotImplemented
+
+        return self._inplace(other, mul)
+
+    def matmul(self, other, algorithm='auto', cutoff=None):
+        """Matrix product with a selectable algorithm
+
+        :param other: right hand side matrix
+        :param algorithm: 'naive' for the transposed dot product kernel, 'blocked' for the tiled kernel,
+                          'strassen' for Strassen's recursive algorithm, 'numpy' to hand the product to numpy, or
+                          'auto' (the algorithm used by the @ operator) to choose from the shapes
+        :param cutoff: tile size for 'blocked', size below which 'strassen' stops recursing
+        :return: matrix product
+        """
+        if not isinstance(other, Matrix):
+            raise TypeError('can only multiply with another matrix, got {}'.format(type(other)))
+        return self._matmul(self, other, algorithm, cutoff)
 
     def __matmul__(self, other):
+        if isinstance(other, Vector):
+            return self.matvec(other)
+        if not isinstance(other, Matrix):
+            return NotImplemented
         return self._matmul(self, other)
 
     def __rmatmul__(self, other):
+        if isinstance(other, Vector):
+            return self.vecmat(other)
+        if not isinstance(other, Matrix):
+            return NotImplemented
         return self._matmul(other, self)
 
+    @instrumented('matrix.matvec')
+    def matvec(self, x):
+        """Matrix-vector product Ax, without wrapping x in a column matrix
+
+        :param x: vector (or any sequence) with one entry per column
+        :return: Vector with one entry per row
+        """
+        rows, cols = self._shape
+        if len(x) != cols:
+            raise ValueError('vector has {} entries, expected {}'.format(len(x), cols))
+
+        return Vector(kernels.matvec(self._data, rows, cols, x), typecode_of(self.dtype))
+
+    @instrumented('matrix.vecmat')
+    def vecmat(self, x):
+        """Vector-matrix product xA, treating x as a row vector
+
+        :param x: vector (or any sequence) with one entry per row
+        :return: Vector with one entry per column
+        """
+        rows, cols = self._shape
+        if len(x) != rows:
+            raise ValueError('vector has {} entries, expected {}'.format(len(x), rows))
+
+        return Vector(kernels.vecmat(self._data, rows, cols, x), typecode_of(self.dtype))
+
     def row(self, row):
         """Retrieve an entire row
 
@@ -256,6 +765,14 @@ class Matrix(object):
         """
         return self[col: len(self): self.shape.columns]
 
+    def swap_rows(self, r, s):
+        """Exchange rows r and s in place"""
+        rows, cols = self.shape
+        if r >= rows or s >= rows:
+            raise IndexError('row index out of range')
+
+        self[r], self[s] = self[s], self[r]
+
     def exchange_rows(self, r, s):
         """Perform a row exchange of rows r and s.
         Get a new Matrix, leaving the original unchanged.
@@ -268,7 +785,153 @@ class Matrix(object):
         if r >= rows or s >= rows:
             raise IndexError('row index out of range')
 
-        m = Matrix(self)
-        m[r], m[s] = m[s], m[r]
+        m = self.copy()
+        m.swap_rows(r, s)
 
         return m
+
+
+class MatrixView(Matrix):
+    """A strided view sharing the entries of a matrix
+
+      Entry (r, c) of the view is entry offset + r * strides[0] + c * strides[1] of the flat storage of the viewed
+      matrix, so creating a view is O(1) and reads and writes go through to the viewed matrix:
+           m = Matrix([[1, 2, 3], [4, 5, 6]])
+           m.T          # 3 by 2 transpose
+           m[0, :]      # first row as a 1 by 3 matrix
+           m[:, 1:3]    # last two columns
+           m[0:2, 0:2] = Matrix.identity(2)
+
+      Operations producing a new matrix (arithmetic, products, ...) read the view once into contiguous storage.
+      Use copy() to get an independent contiguous matrix explicitly.
+    """
+
+    is_view = True
+
+    def __init__(self, base, offset, shape, strides):
+        self._parent = base
+        self._start = offset
+        self._shape = MatrixShape(*shape)
+        self._stride = tuple(strides)
+        self.dtype = base.dtype
+        self._storage = base._storage
+
+    @staticmethod
+    def _wrap(data, rows, cols, storage):
+        return Matrix._wrap(data, rows, cols, storage)
+
+    def _base(self):
+        return self._parent
+
+    def _offset(self):
+        return self._start
+
+    def _strides(self):
+        return self._stride
+
+    def _row_slice(self, r):
+        row_stride, col_stride = self._stride
+        start = self._start + r * row_stride
+        return slice(start, start + (self._shape.columns - 1) * col_stride + 1, col_stride)
+
+    @property
+    def _data(self):
+        """Entries of the view gathered into new contiguous storage
+
+        Every access gathers the whole view again, so operations read it once and index the result.
+        """
+        return self._gather_rows(0, self._shape.rows)
+
+    def _gather_rows(self, begin, end):
+        data = self._parent._data
+        return self._storage.concat([data[self._row_slice(r)] for r in range(begin, end)])
+
+    def _flat_slice(self, item):
+        """Get the entries at the row-major positions selected by the slice item, reading only those rows
+
+        A step of whole rows is a single strided slice of the viewed matrix (a column for example).
+        """
+        rows, cols = self._shape
+        indices = range(rows * cols)[item]
+        if not indices:
+            return []
+
+        row_stride, col_stride = self._stride
+        if indices.step > 0 and indices.step % cols == 0:
+            r, c = divmod(indices.start, cols)
+            start = self._start + r * row_stride + c * col_stride
+            step = indices.step // cols * row_stride
+            return self._storage.tolist(self._parent._data[start: start + (len(indices) - 1) * step + 1: step])
+
+        first = min(indices[0], indices[-1]) // cols
+        offset = first * cols
+        stop = indices.stop - offset
+        block = self._gather_rows(first, max(indices[0], indices[-1]) // cols + 1)
+
+        return self._storage.tolist(block[indices.start - offset: stop if stop >= 0 else None: indices.step])
+
+    def _index(self, r, c):
+        r = _position(r, self._shape.rows, 'row')
+        c = _position(c, self._shape.columns, 'column')
+
+        return self._start + r * self._stride[0] + c * self._stride[1]
+
+    def memoryview(self):
+        raise TypeError('matrix views do not expose a buffer, use copy() to get a contiguous matrix')
+
+    def copy(self):
+        return Matrix._wrap(self._data, *self._shape, self._storage)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return self._flat_slice(item)
+        elif isinstance(item, tuple) and len(item) == 2 and _has_slice(item):
+            return self._view(*item)
+        elif isinstance(item, tuple) and len(item) == 2:
+            return self._parent._data[self._index(*item)]
+        elif isinstance(item, int):
+            row = _position(item, self._shape.rows, 'row')
+            return self._storage.tolist(self._parent._data[self._row_slice(row)])
+
+    def __setitem__(self, item, val):
+        if isinstance(item, tuple) and len(item) == 2 and _has_slice(item):
+            self._view(*item).fill(val)
+        elif isinstance(item, int) and len(val) == self._shape.columns:
+            row = _position(item, self._shape.rows, 'row')
+            self._storage.assign(self._parent._data, self._row_slice(row), val)
+        elif isinstance(item, tuple) and len(item) == 2:
+            if self._storage.name == 'list':
+                val = self.dtype(val)
+            self._parent._data[self._index(*item)] = val
+        elif isinstance(item, slice):
+            cols = self._shape.columns
+            for i, v in zip(range(self.size)[item], val):
+                self[divmod(i, cols)] = v
+
+
+def _position(i, n, name):
+    """Get the index i along a dimension of length n, counting from the end when negative"""
+    if i < 0:
+        i += n
+    if not 0 <= i < n:
+        raise IndexError('{} index out of range'.format(name))
+
+    return i
+
+
+def _has_slice(item):
+    return isinstance(item[0], slice) or isinstance(item[1], slice)
+
+
+def _view_range(item, n, name):
+    """Get start, length and step selected by an index or slice along a dimension of length n"""
+    if isinstance(item, slice):
+        start, stop, step = item.indices(n)
+        if step < 1:
+            raise ValueError('matrix views only support positive slice steps')
+        return start, len(range(start, stop, step)), step
+
+    if not 0 <= item < n:
+        raise IndexError('{} index out of range'.format(name))
+
+    return item, 1, 1
@@ -0,0 +1,226 @@
+"""Out-of-core matrix products and LU solves for matrices larger than memory
+
+The operands and results are matrix files (see pymath.fileformat) opened memory mapped with Matrix.load, and the
+work is split in tiles small enough for a memory budget: only the tiles in flight are held in memory, and every
+result tile is written back to the mapped output file as soon as it is done. The operating system pages the files
+in and out as needed, the page cache is not counted against the budget.
+    A = Matrix.load('a.mat')
+    B = Matrix.load('b.mat')
+    C = outofcore.matmul(A, B, 'c.mat', memory=2 ** 30)
+"""
+from math import isqrt
+
+from pymath import fileformat, kernels
+from pymath.lu import LUFactor
+from pymath.matrix import Matrix
+
+
+# Memory budget used when none is given, in bytes
+DEFAULT_MEMORY = 1 << 30
+
+# Bytes counted per entry held in memory, tiles are stored unboxed but the kernels work on python floats
+ENTRY_BYTES = 32
+
+
+def tile_size(memory, tiles):
+    """Get the side of the largest square tiles of which the given number fits in memory bytes"""
+    return max(1, isqrt(memory // (tiles * ENTRY_BYTES)))
+
+
+def _create(path, rows, cols):
+    """Create a zero float matrix file and map it for writing"""
+    fileformat.create(path, (rows, cols), float)
+    return Matrix.load(path, mode='r+')
+
+
+def matmul(A, B, path, memory=DEFAULT_MEMORY):
+    """Tiled matrix product A @ B written to a matrix file
+
+    Every tile of the result is accumulated in memory from the products of a row of tiles of A with a column of
+    tiles of B, then written to the file. A tile of A, a tile of B, their product and the accumulated tile are held
+    at a time.
+
+    :param A: left hand side float or int matrix, typically memory mapped with Matrix.load
+    :param B: right hand side float or int matrix
+    :param path: file name of the result
+    :param memory: memory budget in bytes
+    :return: the product, memory mapped from path
+    """
+    if A.shape.columns != B.shape.rows:
+        raise ValueError('matrices inner dimension does not match')
+
+    n, k = A.shape
+    m = B.shape.columns
+    C = _create(path, n, m)
+    t = tile_size(memory, 4)
+    for r0 in range(0, n, t):
+        r1 = min(r0 + t, n)
+        for c0 in range(0, m, t):
+            c1 = min(c0 + t, m)
+            tile = Matrix(r1 - r0, c1 - c0, backend='array')
+            for p0 in range(0, k, t):
+                p1 = min(p0 + t, k)
+                tile += A[r0:r1, p0:p1] @ B[p0:p1, c0:c1]
+            C[r0:r1, c0:c1] = tile
+
+    return C
+
+
+def _swap_rows(M, i, p):
+    n = M.shape.columns
+    a, b = slice(i * n, (i + 1) * n), slice(p * n, (p + 1) * n)
+    row_i, row_p = M[a], M[b]
+    M[a], M[b] = row_p, row_i
+
+
+def _update_panel(panel, L, k0, k1):
+    """Apply the factored column panel k0..k1 to the in memory panel
+
+    L holds rows k0.. of the factored columns: the rows k0..k1 of the panel are solved with its unit lower triangle,
+    and the product of the rows below with them is subtracted from the rest of the panel.
+    """
+    for i in range(k0 + 1, k1):
+        row = panel[i]
+        for p in range(k0, i):
+            l = L[i - k0, p - k0]
+            if l:
+                row = kernels.axpy(-l, panel[p], row)
+        panel[i] = row
+
+    if k1 < panel.shape.rows:
+        below = panel[k1:, :]
+        below -= L[k1 - k0:, :] @ panel[k0:k1, :]
+
+
+def _factor_panel(panel, j0, piv, tol):
+    """Factorize rows j0.. of the in memory column panel starting at column j0 with partial pivoting
+
+    :return: list of the (row, pivot row) interchanges done, in order
+    """
+    n, w = panel.shape
+    a = panel._data
+    swaps = []
+    for c in range(w):
+        j = j0 + c
+        p = max(range(j, n), key=lambda i: abs(a[i * w + c]))
+        if p != j:
+            a[j * w: (j + 1) * w], a[p * w: (p + 1) * w] = a[p * w: (p + 1) * w], a[j * w: (j + 1) * w]
+            piv[j], piv[p] = piv[p], piv[j]
+            swaps.append((j, p))
+
+        pivot = a[j * w + c]
+        if not pivot or abs(pivot) < tol:
+            raise ValueError('matrix is singular')
+
+        pivot_row = a[j * w + c + 1: (j + 1) * w]
+        for i in range(j + 1, n):
+            l = a[i * w + c] / pivot
+            a[i * w + c] = l
+            if l and pivot_row:
+                start, end = i * w + c + 1, (i + 1) * w
+                a[start:end] = kernels.axpy(-l, pivot_row, a[start:end])
+
+    return swaps
+
+
+def lu_factor(A, path, memory=DEFAULT_MEMORY, tol=1e-15):
+    """Blocked left-looking LU factorization with partial pivoting, PA = LU, built in a matrix file
+
+    The columns are processed in panels as wide as the budget allows for about three of them. Each panel is read
+    into memory, updated with the already factored panels left of it one at a time (the left-looking order, so
+    those are only ever read), factorized with partial pivoting and written back; its row interchanges are then
+    applied to the whole file.
+
+    :param A: square float or int matrix, typically memory mapped with Matrix.load
+    :param path: file name of the packed factors
+    :param memory: memory budget in bytes
+    :param tol: pivots with smaller magnitude than this are treated as zero
+    :return: LUFactor(lu, piv) in the packed format of pymath.lu.lu_factor, with lu memory mapped from path
+    """
+    n, cols = A.shape
+    if n != cols:
+        raise ValueError('matrix is not square')
+
+    LU = _create(path, n, n)
+    rows = max(1, memory // (n * ENTRY_BYTES))
+    for r0 in range(0, n, rows):
+        r1 = min(r0 + rows, n)
+        LU[r0:r1, :] = A[r0:r1, :]
+
+    width = max(1, memory // (3 * n * ENTRY_BYTES))
+    piv = list(range(n))
+    for j0 in range(0, n, width):
+        j1 = min(j0 + width, n)
+        panel = Matrix(LU[:, j0:j1], backend='list')
+        for k0 in range(0, j0, width):
+            k1 = min(k0 + width, j0)
+            _update_panel(panel, LU[k0:, k0:k1].copy(), k0, k1)
+
+        for i, p in _factor_panel(panel, j0, piv, tol):
+            _swap_rows(LU, i, p)
+        LU[:, j0:j1] = panel
+
+    return LUFactor(LU, piv)
+
+
+def lu_solve(factor, B, memory=DEFAULT_MEMORY):
+    """Solve AX = B given the out-of-core LU factorization of A from lu_factor
+
+    The factors are read in blocks of rows fitting the memory budget, once for the forward and once for the
+    backward substitution. B and the solution are held in memory.
+
+    :param factor: LUFactor of A
+    :param B: right hand side matrix, one column per system
+    :param memory: memory budget in bytes
+    :return: solution X
+    """
+    LU, piv = factor
+    n = LU.shape.rows
+    if B.shape.rows != n:
+        raise ValueError('right hand side has {} rows, expected {}'.format(B.shape.rows, n))
+
+    X = Matrix([B[p] for p in piv])
+    rows = max(1, memory // (2 * n * ENTRY_BYTES))
+    for r0 in range(0, n, rows):
+        r1 = min(r0 + rows, n)
+        block = LU[r0:r1, :r1].copy()
+        if r0:
+            x = X[r0:r1, :]
+            x -= block[:, :r0] @ X[:r0, :]
+        for i in range(r0 + 1, r1):
+            row = X[i]
+            for p in range(r0, i):
+                l = block[i - r0, p]
+                if l:
+                    row = kernels.axpy(-l, X[p], row)
+            X[i] = row
+
+    for r0 in reversed(range(0, n, rows)):
+        r1 = min(r0 + rows, n)
+        block = LU[r0:r1, r0:].copy()
+        if r1 < n:
+            x = X[r0:r1, :]
+            x -= block[:, r1 - r0:] @ X[r1:, :]
+        for i in reversed(range(r0, r1)):
+            row = X[i]
+            for p in range(i + 1, r1):
+                u = block[i - r0, p - r0]
+                if u:
+                    row = kernels.axpy(-u, X[p], row)
+            pivot = block[i - r0, i - r0]
+            X[i] = [v / pivot for v in row]
+
+    return X
+
+
+def solve(A, B, path, memory=DEFAULT_MEMORY, tol=1e-15):
+    """Solve AX = B out-of-core, keeping the LU factors of A in the matrix file at path
+
+    :param A: square float or int matrix, typically memory mapped with Matrix.load
+    :param B: right hand side matrix, one column per system
+    :param path: file name of the packed factors
+    :param memory: memory budget in bytes
+    :param tol: pivots with smaller magnitude than this are treated as zero
+    :return: solution X
+    """
+    return lu_solve(lu_factor(A, path, memory, tol), B, memory)
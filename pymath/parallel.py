@@ -0,0 +1,324 @@
+"""Process pool helpers spreading pymath work over several cores
+
+Work is submitted to a concurrent.futures.ProcessPoolExecutor in bounded chunks, and only a few chunks per worker
+are in flight at a time, so neither the input nor the results are ever pickled as one huge list. Results are
+streamed back in input order.
+
+The matrix operations keep their operands in multiprocessing.shared_memory buffers that the workers attach to by
+name, so no matrix is pickled; each task only receives the bounds of the block it computes and writes its result
+straight into the shared output. When threads can run in parallel (numpy releases the GIL in its kernels, or the
+interpreter is a free-threaded build) a thread pool is used instead of processes.
+"""
+import os
+import sys
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+from multiprocessing.shared_memory import SharedMemory
+
+from pymath import exact, kernels, prime
+from pymath.lu import LUFactor
+from pymath.matrix import Matrix
+from pymath.storage import get_storage
+
+
+# Numbers factored per task by factors
+DEFAULT_CHUNK_SIZE = 1024
+
+# Width of the window sieved per task by primes_range
+SIEVE_SPAN = 1 << 22
+
+
+def _chunks(iterable, size):
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _ordered_map(fn, tasks, workers):
+    """Run fn(*task) for every task in a process pool, yielding the results in task order
+
+    At most two tasks per worker are submitted ahead of the one being waited for.
+    """
+    workers = workers or os.cpu_count() or 1
+    pending = deque()
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        for task in tasks:
+            pending.append(executor.submit(fn, *task))
+            if len(pending) > 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def _factor_chunk(numbers):
+    return list(prime.factor_many(numbers))
+
+
+def factors(numbers, workers=None, chunksize=DEFAULT_CHUNK_SIZE):
+    """Factor every number of an iterable in parallel
+
+    :param numbers: iterable of positive integers, consumed lazily
+    :param workers: number of worker processes, defaults to the number of cores
+    :param chunksize: numbers sent to a worker per task
+    :return: generator of factorizations (see prime.factors) in input order
+    """
+    tasks = ((chunk,) for chunk in _chunks(numbers, chunksize))
+    for result in _ordered_map(_factor_chunk, tasks, workers):
+        yield from result
+
+
+def _sieve_span(lo, hi):
+    return array('q', prime.primes_range(lo, hi))
+
+
+def primes_range(lo, hi, workers=None, span=SIEVE_SPAN):
+    """Sieve disjoint windows of [lo, hi) in parallel
+
+    :param lo: lower bound (inclusive)
+    :param hi: upper bound (exclusive)
+    :param workers: number of worker processes, defaults to the number of cores
+    :param span: width of the window sieved per task
+    :return: generator of the primes in increasing order
+    """
+    tasks = ((start, min(start + span, hi)) for start in range(lo, hi, span))
+    for result in _ordered_map(_sieve_span, tasks, workers):
+        yield from result
+
+
+def _modular_mapper(workers):
+    """Get a map-like function computing the images of the multimodular algorithms in a process pool"""
+    return lambda fn, *iterables: _ordered_map(fn, zip(*iterables), workers)
+
+
+def det_modular(A, workers=None):
+    """Exact determinant of a square matrix, computed modulo every prime in a separate task
+
+    :param workers: number of worker processes, defaults to the number of cores
+    :return: int, or Fraction for a matrix with non-integer entries (see exact.det_modular)
+    """
+    return exact.det_modular(A, mapper=_modular_mapper(workers))
+
+
+def solve_modular(A, B, workers=None):
+    """Solve AX = B exactly for a non-singular square A, modulo every prime in a separate task
+
+    :param workers: number of worker processes, defaults to the number of cores
+    :return: Fraction matrix X (see exact.solve_modular)
+    """
+    return exact.solve_modular(A, B, mapper=_modular_mapper(workers))
+
+
+# Column panel width of the blocked LU factorization
+LU_BLOCK_SIZE = 64
+
+
+def threads_scale():
+    """Check if a thread pool can run the matrix kernels in parallel
+
+    True when numpy is installed (its kernels release the GIL) or the interpreter runs without the GIL.
+    """
+    gil_enabled = getattr(sys, '_is_gil_enabled', lambda: True)()
+    return kernels.numpy is not None or not gil_enabled
+
+
+def _executor(workers):
+    if threads_scale():
+        return ThreadPoolExecutor(max_workers=workers)
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+def _row_blocks(lo, hi, parts):
+    """Split the rows lo..hi into at most parts contiguous (start, end) blocks of almost equal size"""
+    count = hi - lo
+    parts = max(1, min(parts, count))
+    for i in range(parts):
+        yield lo + count * i // parts, lo + count * (i + 1) // parts
+
+
+@contextmanager
+def _shared_buffers(*sizes):
+    """Create shared memory blocks holding the given numbers of doubles, unlinked on exit"""
+    blocks = [SharedMemory(create=True, size=max(8, 8 * size)) for size in sizes]
+    try:
+        yield blocks
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+@contextmanager
+def _attach(name):
+    """Attach to a shared memory block by name and get it as a flat memoryview of doubles"""
+    block = SharedMemory(name=name)
+    view = block.buf.cast('d')
+    try:
+        yield view
+    finally:
+        view.release()
+        block.close()
+
+
+def _fill(block, data):
+    view = block.buf.cast('d')
+    try:
+        view[:len(data)] = array('d', data)
+    finally:
+        view.release()
+
+
+def _read(block, size):
+    view = block.buf.cast('d')
+    try:
+        return view[:size].tolist()
+    finally:
+        view.release()
+
+
+def _matmul_rows(a_name, b_name, c_name, k, m, r0, r1):
+    """Compute rows r0..r1 of the shared product c = a @ b"""
+    with _attach(a_name) as a, _attach(b_name) as b, _attach(c_name) as c:
+        if kernels.numpy is not None:
+            lhs, rhs = kernels.numpy.frombuffer(a, dtype='d'), kernels.numpy.frombuffer(b, dtype='d')
+            rows = kernels.matmul_numpy(lhs[r0 * k: r1 * k], rhs[:k * m], r1 - r0, k, m)
+            del lhs, rhs
+        else:
+            rows = kernels.matmul(a[r0 * k: r1 * k].tolist(), b[:k * m].tolist(), r1 - r0, k, m)
+        c[r0 * m: r1 * m] = array('d', rows)
+
+
+def matmul(A, B, workers=None):
+    """Matrix product computed in row blocks by a pool of workers
+
+    Float and int matrices are multiplied in double precision, the result is a float matrix with the backend of A.
+    Other dtypes, and products too small to split, are computed serially with A @ B.
+
+    :param A: left hand side matrix
+    :param B: right hand side matrix
+    :param workers: number of workers, defaults to the number of cores
+    :return: matrix product
+    """
+    if A.shape.columns != B.shape.rows:
+        raise ValueError('matrices inner dimension does not match')
+
+    workers = workers or os.cpu_count() or 1
+    n, k = A.shape
+    m = B.shape.columns
+    if workers == 1 or n < 2 or A.dtype not in (float, int) or B.dtype not in (float, int):
+        return A @ B
+
+    with _shared_buffers(n * k, k * m, n * m) as (a, b, c), _executor(workers) as executor:
+        _fill(a, A._data)
+        _fill(b, B._data)
+        tasks = [executor.submit(_matmul_rows, a.name, b.name, c.name, k, m, r0, r1)
+                 for r0, r1 in _row_blocks(0, n, workers)]
+        for task in tasks:
+            task.result()
+        data = _read(c, n * m)
+
+    storage = get_storage(A.backend, float)
+
+    return Matrix._wrap(storage.fromiter(data), n, m, storage)
+
+
+def _trailing_update(name, n, j0, j1, r0, r1):
+    """Subtract L21 @ U12 from rows r0..r1 of the trailing submatrix of the shared n x n LU buffer
+
+    The panel holds the columns j0..j1; L21 is stored left of the trailing submatrix and U12 above it.
+    """
+    with _attach(name) as a:
+        if kernels.numpy is not None:
+            lu = kernels.numpy.frombuffer(a, dtype='d')[:n * n].reshape(n, n)
+            lu[r0:r1, j1:] -= lu[r0:r1, j0:j1] @ lu[j0:j1, j1:]
+            del lu
+            return
+
+        u12 = [a[p * n + j1: (p + 1) * n].tolist() for p in range(j0, j1)]
+        for i in range(r0, r1):
+            row = a[i * n + j1: (i + 1) * n].tolist()
+            for p, u in zip(range(j0, j1), u12):
+                l = a[i * n + p]
+                if l:
+                    row = kernels.axpy(-l, u, row)
+            a[i * n + j1: (i + 1) * n] = array('d', row)
+
+
+def _factor_panel(a, n, j0, j1, piv, tol):
+    """Factorize the column panel j0..j1 of the shared LU buffer with partial pivoting, then compute U12"""
+    for j in range(j0, j1):
+        p = max(range(j, n), key=lambda i: abs(a[i * n + j]))
+        if p != j:
+            row_j, row_p = a[j * n: (j + 1) * n].tolist(), a[p * n: (p + 1) * n].tolist()
+            a[j * n: (j + 1) * n], a[p * n: (p + 1) * n] = array('d', row_p), array('d', row_j)
+            piv[j], piv[p] = piv[p], piv[j]
+
+        pivot = a[j * n + j]
+        if not pivot or abs(pivot) < tol:
+            raise ValueError('matrix is singular')
+
+        pivot_row = a[j * n + j + 1: j * n + j1].tolist()
+        for i in range(j + 1, n):
+            l = a[i * n + j] / pivot
+            a[i * n + j] = l
+            if l and pivot_row:
+                start, end = i * n + j + 1, i * n + j1
+                a[start:end] = array('d', kernels.axpy(-l, pivot_row, a[start:end].tolist()))
+
+    for i in range(j0 + 1, j1):
+        row = a[i * n + j1: (i + 1) * n].tolist()
+        for p in range(j0, i):
+            l = a[i * n + p]
+            if l:
+                row = kernels.axpy(-l, a[p * n + j1: (p + 1) * n].tolist(), row)
+        a[i * n + j1: (i + 1) * n] = array('d', row)
+
+
+def lu_factor(M, workers=None, block=LU_BLOCK_SIZE, tol=1e-15):
+    """Blocked right-looking LU factorization with partial pivoting, updating the trailing submatrix in parallel
+
+    Each column panel is factorized by the calling process; the update of the trailing submatrix, which holds
+    nearly all of the O(n^3) work, is split in row blocks over the workers, all working in place on one shared
+    buffer.
+
+    :param M: square float or int matrix
+    :param workers: number of workers, defaults to the number of cores
+    :param block: column panel width
+    :param tol: pivots with smaller magnitude than this are treated as zero
+    :return: LUFactor(lu, piv) in the same packed format as pymath.lu.lu_factor
+    """
+    n, cols = M.shape
+    if n != cols:
+        raise ValueError('matrix is not square')
+    if M.dtype not in (float, int):
+        raise ValueError('parallel LU factorization needs a float or int matrix, got {}'.format(M.dtype))
+
+    workers = workers or os.cpu_count() or 1
+    piv = list(range(n))
+    with _shared_buffers(n * n) as (shared,), _executor(workers) as executor:
+        _fill(shared, M._data)
+        a = shared.buf.cast('d')
+        try:
+            for j0 in range(0, n, block):
+                j1 = min(j0 + block, n)
+                _factor_panel(a, n, j0, j1, piv, tol)
+                if j1 < n:
+                    tasks = [executor.submit(_trailing_update, shared.name, n, j0, j1, r0, r1)
+                             for r0, r1 in _row_blocks(j1, n, workers)]
+                    for task in tasks:
+                        task.result()
+        finally:
+            a.release()
+        data = _read(shared, n * n)
+
+    storage = get_storage(M.backend, float)
+
+    return LUFactor(Matrix._wrap(storage.fromiter(data), n, n, storage), piv)
@@ -1,42 +1,544 @@
+import os
+import struct
+import sys
+import threading
 import time
+from array import array
+from bisect import bisect_left, bisect_right
 from functools import reduce
-from collections import Counter
+from collections import Counter, OrderedDict, namedtuple
+from itertools import compress, islice
+from math import gcd, isqrt, log
+from mmap import ACCESS_READ, mmap as memory_map
 
+from pymath.instrument import instrumented
 
+
+# Number of odd integers sieved at a time by primes_range
+SEGMENT_SIZE = 1 << 18
+
+
+def _odd_primes_upto(n):
+    """Get the odd primes <= n, sieving a bytearray over the odd numbers only"""
+    if n < 3:
+        return []
+    # index i represents the odd number 2*i + 1
+    size = (n + 1) // 2
+    sieve = bytearray(b'\x01') * size
+    sieve[0] = 0
+    for i in range(1, (isqrt(n) + 1) // 2):
+        if sieve[i]:
+            p = 2 * i + 1
+            start = p * p // 2
+            sieve[start::p] = bytes(len(range(start, size, p)))
+
+    return list(compress(range(1, n + 1, 2), sieve))
+
+
+@instrumented('prime.primes_range')
+def primes_range(lo, hi, segment_size=SEGMENT_SIZE):
+    """Lazily yield the primes p with lo <= p < hi in increasing order
+
+    The window is sieved in segments of segment_size odd numbers using the primes up to sqrt(hi), so memory use
+    is O(sqrt(hi) + segment_size) no matter how large or wide the window is.
+
+    :param lo: lower bound (inclusive)
+    :param hi: upper bound (exclusive)
+    :param segment_size: number of odd numbers sieved at a time
+    :return: generator of primes
+    """
+    if hi <= 2 or lo >= hi:
+        return
+    if lo <= 2:
+        yield 2
+
+    base = _odd_primes_upto(isqrt(hi - 1))
+    start = max(lo, 3) | 1
+    for seg_lo in range(start, hi, 2 * segment_size):
+        seg_hi = min(seg_lo + 2 * segment_size, hi)
+        odds = range(seg_lo, seg_hi, 2)
+        count = len(odds)
+        sieve = bytearray(b'\x01') * count
+        for p in base:
+            pp = p * p
+            if pp >= seg_hi:
+                break
+            first = max(pp, (seg_lo + p - 1) // p * p)
+            if not first & 1:
+                first += p
+            i = (first - seg_lo) // 2
+            sieve[i::p] = bytes(len(range(i, count, p)))
+
+        yield from compress(odds, sieve)
+
+
+@instrumented('prime.primes')
 def primes(n):
-    top = int(n**0.5) + 1
-    ps = {i for i in range(2, n + 1)}
-    for i in range(2, top):
-        if i in ps:
-            for j in (i*i + x*i for x in range(n)):
-                if j > n:
-                    break
-                ps.discard(j)
-    return ps
+    """Get the set of all primes <= n"""
+    return set(primes_range(2, n + 1))
+
+
+class PrimeTable(object):
+    """Sorted table of all primes below a bound, extended by sieving only when a larger bound is needed
+
+    The primes are kept unboxed in a typed array of 64 bit ints, so lookups are binary searches:
+        table = PrimeTable(10 ** 6)
+        table.pi(1000)          # 168
+        table.nth_prime(1000)   # 7919
+        table.next_prime(7919)  # 7927
+
+    A table can be saved to a file and memory mapped by later processes instead of being sieved again:
+        table.save('primes.tbl')
+        table = PrimeTable.load('primes.tbl')
+    """
+
+    _HEADER = struct.Struct('<8sQQ')
+    _MAGIC = b'PYPRIMES'
+
+    def __init__(self, limit=2):
+        self._primes = array('q')
+        self._limit = 2
+        self._lock = threading.Lock()
+        self.extend(limit)
+
+    @property
+    def limit(self):
+        """All primes below this bound are in the table"""
+        return self._limit
+
+    def __len__(self):
+        return len(self._primes)
+
+    def __getitem__(self, item):
+        return self._primes[item]
+
+    @instrumented('prime.PrimeTable.extend')
+    def extend(self, limit):
+        """Sieve the primes up to limit (exclusive) into the table, if not there already"""
+        with self._lock:
+            if limit <= self._limit:
+                return
+            if not isinstance(self._primes, array):
+                # a memory mapped table is copied into memory before it can grow
+                self._primes = array('q', self._primes)
+            self._primes.extend(primes_range(self._limit, limit))
+            self._limit = limit
+
+    def is_prime(self, n):
+        """Check if n is prime, looked up in the table below its limit, with Miller-Rabin above it"""
+        if n >= self._limit:
+            return is_prime(n)
+        i = bisect_left(self._primes, n)
+        return i < len(self._primes) and self._primes[i] == n
+
+    def pi(self, x):
+        """Prime counting function, the number of primes <= x, extending the table to x when needed"""
+        self.extend(x + 1)
+        return bisect_right(self._primes, x)
+
+    def nth_prime(self, n):
+        """Get the n-th prime, nth_prime(1) is 2, extending the table until it holds n primes"""
+        if n < 1:
+            raise ValueError('primes are counted from 1, got {}'.format(n))
+        if n > len(self._primes):
+            # the n-th prime is below n (ln n + ln ln n) for n >= 6 (Rosser's theorem)
+            self.extend(int(n * (log(n) + log(log(n)))) + 1 if n >= 6 else 14)
+
+        return self._primes[n - 1]
+
+    def next_prime(self, n):
+        """Get the smallest prime > n, searched with Miller-Rabin when beyond the table"""
+        i = bisect_right(self._primes, n)
+        if i < len(self._primes):
+            return self._primes[i]
+
+        n = max(n + 1, self._limit)
+        while not is_prime(n):
+            n += 1
+        return n
+
+    def prev_prime(self, n):
+        """Get the largest prime < n, searched with Miller-Rabin when beyond the table"""
+        if n <= 2:
+            raise ValueError('there is no prime below {}'.format(n))
+        while n > self._limit:
+            n -= 1
+            if is_prime(n):
+                return n
+
+        return self._primes[bisect_left(self._primes, n) - 1]
+
+    def save(self, path):
+        """Write the table to a file: a header with the limit and count, then the primes as little endian int64"""
+        primes = self._primes
+        if sys.byteorder != 'little':
+            primes = array('q', primes)
+            primes.byteswap()
+        with open(path, 'wb') as f:
+            f.write(self._HEADER.pack(self._MAGIC, self._limit, len(self._primes)))
+            f.write(primes)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Read a table written by save
+
+        :param path: file name
+        :param mmap: memory map the file read only instead of reading it, the table is only copied into memory
+                     if it has to be extended
+        :return: table
+        """
+        table = cls()
+        with open(path, 'rb') as f:
+            magic, limit, count = cls._HEADER.unpack(f.read(cls._HEADER.size))
+            if magic != cls._MAGIC:
+                raise ValueError('{} is not a prime table file'.format(path))
+
+            offset, nbytes = cls._HEADER.size, 8 * count
+            if mmap and count and sys.byteorder == 'little':
+                mapping = memory_map(f.fileno(), 0, access=ACCESS_READ)
+                table._primes = memoryview(mapping)[offset: offset + nbytes].cast('q')
+            else:
+                table._primes.frombytes(f.read(nbytes))
+                if sys.byteorder != 'little':
+                    table._primes.byteswap()
+        table._limit = limit
+
+        return table
+
+
+_shared_table = None
+
+
+def prime_table(path=None):
+    """Get the PrimeTable shared by the whole process
+
+    :param path: table file to memory map if it exists, used when the shared table is first created
+    :return: table
+    """
+    global _shared_table
+    if _shared_table is None:
+        _shared_table = PrimeTable.load(path) if path is not None and os.path.exists(path) else PrimeTable()
+
+    return _shared_table
+
+
+# Factors up to this bound are removed by trial division before Miller-Rabin and Pollard-Brent rho take over
+WHEEL_LIMIT = 1000
+
+# Miller-Rabin with these bases is deterministic for n < 3.3 * 10^24, which covers all 64-bit integers
+_MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+_small_primes = []
+
+
+def _small_prime_table():
+    """Get the primes below WHEEL_LIMIT, sieved once and shared by all factorizations"""
+    if not _small_primes:
+        _small_primes.extend([2] + _odd_primes_upto(WHEEL_LIMIT - 1))
+    return _small_primes
+
+
+def is_prime(n):
+    """Miller-Rabin primality test
+
+    Deterministic for n < 3.3 * 10^24 (so for every 64-bit integer), for larger n a composite is reported as
+    prime only if it is a strong pseudoprime to all of the first 13 prime bases.
+    """
+    if n < 2:
+        return False
+    for p in _MILLER_RABIN_BASES:
+        if n % p == 0:
+            return n == p
+
+    d = n - 1
+    s = 0
+    while not d & 1:
+        d >>= 1
+        s += 1
+
+    for a in _MILLER_RABIN_BASES:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
 
+    return True
 
+
+def pollard_brent(n, c=1):
+    """Find a non-trivial factor of the odd composite n with Brent's variant of Pollard's rho method
+
+    :param n: odd composite number
+    :param c: constant of the first polynomial x^2 + c tried, the next is used whenever a cycle gives no factor
+    :return: factor d of n with 1 < d < n
+    """
+    m = 128
+    while True:
+        y, r, q, g = 2, 1, 1, 1
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(m, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = gcd(q, n)
+                k += m
+            r <<= 1
+
+        if g == n:
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = gcd(abs(x - ys), n)
+
+        if g != n:
+            return g
+        c += 1
+
+
+def _trial_division(n, fs):
+    """Divide the primes of the small prime table out of n, counting them in fs, and get the cofactor
+
+    The cofactor is 1, a prime, or a number with no prime factor below WHEEL_LIMIT.
+    """
+    for p in _small_prime_table():
+        if p * p > n:
+            break
+        while n % p == 0:
+            n //= p
+            fs[p] += 1
+
+    return n
+
+
+@instrumented('prime.factors')
 def factors(n):
-    r = n
+    """Get the prime factorization of a positive integer
+
+    Small factors are removed by trial division with a table of primes, larger cofactors are split by
+    Pollard-Brent rho until Miller-Rabin reports every part as prime.
+
+    :param n: number to factor
+    :return: list of (prime, power) sorted by prime
+    """
+    if n < 1:
+        raise ValueError('can only factor positive integers, got {}'.format(n))
+
     fs = Counter()
-    top = int(n**0.5)
-    while not r & 1:
-        r >>= 1
-        fs[2] += 1
-
-    for f in range(3, top, 2):
-        while r % f == 0:
-            r = r // f
-            fs[f] += 1
-            if r == 0:
-                break
+    r = _trial_division(n, fs)
+
+    stack = [r] if r > 1 else []
+    while stack:
+        m = stack.pop()
+        if m < WHEEL_LIMIT * WHEEL_LIMIT or is_prime(m):
+            fs[m] += 1
+        else:
+            d = pollard_brent(m)
+            stack.extend((d, m // d))
 
-    if r > 1:
-        fs[r] = 1
     facts = [(f, p) for f, p in sorted(fs.items(), key=lambda f: f[0])]
 
     return facts
 
 
+def factor_many(numbers):
+    """Lazily factor every number of an iterable, sharing the small prime table between them
+
+    :param numbers: iterable of positive integers
+    :return: generator of factorizations in the format returned by factors
+    """
+    _small_prime_table()
+    for n in numbers:
+        yield factors(n)
+
+
+class SmallestFactorTable(object):
+    """Table of the smallest prime factor of every integer up to a limit
+
+    Any n <= limit is factored in O(log n) steps by repeatedly looking up and dividing out its smallest prime
+    factor. The table takes 4 bytes per entry for limits below 2^32:
+        table = SmallestFactorTable(10 ** 6)
+        table.factors(360)      # [(2, 3), (3, 2), (5, 1)]
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        code = 'I' if limit < 1 << 32 else 'q'
+        spf = array(code, range(limit + 1))
+        # larger primes are marked first, so the smallest prime dividing a number is the one left in the table
+        for p in reversed([2] + _odd_primes_upto(isqrt(limit))):
+            spf[p * p::p] = array(code, [p]) * len(range(p * p, limit + 1, p))
+        self._spf = spf
+
+    def __getitem__(self, n):
+        return self._spf[n]
+
+    def factors(self, n):
+        """Get the prime factorization of 1 <= n <= limit in the format returned by prime.factors"""
+        if not 1 <= n <= self.limit:
+            raise ValueError('can only factor integers from 1 to {}, got {}'.format(self.limit, n))
+
+        spf = self._spf
+        fs = []
+        while n > 1:
+            p = spf[n]
+            k = 0
+            while n % p == 0:
+                n //= p
+                k += 1
+            fs.append((p, k))
+
+        return fs
+
+
+# Number of factorizations kept by a FactorCache by default
+DEFAULT_CACHE_SIZE = 1 << 16
+
+# Number of remembered primes, most recently used first, a FactorCache trial divides a composite by
+KNOWN_PRIME_TRIALS = 64
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class FactorCache(object):
+    """Size bounded memo of factorizations, evicting the least recently used
+
+    Numbers up to the limit of an optional SmallestFactorTable are factored by table lookups and not stored.
+    Other numbers are looked up in the memo, and on a miss the parts found while splitting them are looked up as
+    well, so a number sharing a large cofactor with one factored before is not split again. The large primes found
+    are remembered too (as many as maxsize), so they are not tested for primality again, and a composite part is
+    trial divided by the KNOWN_PRIME_TRIALS most recently used of them before it is split with Pollard-Brent:
+        cache = FactorCache(maxsize=10000, table=SmallestFactorTable(10 ** 6))
+        cache.factors(2 ** 64 - 1)
+        cache.cache_info()      # CacheInfo(hits=0, misses=1, maxsize=10000, currsize=1)
+    """
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE, table=None):
+        self.maxsize = maxsize
+        self.table = table
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._primes = OrderedDict()
+
+    def cache_info(self):
+        """Get the hit and miss statistics of the memo"""
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._cache))
+
+    def cache_clear(self):
+        """Empty the memo and reset its statistics"""
+        self._cache.clear()
+        self._primes.clear()
+        self.hits = self.misses = 0
+
+    def __contains__(self, n):
+        return n in self._cache
+
+    def factors(self, n):
+        """Get the prime factorization of a positive integer, in the format returned by prime.factors"""
+        if n < 1:
+            raise ValueError('can only factor positive integers, got {}'.format(n))
+        if self.table is not None and n <= self.table.limit:
+            return self.table.factors(n)
+
+        cached = self._cache.get(n)
+        if cached is not None:
+            self._cache.move_to_end(n)
+            self.hits += 1
+            return list(cached)
+
+        self.misses += 1
+        fs = self._factor(n)
+        self._store(self._cache, n, tuple(fs))
+
+        return fs
+
+    def _store(self, cache, key, value):
+        cache[key] = value
+        if len(cache) > self.maxsize:
+            cache.popitem(last=False)
+
+    def _factor(self, n):
+        fs = Counter()
+        r = _trial_division(n, fs)
+
+        stack = [r] if r > 1 else []
+        while stack:
+            m = stack.pop()
+            cached = self._cache.get(m)
+            if cached is not None:
+                self._cache.move_to_end(m)
+                for p, k in cached:
+                    fs[p] += k
+            elif m < WHEEL_LIMIT * WHEEL_LIMIT:
+                fs[m] += 1
+            elif m in self._primes:
+                self._primes.move_to_end(m)
+                fs[m] += 1
+            elif is_prime(m):
+                self._store(self._primes, m, None)
+                fs[m] += 1
+            else:
+                d = self._known_prime_factor(m) or pollard_brent(m)
+                stack.extend((d, m // d))
+
+        return sorted(fs.items())
+
+    def _known_prime_factor(self, m):
+        """Get a remembered prime dividing m, trying the KNOWN_PRIME_TRIALS most recently used ones, or None"""
+        for p in islice(reversed(self._primes), KNOWN_PRIME_TRIALS):
+            if m % p == 0:
+                return p
+
+        return None
+
+
+@instrumented('prime.factor_range')
+def factor_range(lo, hi, segment_size=SEGMENT_SIZE):
+    """Lazily factor every integer n with lo <= n < hi
+
+    The interval is processed in segments of segment_size numbers: every prime p <= sqrt(hi) is divided out of
+    just the multiples of p in the segment, instead of trial dividing each number by all of the primes. What is
+    left of a number after that is 1 or its single prime factor above sqrt(hi).
+
+    :param lo: lower bound (inclusive), at least 1
+    :param hi: upper bound (exclusive)
+    :param segment_size: number of integers factored at a time
+    :return: generator of factorizations in the format returned by factors, in increasing order of n
+    """
+    if lo < 1:
+        raise ValueError('can only factor positive integers, got {}'.format(lo))
+    base = [2] + _odd_primes_upto(isqrt(hi - 1)) if hi > 4 else [2]
+
+    for seg_lo in range(lo, hi, segment_size):
+        seg_hi = min(seg_lo + segment_size, hi)
+        rest = list(range(seg_lo, seg_hi))
+        found = [[] for _ in rest]
+        for p in base:
+            for i in range(-seg_lo % p, len(rest), p):
+                m = rest[i] // p
+                k = 1
+                while m % p == 0:
+                    m //= p
+                    k += 1
+                rest[i] = m
+                found[i].append((p, k))
+
+        for fs, r in zip(found, rest):
+            if r > 1:
+                fs.append((r, 1))
+            yield fs
+
+
 def power_str(fs):
     f, p = fs
     return str(f) + ('^{}'.format(p) if p > 1 else '')
@@ -46,6 +548,7 @@ def factor_str(fs):
     return ' * '.join([power_str(s) for s in fs])
 
 
+@instrumented('prime.sundaram3')
 def sundaram3(max_n):
     numbers = list(range(3, max_n+1, 2))
     half = max_n // 2
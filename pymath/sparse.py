@@ -0,0 +1,308 @@
+"""Sparse matrices in compressed sparse row (CSR) format
+
+Only the non-zero entries are stored, so memory use and the cost of products, sums and transposes scale with the
+number of non-zero entries (nnz) instead of rows*columns.
+"""
+from array import array
+from bisect import bisect_left
+from collections.abc import Sequence
+from operator import mul
+
+from pymath import kernels
+from pymath.matrix import Matrix, MatrixShape
+from pymath.storage import get_storage, promote
+from pymath.vector import Vector, typecode_of
+
+
+class SparseMatrix(object):
+    """A 2-dimensional sparse matrix stored in CSR format
+
+      Row r holds the entries data[indptr[r]:indptr[r+1]] in the columns indices[indptr[r]:indptr[r+1]], sorted
+      by column.
+
+      Can be created in three different ways:
+       - From coordinate (COO) triplets (row, column, value), duplicates are summed and zeros dropped:
+           s = SparseMatrix(3, 3, [(0, 0, 1.0), (2, 1, 5.0)])
+
+       - From separate coordinate lists:
+           s = SparseMatrix.from_coo(3, 3, [0, 2], [0, 1], [1.0, 5.0])
+
+       - From a dense Matrix:
+           s = SparseMatrix.from_matrix(m)
+    """
+
+    def __init__(self, rows, cols, entries=(), dtype=float, backend=None):
+        self._shape = MatrixShape(rows, cols)
+        self.dtype = dtype
+        self._storage = get_storage(backend, dtype)
+
+        row_entries = {}
+        for r, c, v in entries:
+            if not (0 <= r < rows and 0 <= c < cols):
+                raise IndexError('entry ({}, {}) out of range for shape {}'.format(r, c, self._shape))
+            row = row_entries.setdefault(r, {})
+            row[c] = row.get(c, 0) + v
+
+        self._set_rows(row_entries.get(r, {}) for r in range(rows))
+
+    @classmethod
+    def from_coo(cls, rows, cols, row_indices, col_indices, values, dtype=float, backend=None):
+        """Create a sparse matrix from coordinate lists, entry k is values[k] at (row_indices[k], col_indices[k])"""
+        return cls(rows, cols, zip(row_indices, col_indices, values), dtype=dtype, backend=backend)
+
+    @classmethod
+    def from_matrix(cls, M):
+        """Create a sparse matrix holding the non-zero entries of a dense Matrix"""
+        rows, cols = M.shape
+        data = M._data
+        s = cls._empty(rows, cols, M._storage)
+        s._set_rows({c: v for c, v in enumerate(data[r * cols: (r + 1) * cols]) if v} for r in range(rows))
+
+        return s
+
+    @classmethod
+    def _empty(cls, rows, cols, storage):
+        s = cls.__new__(cls)
+        s._shape = MatrixShape(rows, cols)
+        s.dtype = storage.dtype
+        s._storage = storage
+
+        return s
+
+    def _set_rows(self, rows):
+        """Fill the CSR arrays from an iterable of {column: value} dicts, one per row, dropping zeros"""
+        indptr = array('q', [0])
+        indices = array('q')
+        values = []
+        for row in rows:
+            for c in sorted(row):
+                v = row[c]
+                if v:
+                    indices.append(c)
+                    values.append(v)
+            indptr.append(len(indices))
+
+        self.indptr = indptr
+        self.indices = indices
+        self.data = self._storage.fromiter(values)
+
+    def _rows(self):
+        """Iterate over the rows as (columns, values) slices"""
+        indptr, indices, data = self.indptr, self.indices, self.data
+        for r in range(self._shape.rows):
+            start, end = indptr[r], indptr[r + 1]
+            yield indices[start:end], data[start:end]
+
+    @property
+    def shape(self):
+        return self._shape
+
+    @property
+    def nnz(self):
+        """Number of stored non-zero entries"""
+        return len(self.indices)
+
+    def __getitem__(self, item):
+        r, c = item
+        rows, cols = self._shape
+        if not 0 <= r < rows:
+            raise IndexError('row index out of range')
+        if not 0 <= c < cols:
+            raise IndexError('column index out of range')
+
+        start, end = self.indptr[r], self.indptr[r + 1]
+        i = bisect_left(self.indices, c, start, end)
+        if i < end and self.indices[i] == c:
+            return self.data[i]
+
+        return self.dtype(0)
+
+    def to_matrix(self):
+        """Get the dense Matrix with the same entries"""
+        rows, cols = self._shape
+        dense = self._storage.zeros(rows * cols)
+        for r, (columns, values) in enumerate(self._rows()):
+            offset = r * cols
+            for c, v in zip(columns, values):
+                dense[offset + c] = v
+
+        return Matrix._wrap(dense, rows, cols, self._storage)
+
+    def row_dicts(self):
+        """Get the rows as {column: value} dicts"""
+        return [dict(zip(columns, values)) for columns, values in self._rows()]
+
+    def diagonal(self):
+        """Get the diagonal entries as a list"""
+        return [self[i, i] for i in range(min(self._shape))]
+
+    def __str__(self):
+        return '\n'.join('({}, {}) {}'.format(r, c, v) for r, (cs, vs) in enumerate(self._rows())
+                         for c, v in zip(cs, vs))
+
+    def __repr__(self):
+        entries = [(r, c, v) for r, (cs, vs) in enumerate(self._rows()) for c, v in zip(cs, vs)]
+        return 'SparseMatrix({}, {}, {})'.format(self._shape.rows, self._shape.columns, entries)
+
+    def __eq__(self, other):
+        if not isinstance(other, SparseMatrix):
+            raise TypeError('SparseMatrix not comparable with {}'.format(type(other)))
+        return (self.shape == other.shape and self.indptr == other.indptr and self.indices == other.indices and
+                list(self.data) == list(other.data))
+
+    @property
+    def T(self):
+        """Get the transpose, computed by a counting sort of the entries on column"""
+        rows, cols = self._shape
+        counts = [0] * (cols + 1)
+        for c in self.indices:
+            counts[c + 1] += 1
+        for c in range(cols):
+            counts[c + 1] += counts[c]
+
+        indptr = array('q', counts)
+        indices = array('q', bytes(8 * self.nnz))
+        values = [None] * self.nnz
+        for r, (columns, row_values) in enumerate(self._rows()):
+            for c, v in zip(columns, row_values):
+                k = counts[c]
+                indices[k] = r
+                values[k] = v
+                counts[c] = k + 1
+
+        t = self._empty(cols, rows, self._storage)
+        t.indptr, t.indices, t.data = indptr, indices, self._storage.fromiter(values)
+
+        return t
+
+    def _combine(self, other, sign):
+        if not isinstance(other, SparseMatrix):
+            return NotImplemented
+        if self.shape != other.shape:
+            raise ValueError('matrix shapes not equal')
+
+        def rows():
+            for (lcs, lvs), (rcs, rvs) in zip(self._rows(), other._rows()):
+                row = dict(zip(lcs, lvs))
+                for c, v in zip(rcs, rvs):
+                    row[c] = row.get(c, 0) + sign * v
+                yield row
+
+        s = self._empty(*self._shape, promote(self._storage, other.dtype))
+        s._set_rows(rows())
+
+        return s
+
+    def __add__(self, other):
+        return self._combine(other, 1)
+
+    def __sub__(self, other):
+        return self._combine(other, -1)
+
+    def __neg__(self):
+        return self * -1
+
+    def __mul__(self, other):
+        if isinstance(other, (SparseMatrix, Matrix)) or isinstance(other, Sequence):
+            return NotImplemented
+
+        storage = promote(self._storage, type(other))
+        s = self._empty(*self._shape, storage)
+        if other:
+            s.indptr, s.indices = array('q', self.indptr), array('q', self.indices)
+            s.data = storage.fromiter(v * other for v in self.data)
+        else:
+            s.indptr, s.indices, s.data = array('q', bytes(8 * (self._shape.rows + 1))), array('q'), storage.zeros(0)
+
+        return s
+
+    def __rmul__(self, other):
+        return self * other
+
+    def matvec(self, x):
+        """Get the product with the sequence x as a list"""
+        if len(x) != self._shape.columns:
+            raise ValueError('vector has {} entries, expected {}'.format(len(x), self._shape.columns))
+
+        # All products in one pass, then one sum per row: no per-row slicing of indices and data
+        products = list(map(mul, self.data, map(x.__getitem__, self.indices)))
+        indptr = self.indptr
+
+        return [sum(products[start:end]) for start, end in zip(indptr, indptr[1:])]
+
+    def __matmul__(self, other):
+        if isinstance(other, SparseMatrix):
+            return self._matmul_sparse(other)
+        elif isinstance(other, Matrix):
+            return self._matmul_dense(other)
+        elif isinstance(other, Sequence):
+            return Vector(self.matvec(other), typecode_of(self.dtype))
+
+        return NotImplemented
+
+    def __rmatmul__(self, other):
+        if isinstance(other, Matrix):
+            return self._rmatmul_dense(other)
+
+        return NotImplemented
+
+    def _matmul_dense(self, other):
+        rows, inner = self._shape
+        if inner != other.shape.rows:
+            raise ValueError('matrices inner dimension does not match')
+
+        cols = other.shape.columns
+        b = other._data
+        out = []
+        for columns, values in self._rows():
+            acc = [0] * cols
+            for c, v in zip(columns, values):
+                acc = kernels.axpy(v, b[c * cols: (c + 1) * cols], acc)
+            out.extend(acc)
+
+        storage = promote(other._storage, self.dtype)
+
+        return Matrix._wrap(storage.fromiter(out), rows, cols, storage)
+
+    def _rmatmul_dense(self, other):
+        """Get the contiguous product other @ self, every row a sum of the rows of self scaled by entries of other"""
+        inner, cols = self._shape
+        if other.shape.columns != inner:
+            raise ValueError('matrices inner dimension does not match')
+
+        rows = other.shape.rows
+        a = other._data
+        sparse_rows = list(self._rows())
+        out = []
+        for r in range(rows):
+            acc = [0] * cols
+            for x, (columns, values) in zip(a[r * inner: (r + 1) * inner], sparse_rows):
+                if x:
+                    for c, v in zip(columns, values):
+                        acc[c] += x * v
+            out.extend(acc)
+
+        storage = promote(other._storage, self.dtype)
+
+        return Matrix._wrap(storage.fromiter(out), rows, cols, storage)
+
+    def _matmul_sparse(self, other):
+        rows, inner = self._shape
+        if inner != other.shape.rows:
+            raise ValueError('matrices inner dimension does not match')
+
+        other_rows = list(other._rows())
+
+        def product_rows():
+            for columns, values in self._rows():
+                acc = {}
+                for k, v in zip(columns, values):
+                    for c, w in zip(*other_rows[k]):
+                        acc[c] = acc.get(c, 0) + v * w
+                yield acc
+
+        s = self._empty(rows, other.shape.columns, promote(self._storage, other.dtype))
+        s._set_rows(product_rows())
+
+        return s
+
@@ -0,0 +1,205 @@
+"""Flat storage backends for the entries of a Matrix
+
+A matrix keeps its entries in a single flat, row-major sequence. The backend decides what that sequence is:
+
+ - 'list':  a plain python list, works with any dtype (the default)
+ - 'array': a contiguous typed array.array buffer, for float and int
+ - 'numpy': a 1-dimensional numpy ndarray, only available when numpy is installed
+
+Typed buffers store unboxed machine values, so a float matrix costs 8 bytes per entry instead of a pointer and a
+float object, and they can be handed to other code through the buffer protocol without copying.
+
+fromiter coerces every value to the dtype, wrap takes values already of the dtype and uses them as they are,
+without copying, whenever they are of the storage type already.
+"""
+from array import array
+from itertools import chain
+from numbers import Integral
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+TYPECODES = {float: 'd', int: 'q'}
+
+BACKENDS = ('list', 'array', 'numpy')
+
+
+def typecode(dtype):
+    """Get the array.array typecode used to store entries of type dtype"""
+    try:
+        return TYPECODES[dtype]
+    except KeyError:
+        raise ValueError('dtype {} can not be stored in a typed buffer'.format(dtype)) from None
+
+
+class ListStorage(object):
+    """Entries kept as python objects in a list, each coerced through dtype"""
+    name = 'list'
+
+    def __init__(self, dtype):
+        self.dtype = dtype
+
+    def fromiter(self, values):
+        dtype = self.dtype
+        return [dtype(v) for v in values]
+
+    def zeros(self, n):
+        return [self.dtype(0)] * n
+
+    def full(self, n, value):
+        return [self.dtype(value)] * n
+
+    @staticmethod
+    def wrap(values):
+        return values if type(values) is list else list(values)
+
+    def copy(self, data):
+        return list(data)
+
+    @staticmethod
+    def tolist(data):
+        return data if type(data) is list else list(data)
+
+    @staticmethod
+    def concat(parts):
+        return list(chain.from_iterable(parts))
+
+    def assign(self, data, index, values):
+        data[index] = [self.dtype(v) for v in values]
+
+    def buffer(self, data, rows, cols):
+        raise TypeError('list backed matrix does not expose a buffer, use backend="array" or backend="numpy"')
+
+
+class ArrayStorage(object):
+    """Entries kept unboxed in a contiguous array.array (or any memoryview with the same format)"""
+    name = 'array'
+
+    def __init__(self, dtype):
+        self.dtype = dtype
+        self.typecode = typecode(dtype)
+
+    def fromiter(self, values):
+        return array(self.typecode, values)
+
+    def zeros(self, n):
+        return array(self.typecode, bytes(n * array(self.typecode).itemsize))
+
+    def full(self, n, value):
+        return array(self.typecode, [value]) * n
+
+    def wrap(self, values):
+        if isinstance(values, array) and values.typecode == self.typecode:
+            return values
+        if isinstance(values, memoryview) and values.format == self.typecode:
+            return values
+        return array(self.typecode, values)
+
+    def copy(self, data):
+        return array(self.typecode, data)
+
+    @staticmethod
+    def tolist(data):
+        return data.tolist()
+
+    def concat(self, parts):
+        data = array(self.typecode)
+        for part in parts:
+            data.extend(part)
+        return data
+
+    def assign(self, data, index, values):
+        if not (isinstance(values, array) and values.typecode == self.typecode):
+            values = array(self.typecode, values)
+        data[index] = values
+
+    def buffer(self, data, rows, cols):
+        return memoryview(data).cast('B').cast(self.typecode, (rows, cols))
+
+
+class NumpyStorage(object):
+    """Entries kept in a 1-dimensional numpy ndarray"""
+    name = 'numpy'
+
+    def __init__(self, dtype):
+        if numpy is None:
+            raise ValueError('the numpy backend requires numpy to be installed')
+        self.dtype = dtype
+        self.typecode = typecode(dtype)
+
+    def fromiter(self, values):
+        return numpy.fromiter(values, dtype=self.typecode)
+
+    def zeros(self, n):
+        return numpy.zeros(n, dtype=self.typecode)
+
+    def full(self, n, value):
+        return numpy.full(n, value, dtype=self.typecode)
+
+    def wrap(self, values):
+        return numpy.asarray(values, dtype=self.typecode)
+
+    @staticmethod
+    def copy(data):
+        return numpy.array(data)
+
+    @staticmethod
+    def tolist(data):
+        return data.tolist()
+
+    def concat(self, parts):
+        return numpy.concatenate(parts) if parts else self.zeros(0)
+
+    @staticmethod
+    def assign(data, index, values):
+        data[index] = values if hasattr(values, '__len__') else list(values)
+
+    @staticmethod
+    def buffer(data, rows, cols):
+        return memoryview(data.reshape(rows, cols))
+
+
+_STORAGE_TYPES = {'list': ListStorage, 'array': ArrayStorage, 'numpy': NumpyStorage}
+
+
+def promote(storage, dtype):
+    """Get the storage able to hold the results of combining entries of storage with entries of type dtype
+
+    int entries combined with any non-integral number type take that type, float when the backend has no typecode
+    for it (Fractions in an 'array' matrix). The storage of every other dtype is kept.
+    """
+    if storage.dtype is not int or issubclass(dtype, Integral):
+        return storage
+    if issubclass(dtype, float) or (storage.name != 'list' and dtype not in TYPECODES):
+        dtype = float
+
+    return get_storage(storage.name, dtype)
+
+
+def get_storage(backend, dtype):
+    """Get the storage for a backend name
+
+    :param backend: one of 'list', 'array', 'numpy' or 'auto'. None selects 'list'.
+                    'auto' picks the fastest backend available for dtype.
+    :param dtype: type of the entries
+    :return: storage instance
+    """
+    if backend is None:
+        backend = 'list'
+    elif backend == 'auto':
+        if dtype not in TYPECODES:
+            backend = 'list'
+        elif numpy is not None:
+            backend = 'numpy'
+        else:
+            backend = 'array'
+
+    try:
+        storage_type = _STORAGE_TYPES[backend]
+    except KeyError:
+        raise ValueError('unknown matrix backend {!r}, expected one of {}'.format(backend, BACKENDS)) from None
+
+    return storage_type(dtype)
@@ -1,35 +1,239 @@
+import math
+from array import array
+from collections.abc import Sequence
+from itertools import repeat
+from numbers import Number, Real
+from operator import add, eq, mul, neg, sub, truediv
 
-class Vector(list):
+_sumprod = getattr(math, 'sumprod', None)
 
-    def __init__(self, elements):
-        super().__init__(elements)
+
+def _new(typecode, values):
+    """Get the storage of the given typecode holding values, a list for typecode None"""
+    return list(values) if typecode is None else array(typecode, values)
+
+
+def typecode_of(dtype):
+    """Get the Vector typecode of entries of type dtype: 'd' for floats, None (exact object storage) otherwise"""
+    return 'd' if dtype is float else None
+
+
+class Vector(Sequence):
+    """A 1-dimensional vector of numbers stored unboxed in a typed array
+
+      The entries are kept in an array.array of the given typecode ('d' for floats by default, 'q' for 64 bit
+      ints), so a vector costs 8 bytes per entry. Entries are converted to the typecode: with the default 'd'
+      ints become floats and Fractions are rounded. typecode=None keeps the entries as python objects in a list
+      instead, so ints, Fractions and other numbers stay exact.
+
+      Arithmetic runs as single passes over the entries straight into the result array. The in-place operators
+      and axpy compute the result into one temporary array and copy it back, so the vector keeps its storage.
+           v = Vector([1, 2, 3])
+           w = Vector(range(3), typecode='q')
+           f = Vector([Fraction(1, 3)], typecode=None)
+    """
+
+    __slots__ = ('_data',)
+
+    def __init__(self, elements, typecode='d'):
+        self._data = _new(typecode, elements)
+
+    @classmethod
+    def _wrap(cls, data):
+        v = cls.__new__(cls)
+        v._data = data
+        return v
+
+    @property
+    def typecode(self):
+        """Typecode of the array storage, None for entries kept as objects in a list"""
+        return getattr(self._data, 'typecode', None)
 
     @property
     def dimensions(self):
-        return len(self),
+        return len(self._data),
 
-    def __add__(self, other):
-        if isinstance(other, (int, float)):
-            return Vector([a + other for a in self])
+    def __len__(self):
+        return len(self._data)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return self._wrap(self._data[item])
+        return self._data[item]
+
+    def __setitem__(self, item, val):
+        if isinstance(item, slice):
+            val = _new(self.typecode, val)
+        self._data[item] = val
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __repr__(self):
+        return 'Vector({})'.format(list(self._data))
+
+    def __eq__(self, other):
+        if isinstance(other, Vector):
+            other = other._data
+            if type(other) is type(self._data):
+                return self._data == other
+        elif not isinstance(other, Sequence):
+            return NotImplemented
+        return len(self._data) == len(other) and all(map(eq, self._data, other))
+
+    def tolist(self):
+        return list(self._data)
+
+    def _operand(self, other, operation):
+        """Get the entries combined with this vector: a repeated number, or those of an equal length vector"""
+        if isinstance(other, Number):
+            return repeat(other)
         elif not isinstance(other, Vector):
-            raise TypeError('vector can only be added to a number (float or int), or another vector')
+            raise TypeError('vector can only be {} a number (float or int), or another vector'.format(operation))
+
+        if len(self._data) != len(other._data):
+            raise ValueError('can not combine vectors of different dimensions')
+        return other._data
+
+    def _typecode(self, other):
+        """Get the typecode able to hold the result of combining this vector with other
+
+        Object storage on either side gives object storage, real non-int numbers turn int arrays into 'd' arrays
+        and other numbers (complex, Decimal) need object storage.
+        """
+        code = self.typecode
+        if isinstance(other, Vector):
+            other_code = other.typecode
+        elif isinstance(other, Number) and not isinstance(other, int):
+            other_code = 'd' if isinstance(other, Real) else None
+        else:
+            other_code = code
+        if code is None or other_code is None:
+            return None
+
+        return 'd' if other_code == 'd' else code
+
+    def _combine(self, other, op, operation, reflected=False):
+        rhs = self._operand(other, operation)
+        lhs = self._data
+        if reflected:
+            lhs, rhs = rhs, lhs
 
-        if self.dimensions != other.dimensions:
-            raise ValueError('can not add vectors of different dimensions')
+        return self._wrap(_new(self._typecode(other), map(op, lhs, rhs)))
 
-        element_sums = [a + b for a, b in zip(self, other)]
+    def _combine_inplace(self, other, op, operation):
+        code = self.typecode
+        if self._typecode(other) != code:
+            raise TypeError('result of vector {} can not be stored in a vector of typecode {!r}'.format(
+                operation, code))
+        self._data[:] = _new(code, map(op, self._data, self._operand(other, operation)))
 
-        return Vector(element_sums)
+        return self
+
+    def __add__(self, other):
+        return self._combine(other, add, 'added to')
+
+    def __radd__(self, other):
+        return self._combine(other, add, 'added to', reflected=True)
+
+    def __iadd__(self, other):
+        return self._combine_inplace(other, add, 'added to')
+
+    def __sub__(self, other):
+        return self._combine(other, sub, 'subtracted by')
+
+    def __rsub__(self, other):
+        return self._combine(other, sub, 'subtracted from', reflected=True)
+
+    def __isub__(self, other):
+        return self._combine_inplace(other, sub, 'subtracted by')
 
     def __mul__(self, other):
-        if not isinstance(other, (int, float)):
+        if not isinstance(other, Number):
             raise TypeError('vector can only be multiplied by a number (float or int)')
-        element_prods = [other * e for e in self]
-
-        return Vector(element_prods)
+        return self._combine(other, mul, 'multiplied by')
 
     def __rmul__(self, other):
         return self * other
 
-    def dot(self, other):
-        return sum([a * b for a, b in zip(self, other)])
+    def __imul__(self, other):
+        if not isinstance(other, Number):
+            raise TypeError('vector can only be multiplied by a number (float or int)')
+        return self._combine_inplace(other, mul, 'multiplied by')
+
+    def __truediv__(self, other):
+        if not isinstance(other, Number):
+            raise TypeError('vector can only be divided by a number (float or int)')
+        code = self._typecode(other)
+        return self._wrap(_new(code and 'd', map(truediv, self._data, repeat(other))))
+
+    def __itruediv__(self, other):
+        if not isinstance(other, Number):
+            raise TypeError('vector can only be divided by a number (float or int)')
+        code = self.typecode
+        if code not in ('d', None) or self._typecode(other) != code:
+            raise TypeError('result of vector division can not be stored in a vector of typecode {!r}'.format(code))
+        self._data[:] = _new(code, map(truediv, self._data, repeat(other)))
+
+        return self
+
+    def __neg__(self):
+        return self._wrap(_new(self.typecode, map(neg, self._data)))
+
+    def __matmul__(self, other):
+        if isinstance(other, Vector):
+            return self.dot(other)
+        return NotImplemented
+
+    def dot(self, other, exact=False):
+        """Dot product with another sequence of the same length
+
+        :param other: sequence of numbers
+        :param exact: use math.fsum for a correctly rounded result instead of the fast path
+        :return: sum of the entrywise products
+        """
+        if len(other) != len(self._data):
+            raise ValueError('can not take the dot product of vectors of different dimensions')
+        if exact:
+            return math.fsum(map(mul, self._data, other))
+        if _sumprod is not None:
+            return _sumprod(self._data, other)
+        return sum(map(mul, self._data, other))
+
+    def norm(self, p=2):
+        """Vector p-norm, p is 1, 2 or math.inf
+
+        The 2-norm is the square root of the dot product with itself, a single pass without a temporary.
+        """
+        if p == 2:
+            return math.sqrt(self.dot(self._data))
+        elif p == 1:
+            return sum(map(abs, self._data))
+        elif p == math.inf:
+            return max(map(abs, self._data), default=0)
+
+        raise ValueError('unsupported norm order {}'.format(p))
+
+    def axpy(self, a, x):
+        """Update this vector in place to a*x + self
+
+        The result is computed into one temporary array and copied into the storage of this vector.
+
+        :param a: scalar factor
+        :param x: sequence of the same length
+        :return: this vector
+        """
+        if len(x) != len(self._data):
+            raise ValueError('can not combine vectors of different dimensions')
+        self._data[:] = _new(self.typecode, map(add, map(mul, repeat(a), x), self._data))
+
+        return self
+
+    def cross(self, other):
+        """Cross product of two 3-dimensional vectors"""
+        if len(self._data) != 3 or len(other) != 3:
+            raise ValueError('cross product is only defined for 3-dimensional vectors')
+        a0, a1, a2 = self._data
+        b0, b1, b2 = other
+
+        return self._wrap(_new(self._typecode(other), (a1 * b2 - a2 * b1, a2 * b0 - a0 * b2, a0 * b1 - a1 * b0)))
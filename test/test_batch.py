@@ -0,0 +1,91 @@
+import unittest
+from pymath import lu
+from pymath.batch import MatrixBatch
+from pymath.matrix import Matrix
+from test.util import assert_matrix_almost_equal
+
+
+def matrices(n, count):
+    return [Matrix([((k + 3) * (i + 1) * 7 + i * i) % 11 - 5 + (n if i % (n + 1) == 0 else 0)
+                    for i in range(n * n)], n, n) for k in range(count)]
+
+
+class TestMatrixBatch(unittest.TestCase):
+
+    def test_construction_and_indexing(self):
+        b = MatrixBatch([Matrix([[1, 2], [3, 4]]), [[5, 6], [7, 8]]])
+        self.assertEqual(2, len(b))
+        self.assertEqual((2, 2), b.shape)
+        self.assertEqual(Matrix([[5, 6], [7, 8]]), b[1])
+        b[0] = Matrix([[0, 0], [0, 1]])
+        self.assertEqual([Matrix([[0, 0], [0, 1]]), Matrix([[5, 6], [7, 8]])], list(b))
+
+    def test_construction_converts_to_batch_dtype_and_backend(self):
+        ints = [Matrix([[1, 2], [3, 4]], dtype=int, backend='array'), Matrix([[5, 6], [7, 8]], dtype=int)]
+        b = MatrixBatch(ints, backend='array')
+        self.assertIs(float, b.dtype)
+        self.assertEqual(Matrix([[5, 6], [7, 8]]), b[1])
+
+        b = MatrixBatch([Matrix([[1.0, 2.0]]), Matrix([[3.0, 4.0]])], dtype=int)
+        self.assertEqual([3, 4], list(b._data[2:]))
+        self.assertTrue(all(type(v) is int for v in b._data))
+
+    def test_matrices_must_have_same_shape(self):
+        with self.assertRaises(ValueError):
+            MatrixBatch([Matrix(2, 2), Matrix(3, 3)])
+
+    def test_default_created_batch_is_zero(self):
+        b = MatrixBatch(3, 2, 4, backend='array')
+        self.assertEqual(3, len(b))
+        self.assertEqual(Matrix(2, 4), b[2])
+
+    def test_batched_product_matches_matrix_product(self):
+        for n in (1, 2, 3, 4, 5):
+            a, c = matrices(n, 4), matrices(n, 4)[::-1]
+            product = MatrixBatch(a) @ MatrixBatch(c)
+            self.assertEqual([x @ y for x, y in zip(a, c)], list(product))
+
+    def test_product_with_a_single_matrix(self):
+        a = matrices(3, 3)
+        rhs = Matrix([[1, 2], [3, 4], [5, 6]])
+        self.assertEqual([x @ rhs for x in a], list(MatrixBatch(a) @ rhs))
+
+    def test_int_batch_times_fraction_matrix(self):
+        from fractions import Fraction
+        ints = [Matrix([[1, 2], [3, 4]], dtype=int), Matrix([[0, 1], [1, 0]], dtype=int)]
+        rhs = Matrix([[Fraction(1, 2)], [Fraction(1, 3)]], dtype=Fraction)
+        product = MatrixBatch(ints, dtype=int) @ rhs
+        self.assertIs(Fraction, product.dtype)
+        self.assertEqual([x @ rhs for x in ints], list(product))
+        square = Matrix([[Fraction(1, 2), 0], [0, Fraction(1, 3)]], dtype=Fraction)
+        self.assertEqual([x @ square for x in ints], list(MatrixBatch(ints, dtype=int) @ square))
+
+    def test_transpose(self):
+        b = MatrixBatch([Matrix([[1, 2, 3], [4, 5, 6]]), Matrix([[7, 8, 9], [10, 11, 12]])])
+        self.assertEqual([Matrix([[1, 4], [2, 5], [3, 6]]), Matrix([[7, 10], [8, 11], [9, 12]])], list(b.T))
+
+    def test_det(self):
+        for n in (2, 3, 4, 5):
+            a = matrices(n, 3)
+            for expected, actual in zip((lu.LUFactorization(x).det() for x in a), MatrixBatch(a).det()):
+                self.assertAlmostEqual(expected, actual)
+        self.assertEqual([0], MatrixBatch([Matrix(4, 4)]).det())
+
+    def test_inverse(self):
+        for n in (2, 3, 4):
+            a = matrices(n, 3)
+            for x, inv in zip(a, MatrixBatch(a).inv()):
+                assert_matrix_almost_equal(self, Matrix.identity(n), x @ inv, places=7)
+
+    def test_singular_matrix_is_reported(self):
+        b = MatrixBatch([Matrix.identity(3), Matrix(3, 3)])
+        with self.assertRaisesRegex(ValueError, 'matrix 1'):
+            b.inv()
+        with self.assertRaisesRegex(ValueError, 'matrix 1'):
+            b.solve(Matrix(3, 1))
+
+    def test_solve(self):
+        a = matrices(3, 4)
+        rhs = MatrixBatch([Matrix([[1, 0], [k, 1], [2, k]]) for k in range(4)])
+        for x, b, solution in zip(a, rhs, MatrixBatch(a).solve(rhs)):
+            assert_matrix_almost_equal(self, b, x @ solution, places=7)
@@ -0,0 +1,124 @@
+import unittest
+from pymath import decomp, lu
+from pymath.matrix import Matrix
+from test.util import assert_matrix_almost_equal
+
+
+class TestSolveTriangular(unittest.TestCase):
+
+    def setUp(self):
+        self.L = Matrix([[2, 0, 0],
+                         [1, 3, 0],
+                         [-1, 2, 4]])
+        self.B = Matrix([[2, 4], [7, 1], [3, 0]])
+
+    def test_lower(self):
+        X = decomp.solve_triangular(self.L, self.B)
+        assert_matrix_almost_equal(self, self.B, self.L @ X)
+
+    def test_upper(self):
+        U = self.L.T
+        X = decomp.solve_triangular(U, self.B, lower=False)
+        assert_matrix_almost_equal(self, self.B, U @ X)
+
+    def test_only_the_triangle_is_read(self):
+        full = Matrix([[2, 9, 9], [1, 3, 9], [-1, 2, 4]])
+        self.assertEqual(decomp.solve_triangular(self.L, self.B), decomp.solve_triangular(full, self.B))
+
+    def test_unit_diagonal_with_packed_lu_factors(self):
+        A = Matrix.random(5, 5, -1, 1, seed=3)
+        B = Matrix.random(5, 2, -1, 1, seed=4)
+        LU, piv = lu.lu_factor(A)
+        PB = Matrix([B[p] for p in piv])
+        Y = decomp.solve_triangular(LU, PB, unit_diagonal=True)
+        X = decomp.solve_triangular(LU, Y, lower=False)
+        assert_matrix_almost_equal(self, B, A @ X)
+
+    def test_singular_and_mismatched(self):
+        with self.assertRaises(ValueError):
+            decomp.solve_triangular(Matrix([[1, 0], [1, 0]]), Matrix([[1], [1]]))
+        with self.assertRaises(ValueError):
+            decomp.solve_triangular(self.L, Matrix(2, 1))
+
+
+class TestCholesky(unittest.TestCase):
+
+    def setUp(self):
+        M = Matrix.random(6, 6, -1, 1, seed=1)
+        self.A = M @ M.T + Matrix.identity(6)
+        self.B = Matrix.random(6, 3, -1, 1, seed=2)
+
+    def test_factor_reproduces_matrix(self):
+        L = decomp.cholesky(self.A)
+        assert_matrix_almost_equal(self, self.A, L @ L.T)
+        for r in range(6):
+            self.assertGreater(L[r, r], 0)
+            for c in range(r + 1, 6):
+                self.assertEqual(0, L[r, c])
+
+    def test_solve(self):
+        X = decomp.cholesky_solve(self.A, self.B)
+        assert_matrix_almost_equal(self, self.B, self.A @ X)
+        f = decomp.CholeskyFactorization(self.A)
+        for x, e in zip(f.solve_vector(self.B.column(0)), X.column(0)):
+            self.assertAlmostEqual(e, x)
+
+    def test_det_matches_lu(self):
+        f = decomp.CholeskyFactorization(self.A)
+        self.assertAlmostEqual(lu.LUFactorization(self.A).det(), f.det())
+
+    def test_integer_matrix(self):
+        L = decomp.cholesky(Matrix([[4, 2], [2, 5]], dtype=int, backend='array'))
+        self.assertEqual(Matrix([[2, 0], [1, 2]]), L)
+        self.assertIs(float, L.dtype)
+        self.assertEqual('array', L.backend)
+
+    def test_not_positive_definite(self):
+        with self.assertRaises(ValueError):
+            decomp.cholesky(Matrix([[1, 2], [2, 1]]))
+        with self.assertRaises(ValueError):
+            decomp.cholesky(Matrix(2, 3))
+
+
+class TestQR(unittest.TestCase):
+
+    def setUp(self):
+        self.A = Matrix.random(8, 3, -1, 1, seed=5)
+
+    def test_factors(self):
+        Q, R = decomp.qr(self.A)
+        self.assertEqual((8, 3), Q.shape)
+        self.assertEqual((3, 3), R.shape)
+        assert_matrix_almost_equal(self, self.A, Q @ R)
+        assert_matrix_almost_equal(self, Matrix.identity(3), Q.T @ Q)
+        for r in range(3):
+            for c in range(r):
+                self.assertEqual(0, R[r, c])
+
+    def test_square_system(self):
+        A = Matrix.random(4, 4, -1, 1, seed=6)
+        B = Matrix.random(4, 2, -1, 1, seed=7)
+        assert_matrix_almost_equal(self, B, A @ decomp.lstsq(A, B))
+
+    def test_least_squares_residual_is_orthogonal_to_columns(self):
+        B = Matrix.random(8, 2, -1, 1, seed=8)
+        X = decomp.lstsq(self.A, B)
+        self.assertEqual((3, 2), X.shape)
+        assert_matrix_almost_equal(self, Matrix(3, 2), self.A.T @ (self.A @ X - B))
+
+    def test_exact_fit(self):
+        A = Matrix([[1, 0], [1, 1], [1, 2]])
+        X = decomp.lstsq(A, Matrix([[1], [3], [5]]))
+        assert_matrix_almost_equal(self, Matrix([[1], [2]]), X)
+
+    def test_rank_deficient_and_underdetermined(self):
+        f = decomp.QRFactorization(Matrix([[1, 2], [2, 4], [3, 6]]))
+        self.assertEqual(1, f.rank())
+        with self.assertRaises(ValueError):
+            f.solve(Matrix(3, 1))
+        with self.assertRaises(ValueError):
+            decomp.qr(Matrix(2, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+from fractions import Fraction
+from pymath import exact, lu
+from pymath.matrix import Matrix
+
+
+def hilbert(n):
+    return Matrix([[Fraction(1, r + c + 1) for c in range(n)] for r in range(n)], dtype=Fraction)
+
+
+class TestBareiss(unittest.TestCase):
+
+    def setUp(self):
+        self.A = Matrix([[3, 1, -2, 7],
+                         [4, -5, 2, 0],
+                         [1, 9, 8, -3],
+                         [6, 2, -1, 5]], dtype=int)
+        self.B = Matrix([[1, 0], [2, 1], [-3, 4], [5, 2]], dtype=int)
+
+    def test_det(self):
+        d = exact.det(self.A)
+        self.assertIsInstance(d, int)
+        self.assertEqual(round(lu.LUFactorization(self.A).det()), d)
+        self.assertEqual(0, exact.det(Matrix([[1, 2, 3], [4, 5, 6], [7, 8, 9]], dtype=int)))
+        self.assertEqual(-1, exact.det(Matrix([[0, 1], [1, 1]], dtype=int)))
+
+    def test_det_of_rational_matrix(self):
+        self.assertEqual(Fraction(1, 2160), exact.det(hilbert(3)))
+        self.assertEqual(Fraction(3, 2), exact.det(Matrix([[0.5, 1], [-1, 1]])))
+
+    def test_rank(self):
+        self.assertEqual(4, exact.rank(self.A))
+        self.assertEqual(2, exact.rank(Matrix([[1, 2, 3], [2, 4, 6], [1, 0, 1], [0, 2, 2]], dtype=int)))
+        self.assertEqual(1, exact.rank(Matrix([[0, 0, 5], [0, 0, 10]], dtype=int)))
+        self.assertEqual(0, exact.rank(Matrix(2, 2, dtype=int)))
+
+    def test_solve_has_single_denominator(self):
+        N, d = exact.solve_fraction_free(self.A, self.B)
+        self.assertEqual(abs(d), abs(exact.det(self.A)))
+        self.assertEqual(self.A @ N, self.B * d)
+
+        X = exact.solve(self.A, self.B)
+        self.assertIs(Fraction, X.dtype)
+        self.assertEqual(Matrix(self.B, dtype=Fraction), self.A @ X)
+
+    def test_solve_rational_system(self):
+        H = hilbert(6)
+        b = Matrix([[1]] * 6, dtype=Fraction)
+        X = exact.solve(H, b)
+        self.assertEqual(b, H @ X)
+        self.assertEqual(X, lu.solve(H, b))
+
+    def test_singular_and_non_square(self):
+        with self.assertRaises(ValueError):
+            exact.solve(Matrix([[1, 2], [2, 4]], dtype=int), Matrix([[1], [1]], dtype=int))
+        with self.assertRaises(ValueError):
+            exact.det(Matrix(2, 3, dtype=int))
+
+
+class TestMultimodular(unittest.TestCase):
+
+    def setUp(self):
+        self.A = Matrix.random(12, 12, -10 ** 12, 10 ** 12, dtype=int, seed=7)
+        self.B = Matrix.random(12, 3, -10 ** 6, 10 ** 6, dtype=int, seed=8)
+
+    def test_matches_bareiss(self):
+        self.assertEqual(exact.det(self.A), exact.det_modular(self.A))
+        self.assertEqual(exact.solve(self.A, self.B), exact.solve_modular(self.A, self.B))
+        self.assertEqual(exact.det(hilbert(5)), exact.det_modular(hilbert(5)))
+
+    def test_singular(self):
+        S = Matrix([[1, 2, 3], [4, 5, 6], [7, 8, 9]], dtype=int)
+        self.assertEqual(0, exact.det_modular(S))
+        with self.assertRaises(ValueError):
+            exact.solve_modular(S, Matrix([[1], [2], [3]], dtype=int))
+
+    def test_modular_image(self):
+        p = 101
+        d, numerators = exact.modular_image([[2, 1, 3], [1, 3, 4]], 2, p)
+        self.assertEqual(5, d)
+        self.assertEqual([[5], [5]], numerators)
+        self.assertEqual((0, None), exact.modular_image([[p, 0], [0, 1]], 2, p))
+
+    def test_moduli_are_decreasing_primes(self):
+        from pymath.prime import is_prime
+        moduli = exact.moduli()
+        primes = [next(moduli) for _ in range(3)]
+        self.assertTrue(all(is_prime(p) and p < 1 << exact.MODULUS_BITS for p in primes))
+        self.assertEqual(sorted(primes, reverse=True), primes)
+
+
+class TestExactLU(unittest.TestCase):
+
+    def test_tiny_fraction_pivots_are_not_singular(self):
+        A = Matrix([[Fraction(1, 10 ** 20), 0], [0, Fraction(1, 10 ** 20)]], dtype=Fraction)
+        X = lu.solve(A, Matrix([[1], [1]], dtype=Fraction))
+        self.assertEqual(Matrix([[10 ** 20], [10 ** 20]], dtype=Fraction), X)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import os
+import struct
+import tempfile
+import unittest
+from pymath import fileformat
+from pymath.matrix import Matrix
+
+
+class TestNativeFormat(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'a.mat')
+        self.a = Matrix([[4, 3, 2], [1, 5, 7]])
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_header_holds_shape_dtype_and_byte_order(self):
+        self.a.save(self.path)
+        with open(self.path, 'rb') as f:
+            header = f.read(32)
+            entries = f.read()
+        self.assertEqual(b'PYMATRIX', header[:8])
+        self.assertEqual(b'<d', header[9:11])
+        self.assertEqual((2, 3), struct.unpack('<QQ', header[16:]))
+        self.assertEqual([4, 3, 2, 1, 5, 7], list(struct.unpack('<6d', entries)))
+
+    def test_round_trip(self):
+        for backend in ('list', 'array'):
+            m = Matrix(self.a, backend=backend)
+            m.save(self.path)
+            for mmap in (True, False):
+                b = Matrix.load(self.path, mmap=mmap)
+                self.assertEqual(self.a, b)
+                self.assertIs(float, b.dtype)
+
+    def test_int_matrix_keeps_dtype(self):
+        m = Matrix([[1, -2], [3, 2 ** 40]], dtype=int)
+        m.save(self.path)
+        b = Matrix.load(self.path, backend='list')
+        self.assertIs(int, b.dtype)
+        self.assertEqual(m, b)
+
+    def test_mapped_matrix_is_backed_by_the_file(self):
+        self.a.save(self.path)
+        b = Matrix.load(self.path)
+        self.assertIsInstance(b._data, memoryview)
+        self.assertEqual(Matrix([[29, 33], [33, 75]]), b @ b.T)
+        with self.assertRaises(TypeError):
+            b[0, 0] = 1
+
+    def test_write_through_mapping(self):
+        self.a.save(self.path)
+        b = Matrix.load(self.path, mode='r+')
+        b[1, 2] = 9
+        del b
+        self.assertEqual(9, Matrix.load(self.path)[1, 2])
+
+    def test_copy_on_write_mapping_leaves_file_unchanged(self):
+        self.a.save(self.path)
+        b = Matrix.load(self.path, mode='c')
+        b[1, 2] = 9
+        self.assertEqual(9, b[1, 2])
+        self.assertEqual(7, Matrix.load(self.path)[1, 2])
+
+    def test_rejects_other_files(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not a matrix file at all, really')
+        with self.assertRaises(ValueError):
+            Matrix.load(self.path)
+
+    def test_rejects_truncated_file(self):
+        self.a.save(self.path)
+        with open(self.path, 'r+b') as f:
+            f.truncate(40)
+        with self.assertRaises(ValueError):
+            Matrix.load(self.path)
+
+
+class TestNpyFormat(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'a.npy')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_writes_version_1_header(self):
+        Matrix([[1, 2, 3]]).save(self.path)
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        self.assertEqual(b'\x93NUMPY\x01\x00', data[:8])
+        header_size = struct.unpack('<H', data[8:10])[0]
+        self.assertEqual(0, (10 + header_size) % 64)
+        self.assertIn(b"'descr': '<f8'", data[10: 10 + header_size])
+        self.assertIn(b"'shape': (1, 3)", data[10: 10 + header_size])
+        self.assertEqual(10 + header_size + 3 * 8, len(data))
+
+    def test_round_trip(self):
+        m = Matrix([[1, 2], [3, 4], [5, 6]], dtype=int)
+        m.save(self.path)
+        for mmap in (True, False):
+            b = Matrix.load(self.path, mmap=mmap)
+            self.assertIs(int, b.dtype)
+            self.assertEqual(m, b)
+
+    def test_reads_big_endian_entries(self):
+        header = "{'descr': '>f8', 'fortran_order': False, 'shape': (2, 2), }"
+        with open(self.path, 'wb') as f:
+            f.write(b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header.encode())
+            f.write(struct.pack('>4d', 1, 2, 3, 4))
+        self.assertEqual(Matrix([[1, 2], [3, 4]]), Matrix.load(self.path))
+
+    def test_rejects_unsupported_arrays(self):
+        for descr, order, shape in (('<f4', False, (2, 2)), ('<f8', True, (2, 2)), ('<f8', False, (4,))):
+            header = "{{'descr': '{}', 'fortran_order': {}, 'shape': {}, }}".format(descr, order, shape)
+            with open(self.path, 'wb') as f:
+                f.write(b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header.encode() + bytes(32))
+            with self.assertRaises(ValueError):
+                fileformat.load(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import json
+import os
+import pstats
+import tempfile
+import unittest
+from pymath import instrument, lu, prime
+from pymath.matrix import Matrix
+
+
+class TestCollector(unittest.TestCase):
+
+    def setUp(self):
+        self.a = Matrix([[4, 3], [6, 3]])
+
+    def test_nothing_is_recorded_without_active_collector(self):
+        stats = instrument.collect()
+        self.a @ self.a
+        self.assertEqual({}, stats.as_dict())
+
+    def test_records_calls_times_and_shapes(self):
+        with instrument.collect() as stats:
+            self.a @ self.a
+            self.a @ Matrix(2, 3)
+            prime.factors(360)
+        matmul = stats['matrix.matmul']
+        self.assertEqual(2, matmul.calls)
+        self.assertGreater(matmul.seconds, 0)
+        self.assertLessEqual(matmul.max_seconds, matmul.seconds)
+        self.assertEqual({'2x2,2x2': 1, '2x2,2x3': 1}, dict(matmul.shapes))
+        self.assertEqual({'bits=9': 1}, dict(stats['prime.factors'].shapes))
+
+    def test_nested_operations_and_collectors(self):
+        with instrument.collect() as outer:
+            with instrument.collect() as inner:
+                lu.solve(self.a, Matrix([[1], [2]]))
+            self.a @ self.a
+        self.assertEqual(1, inner['lu.solve'].calls)
+        self.assertEqual(1, inner['lu.lu_factor'].calls)
+        self.assertNotIn('matrix.matmul', inner.operations)
+        self.assertEqual(1, outer['lu.solve'].calls)
+        self.assertEqual(1, outer['matrix.matmul'].calls)
+
+    def test_generators_are_timed_until_exhausted(self):
+        with instrument.collect() as stats:
+            primes = prime.primes_range(0, 100)
+            self.assertNotIn('prime.primes_range', stats.operations)
+            self.assertEqual(25, len(list(primes)))
+        self.assertEqual(1, stats['prime.primes_range'].calls)
+
+    def test_collector_as_decorator(self):
+        stats = instrument.collect()
+
+        @stats
+        def work():
+            return prime.factors(12)
+
+        work()
+        work()
+        prime.factors(12)
+        self.assertEqual(2, stats['prime.factors'].calls)
+
+    def test_enable_and_disable(self):
+        instrument.default.reset()
+        instrument.enable()
+        try:
+            prime.primes(10)
+        finally:
+            instrument.disable()
+        prime.primes(10)
+        self.assertEqual(1, instrument.default['prime.primes'].calls)
+
+    def test_export(self):
+        with instrument.collect() as stats:
+            self.a + self.a
+        exported = json.loads(stats.to_json())
+        self.assertEqual(1, exported['matrix.elementwise']['calls'])
+        self.assertEqual({'2x2,2x2': 1}, exported['matrix.elementwise']['shapes'])
+
+        text = stats.to_prometheus()
+        self.assertIn('# TYPE pymath_operation_calls_total counter\n', text)
+        self.assertIn('pymath_operation_calls_total{operation="matrix.elementwise"} 1\n', text)
+        self.assertIn('pymath_operation_shape_calls_total{operation="matrix.elementwise",shape="2x2,2x2"} 1\n', text)
+
+
+class TestProfile(unittest.TestCase):
+
+    def test_writes_pstats_dump(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'factors.prof')
+            with instrument.profile(path):
+                prime.factors(2 ** 64 - 1)
+            stats = pstats.Stats(path)
+            self.assertTrue(any(func[2] == 'pollard_brent' for func in stats.stats))
+
+
+if __name__ == '__main__':
+    unittest.main()
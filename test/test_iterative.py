@@ -0,0 +1,116 @@
+import unittest
+from pymath import iterative
+from pymath.matrix import Matrix
+from pymath.sparse import SparseMatrix
+
+
+def laplacian(n):
+    """Sparse 1-D diffusion matrix tridiag(-1, 2, -1), symmetric positive definite"""
+    entries = [(i, i, 2.0) for i in range(n)]
+    entries += [(i, i + 1, -1.0) for i in range(n - 1)] + [(i + 1, i, -1.0) for i in range(n - 1)]
+    return SparseMatrix(n, n, entries)
+
+
+def dominant(n):
+    """Dense non-symmetric, strictly diagonally dominant matrix"""
+    return Matrix([[4.0 if r == c else (1.0 if c == r + 1 else 0.5 if c == r - 2 else 0.0) for c in range(n)]
+                   for r in range(n)])
+
+
+class TestSolvers(unittest.TestCase):
+
+    def assertSolves(self, A, b, result, places=6):
+        self.assertTrue(result.converged)
+        self.assertLess(result.residuals[-1], 1e-8)
+        self.assertEqual(result.iterations + 1, len(result.residuals))
+        for expected, actual in zip(b, A.matvec(result.x)):
+            self.assertAlmostEqual(expected, actual, places=places)
+
+    def test_cg(self):
+        A = laplacian(50)
+        b = [1.0] * 50
+        result = iterative.cg(A, b)
+        self.assertSolves(A, b, result)
+        self.assertLessEqual(result.iterations, 50)
+
+    def test_preconditioners_reduce_iterations(self):
+        A = laplacian(60) + SparseMatrix(60, 60, [(i, i, float(i)) for i in range(60)])
+        b = [float(i % 7) for i in range(60)]
+        plain = iterative.cg(A, b)
+        jacobi = iterative.cg(A, b, M=iterative.DiagonalPreconditioner(A))
+        ilu = iterative.cg(A, b, M=iterative.ILUPreconditioner(A))
+        self.assertSolves(A, b, jacobi)
+        self.assertSolves(A, b, ilu)
+        self.assertLess(jacobi.iterations, plain.iterations)
+        self.assertLess(ilu.iterations, jacobi.iterations)
+
+    def test_ilu_of_tridiagonal_matrix_is_exact(self):
+        A = laplacian(20)
+        M = iterative.ILUPreconditioner(A)
+        b = [float(i) for i in range(20)]
+        for expected, actual in zip(b, A.matvec(M.matvec(b))):
+            self.assertAlmostEqual(expected, actual)
+
+    def test_gmres(self):
+        A = dominant(30)
+        b = [float(i) for i in range(30)]
+        self.assertSolves(A, b, iterative.gmres(A, b))
+        self.assertSolves(A, b, iterative.gmres(A, b, restart=3))
+        self.assertSolves(A, b, iterative.gmres(A, b, M=iterative.ILUPreconditioner(A)))
+
+    def test_gmres_on_singular_systems(self):
+        A = Matrix([[1, 0], [0, 0]])
+        consistent = iterative.gmres(A, [1, 0])
+        self.assertSolves(A, [1, 0], consistent)
+
+        for A, b in ((A, [1, 1]), (A, [0, 1]), (Matrix(2, 2), [1, 1])):
+            result = iterative.gmres(A, b)
+            self.assertFalse(result.converged)
+            residual = [bi - v for bi, v in zip(b, A.matvec(result.x))]
+            self.assertAlmostEqual(sum(v * v for v in residual) ** 0.5 / sum(v * v for v in b) ** 0.5,
+                                   result.residuals[-1])
+            self.assertLess(max(map(abs, result.x)), 10)
+
+    def test_stationary_methods(self):
+        A = dominant(20)
+        b = [1.0] * 20
+        self.assertSolves(A, b, iterative.jacobi(A, b))
+        gs = iterative.gauss_seidel(A, b)
+        self.assertSolves(A, b, gs)
+        self.assertLess(gs.iterations, iterative.jacobi(A, b).iterations)
+        self.assertSolves(A, b, iterative.gauss_seidel(A, b, omega=1.1))
+
+    def test_matrix_free_operator(self):
+        n = 40
+        A = laplacian(n)
+        op = iterative.LinearOperator(A.matvec, (n, n), diagonal=lambda: [2.0] * n)
+        b = [1.0] * n
+        self.assertSolves(A, b, iterative.cg(op, b))
+        self.assertSolves(A, b, iterative.cg(A.matvec, b))
+        self.assertSolves(A, b, iterative.jacobi(op, b, maxiter=20000))
+        with self.assertRaises(TypeError):
+            iterative.jacobi(A.matvec, b)
+
+    def test_callback_and_maxiter(self):
+        A = laplacian(30)
+        b = [1.0] * 30
+        history = []
+        result = iterative.cg(A, b, maxiter=3, callback=lambda i, r: history.append((i, r)))
+        self.assertFalse(result.converged)
+        self.assertEqual(3, result.iterations)
+        self.assertEqual([1, 2, 3], [i for i, _ in history])
+        self.assertEqual(result.residuals[1:], [r for _, r in history])
+
+    def test_initial_guess(self):
+        A = laplacian(10)
+        b = [1.0] * 10
+        x = iterative.cg(A, b).x
+        result = iterative.gmres(A, b, x0=x)
+        self.assertEqual(0, result.iterations)
+        self.assertTrue(result.converged)
+        with self.assertRaises(ValueError):
+            iterative.cg(A, b, x0=[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
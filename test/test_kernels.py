@@ -0,0 +1,64 @@
+import unittest
+from unittest import mock
+from pymath import kernels
+from pymath.matrix import Matrix
+
+
+def reference_product(a, b, n, k, m):
+    return [sum(a[i * k + p] * b[p * m + j] for p in range(k)) for i in range(n) for j in range(m)]
+
+
+class TestMatmulKernels(unittest.TestCase):
+
+    def setUp(self):
+        self.n, self.k, self.m = 5, 7, 3
+        self.a = [(3 * i) % 11 - 5 for i in range(self.n * self.k)]
+        self.b = [(7 * i) % 13 - 6 for i in range(self.k * self.m)]
+        self.expected = reference_product(self.a, self.b, self.n, self.k, self.m)
+
+    def test_columns(self):
+        self.assertEqual([[1, 3, 5], [2, 4, 6]], kernels.columns([1, 2, 3, 4, 5, 6], 3, 2))
+
+    def test_matmul(self):
+        self.assertEqual(self.expected, kernels.matmul(self.a, self.b, self.n, self.k, self.m))
+
+    def test_matmul_blocked_with_partial_tiles(self):
+        for block in (1, 2, 3, 64):
+            product = kernels.matmul_blocked(self.a, self.b, self.n, self.k, self.m, block)
+            self.assertEqual(self.expected, product, 'block size {}'.format(block))
+
+    def test_strassen_with_padding(self):
+        for cutoff in (1, 2, 4):
+            product = kernels.strassen(self.a, self.b, self.n, self.k, self.m, cutoff)
+            self.assertEqual(self.expected, product, 'cutoff {}'.format(cutoff))
+
+    def test_strassen_square_power_of_two(self):
+        n = 8
+        a = [(5 * i) % 7 - 3 for i in range(n * n)]
+        b = [(3 * i) % 5 - 2 for i in range(n * n)]
+        self.assertEqual(reference_product(a, b, n, n, n), kernels.strassen(a, b, n, n, n, 2))
+
+    def test_strassen_size(self):
+        self.assertEqual(64, kernels.strassen_size(64, 64))
+        self.assertEqual(200, kernels.strassen_size(200, 128))
+        self.assertEqual(68, kernels.strassen_size(65, 32))
+        self.assertEqual(8, kernels.strassen_size(5, 1))
+
+    def test_unbounded_int_products_stay_off_numpy(self):
+        with mock.patch.object(kernels, 'numpy', object()):
+            self.assertEqual('numpy', kernels.choose_matmul(64, 64, 64, float))
+            self.assertEqual('numpy', kernels.choose_matmul(64, 64, 64, int, typed=True))
+            self.assertNotEqual('numpy', kernels.choose_matmul(64, 64, 64, int))
+
+        n = 40
+        a = Matrix([(2 ** 40 + i) for i in range(n * n)], n, n, dtype=int)
+        expected = reference_product(a._data, a._data, n, n, n)
+        self.assertGreater(max(expected), 2 ** 63)
+        self.assertEqual(expected, list((a @ a)._data))
+        self.assertEqual(expected, list(a.matmul(a, 'auto')._data))
+
+    @unittest.skipIf(kernels.numpy is not None, 'large products are handed to numpy')
+    def test_automatic_algorithm_choice(self):
+        self.assertEqual('naive', kernels.choose_matmul(10, 10, 10, float))
+        self.assertEqual('strassen', kernels.choose_matmul(512, 512, 512, float))
+        self.assertEqual('naive', kernels.choose_matmul(512, 512, 1, float))
@@ -0,0 +1,68 @@
+import unittest
+from pymath.lazy import Elementwise, Leaf, Product, chain_order, lazy
+from pymath.matrix import Matrix
+from test.util import assert_matrix_almost_equal
+
+
+class TestLazy(unittest.TestCase):
+
+    def setUp(self):
+        self.a = Matrix.random(4, 5, -1, 1, seed=1)
+        self.b = Matrix.random(5, 3, -1, 1, seed=2)
+        self.c = Matrix.random(4, 3, -1, 1, seed=3)
+        self.d = Matrix.random(4, 3, -1, 1, seed=4)
+
+    def test_operators_build_expression(self):
+        e = self.a.lazy() @ self.b + lazy(self.c) * 2 - self.d
+        self.assertIsInstance(e, Elementwise)
+        self.assertEqual((4, 3), e.shape)
+        self.assertEqual('(((Matrix(4x5) @ Matrix(5x3)) + (Matrix(4x3) * 2)) - Matrix(4x3))', repr(e))
+        assert_matrix_almost_equal(self, self.a @ self.b + self.c * 2 - self.d, e.evaluate(), places=12)
+
+    def test_reflected_and_unary_operations(self):
+        e = 1 - lazy(self.c) / 2 + -lazy(self.d) + 3 * lazy(self.c)
+        assert_matrix_almost_equal(self, 1 - self.c / 2 + -self.d + 3 * self.c, e.evaluate(), places=12)
+        assert_matrix_almost_equal(self, 2 / self.c, (2 / lazy(self.c)).evaluate(), places=12)
+
+    def test_broadcasting(self):
+        row = Matrix.random(1, 3, -1, 1, seed=5)
+        self.assertEqual(self.c + row, (lazy(self.c) + row).evaluate())
+        self.assertEqual(row - self.c, (row - lazy(self.c)).evaluate())
+
+    def test_int_matrices_keep_dtype_unless_divided(self):
+        m = Matrix([[1, 2], [3, 4]], dtype=int)
+        self.assertIs(int, (lazy(m) * 3 + m).evaluate().dtype)
+        self.assertEqual(Matrix([[4, 8], [12, 16]], dtype=int), (lazy(m) * 3 + m).evaluate())
+        self.assertIs(float, (lazy(m) / 2).evaluate().dtype)
+        self.assertIs(float, (lazy(m) + 0.5).evaluate().dtype)
+
+    def test_scalars_are_folded_into_products(self):
+        e = (2 * self.a.lazy()) @ (lazy(self.b) / 4) * 3
+        self.assertIsInstance(e, Product)
+        self.assertEqual(1.5, e.scale)
+        self.assertTrue(all(isinstance(f, Leaf) for f in e.factors))
+        assert_matrix_almost_equal(self, (self.a @ self.b) * 1.5, e.evaluate(), places=12)
+        self.assertEqual(-1, (-(self.a.lazy() @ self.b)).scale)
+
+    def test_product_chains_are_flattened(self):
+        x = Matrix.random(3, 2, -1, 1, seed=6)
+        e = self.a.lazy() @ (lazy(self.b) @ x) @ x.T
+        self.assertEqual(4, len(e.factors))
+        assert_matrix_almost_equal(self, self.a @ self.b @ x @ x.T, e.evaluate(), places=12)
+        assert_matrix_almost_equal(self, self.a @ self.b, (self.a.lazy() * self.b).evaluate(), places=12)
+
+    def test_chain_order(self):
+        # 10x100 @ 100x5 @ 5x50 is cheapest as (AB)C
+        self.assertEqual(1, chain_order([10, 100, 5, 50])[0][2])
+        # 50x5 @ 5x100 @ 100x10 is cheapest as A(BC)
+        self.assertEqual(0, chain_order([50, 5, 100, 10])[0][2])
+
+    def test_shapes_are_checked_when_building(self):
+        with self.assertRaises(ValueError):
+            self.a.lazy() @ self.a
+        with self.assertRaises(ValueError):
+            lazy(self.a) + self.b
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+from fractions import Fraction
+from pymath import lu
+from pymath.matrix import Matrix
+from test.util import assert_matrix_almost_equal
+
+
+class TestLUFactor(unittest.TestCase):
+
+    def setUp(self):
+        self.A = Matrix([[0, 1, 0],
+                         [-8, 8, 1],
+                         [2, -2, 0]])
+
+    def test_pivots_are_an_index_vector(self):
+        LU, piv = lu.lu_factor(self.A)
+        self.assertEqual([0, 1, 2], sorted(piv))
+        self.assertEqual(1, piv[0], 'largest entry of first column is not the first pivot')
+
+    def test_packed_factors_reproduce_permuted_matrix(self):
+        P, L, U = lu.lu(self.A)
+        assert_matrix_almost_equal(self, P @ self.A, L @ U)
+        for r in range(3):
+            self.assertEqual(1, L[r, r])
+            for c in range(r + 1, 3):
+                self.assertEqual(0, L[r, c])
+                self.assertEqual(0, U[c, r])
+
+    def test_input_is_left_unchanged_by_default(self):
+        original = Matrix(self.A)
+        lu.lu_factor(self.A)
+        self.assertEqual(original, self.A)
+
+    def test_overwrite_reuses_storage(self):
+        LU, piv = lu.lu_factor(self.A, overwrite=True)
+        self.assertIs(self.A, LU)
+
+    def test_integer_matrix_is_never_overwritten(self):
+        A = Matrix([[2, 1], [1, 3]], dtype=int)
+        LU, piv = lu.lu_factor(A, overwrite=True)
+        self.assertIsNot(A, LU)
+        self.assertEqual(Matrix([[2, 1], [1, 3]]), A)
+
+    def test_singular_matrix(self):
+        with self.assertRaises(ValueError):
+            lu.lu_factor(Matrix([[1, 2], [2, 4]]))
+
+    def test_non_square_matrix(self):
+        with self.assertRaises(ValueError):
+            lu.lu_factor(Matrix(2, 3))
+
+    def test_exact_factorization_of_fractions(self):
+        A = Matrix([[1, 2], [3, 4]], dtype=Fraction)
+        P, L, U = lu.lu(A)
+        self.assertEqual(P @ A, L @ U)
+
+
+class TestSolve(unittest.TestCase):
+
+    def test_solution_satisfies_system(self):
+        A = Matrix([[0, 1, 0], [-8, 8, 1], [2, -2, 0]])
+        B = Matrix([[1, 2], [2, 3], [4, 0.5]])
+        X = lu.solve(A, B)
+        assert_matrix_almost_equal(self, B, A @ X)
+        assert_matrix_almost_equal(self, Matrix([[3, 2.25], [1, 2], [18, 5]]), X)
+
+    def test_lu_solve_reuses_factorization(self):
+        A = Matrix([[4, 3, 2], [2, 1, 3], [3, 2, 1]], backend='array')
+        factor = lu.lu_factor(A)
+        for B in (Matrix([[1], [2], [3]]), Matrix([[1, 0, 0], [0, 1, 0], [0, 0, 1]])):
+            assert_matrix_almost_equal(self, B, A @ lu.lu_solve(factor, B))
+
+    def test_right_hand_side_must_match(self):
+        with self.assertRaises(ValueError):
+            lu.solve(Matrix([[1, 0], [0, 1]]), Matrix(3, 1))
+
+
+class TestLUFactorization(unittest.TestCase):
+
+    def setUp(self):
+        self.A = Matrix([[4, 3, 2], [2, 1, 3], [3, 2, 1]])
+        self.f = lu.LUFactorization(self.A)
+
+    def test_cached_factors(self):
+        self.assertIs(self.f.L, self.f.L)
+        assert_matrix_almost_equal(self, self.f.P @ self.A, self.f.L @ self.f.U)
+
+    def test_solve_block_of_columns(self):
+        B = Matrix([[1, 2], [3, 4], [5, 6]])
+        assert_matrix_almost_equal(self, B, self.A @ self.f.solve(B))
+
+    def test_solve_iter_streams_vectors(self):
+        rhs = ([1, 0, 0], [0, 1, 0], [1, 2, 3])
+        for b, x in zip(rhs, self.f.solve_iter(iter(rhs))):
+            ax = self.A @ Matrix(x, 3, 1)
+            for expected, actual in zip(b, ax[0:]):
+                self.assertAlmostEqual(expected, actual)
+
+    def test_solve_transposed(self):
+        x = self.f.solve_transposed([1, 2, 3])
+        atx = self.A.T @ Matrix(x, 3, 1)
+        for expected, actual in zip([1, 2, 3], atx[0:]):
+            self.assertAlmostEqual(expected, actual)
+
+    def test_det(self):
+        self.assertAlmostEqual(3, self.f.det())
+        self.assertAlmostEqual(-1, lu.LUFactorization(Matrix([[0, 1], [1, 0]])).det())
+
+    def test_inverse(self):
+        assert_matrix_almost_equal(self, Matrix.identity(3), self.A @ self.f.inverse())
+
+    def test_condition_number_estimate(self):
+        inv = self.f.inverse()
+        exact = 9 * max(sum(abs(v) for v in inv.column(c)) for c in range(3))
+        self.assertAlmostEqual(exact, self.f.cond())
+        self.assertAlmostEqual(1, lu.LUFactorization(Matrix.identity(4)).cond())
+        self.assertEqual(0, lu.LUFactorization(Matrix(0, 0)).cond())
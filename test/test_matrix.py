@@ -1,4 +1,8 @@
+import io
+import os
+import tempfile
 import unittest
+from array import array
 from pymath.matrix import Matrix
 
 
@@ -84,6 +88,74 @@ class Initialization(unittest.TestCase):
         self.assertNotEqual(a, b)
 
 
+class Constructors(unittest.TestCase):
+    def test_zeros_full_and_diag(self):
+        self.assertEqual(Matrix(2, 3), Matrix.zeros(2, 3, backend='array'))
+        self.assertEqual(Matrix([[7, 7], [7, 7]]), Matrix.full(2, 2, 7, dtype=int))
+        self.assertEqual(Matrix([[1, 0], [0, 2]]), Matrix.diag([1, 2], backend='array'))
+        self.assertEqual(Matrix([[1, 0], [0, 1]]), Matrix.identity(2))
+
+    def test_random_is_reproducible_and_in_range(self):
+        m = Matrix.random(3, 4, low=-1, high=1, seed=5)
+        self.assertEqual((3, 4), m.shape)
+        self.assertEqual(m, Matrix.random(3, 4, low=-1, high=1, seed=5))
+        self.assertTrue(all(-1 <= x < 1 for x in m._data))
+        ints = Matrix.random(10, 10, 0, 3, dtype=int, backend='array', seed=1)
+        self.assertEqual({0, 1, 2}, set(ints._data))
+
+    def test_from_flat_without_copy_shares_entries(self):
+        data = array('d', [1, 2, 3, 4, 5, 6])
+        m = Matrix.from_flat(data, 2, 3, backend='array', copy=False)
+        data[5] = 42
+        self.assertEqual(42, m[1, 2])
+        copied = Matrix.from_flat(data, 3, 2)
+        data[0] = 0
+        self.assertEqual(Matrix([[1, 2], [3, 4], [5, 42]]), copied)
+        with self.assertRaises(ValueError):
+            Matrix.from_flat(data, 2, 2)
+
+    def test_from_buffer(self):
+        raw = bytearray(array('q', [1, 2, 3, 4]).tobytes())
+        m = Matrix.from_buffer(raw, 2, 2, dtype=int)
+        self.assertEqual(Matrix([[1, 2], [3, 4]]), m)
+        m[0, 0] = 9
+        self.assertEqual(9, array('q', raw)[0])
+        self.assertEqual(Matrix([[9, 2], [3, 4]]), Matrix.from_buffer(bytes(raw), 2, 2, dtype=int, copy=True))
+        with self.assertRaises(ValueError):
+            Matrix.from_buffer(raw, 3, 2, dtype=int)
+
+    def test_from_rows_iter(self):
+        rows = ([i, i + 1] for i in range(3))
+        self.assertEqual(Matrix([[0, 1], [1, 2], [2, 3]]), Matrix.from_rows_iter(rows, backend='array'))
+        with self.assertRaises(ValueError):
+            Matrix.from_rows_iter([[1, 2], [3]])
+        with self.assertRaises(ValueError):
+            Matrix.from_rows_iter(iter([]))
+
+    def test_from_csv(self):
+        text = 'a,b\n1,2\n\n3,4.5\n'
+        expected = Matrix([[1, 2], [3, 4.5]])
+        self.assertEqual(expected, Matrix.from_csv(io.StringIO(text), skip_header=True))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'm.csv')
+            with open(path, 'w') as f:
+                f.write(text.replace(',', ';'))
+            m = Matrix.from_csv(path, backend='array', delimiter=';', skip_header=True)
+        self.assertEqual(expected, m)
+
+    def test_from_stream(self):
+        stream = io.BytesIO(array('d', range(6)).tobytes())
+        self.assertEqual(Matrix([[0, 1, 2], [3, 4, 5]]), Matrix.from_stream(stream, 2, 3))
+        with self.assertRaises(ValueError):
+            Matrix.from_stream(io.BytesIO(bytes(8)), 2, 3)
+
+    def test_trusted_initialization_skips_coercion(self):
+        m = Matrix([[1, 2], [3, 4]], trusted=True)
+        self.assertEqual(Matrix([[1, 2], [3, 4]]), m)
+        self.assertIs(int, type(m[0, 0]))
+        self.assertIs(float, type(Matrix([[1, 2], [3, 4]])[0, 0]))
+
+
 class Comparisons(unittest.TestCase):
 
     def test_matrix_elements_can_be_assigned_with_a_slice(self):
@@ -288,6 +360,16 @@ class MatrixMultiplication(unittest.TestCase):
         self.assertEqual((n*a)*b, a*(n*b))
         self.assertEqual((n*a)*b, n*(a*b))
 
+    def test_int_matrix_times_fraction_matrix(self):
+        from fractions import Fraction
+        a = Matrix([[1, 2], [3, 4]], dtype=int)
+        b = Matrix([[Fraction(1, 2)], [Fraction(1, 3)]], dtype=Fraction)
+        for algorithm in ('auto', 'naive', 'blocked', 'strassen'):
+            product = a.matmul(b, algorithm)
+            self.assertIs(Fraction, product.dtype)
+            self.assertEqual([Fraction(7, 6), Fraction(17, 6)], product[:])
+        self.assertEqual([Fraction(3, 2), Fraction(7, 3)], (b.T @ a)[:])
+
 
 class ElementaryOperations(unittest.TestCase):
     def test_can_swap_two_rows(self):
@@ -295,3 +377,294 @@ class ElementaryOperations(unittest.TestCase):
         m = m.exchange_rows(0, 1)
 
         self.assertEqual(m, Matrix([[4, 5, 6], [1, 2, 3], [7, 8, 9]]))
+
+
+class Backends(unittest.TestCase):
+    def test_default_backend_is_list(self):
+        self.assertEqual(Matrix(2, 2).backend, 'list')
+
+    def test_array_backed_matrix_behaves_like_list_backed(self):
+        a = Matrix([[1, 2], [3, 4]], backend='array')
+        b = Matrix([[1, 2], [3, 4]])
+        self.assertEqual('array', a.backend)
+        self.assertEqual(a, b)
+        self.assertEqual([1, 2], a[0])
+        self.assertEqual([2, 4], a.column(1))
+        self.assertEqual(b @ b, a @ a)
+        self.assertEqual(b + b, a + a)
+        self.assertEqual(b * 2, a * 2)
+        self.assertEqual(b.T, a.T)
+
+    def test_array_backed_matrix_entries_can_be_assigned(self):
+        m = Matrix(2, 3, backend='array')
+        m[1] = [1, 2, 3]
+        m[0, 2] = 7
+        self.assertEqual(Matrix([[0, 0, 7], [1, 2, 3]]), m)
+
+    def test_int_matrix_with_fraction_scalar_is_promoted(self):
+        from fractions import Fraction
+        m = Matrix([[1, 2], [3, 4]], dtype=int)
+        half = m * Fraction(1, 2)
+        self.assertIs(Fraction, half.dtype)
+        self.assertEqual([Fraction(1, 2), 1, Fraction(3, 2), 2], half[:])
+        self.assertIs(int, (m * True).dtype)
+        typed = Matrix([[1, 2], [3, 4]], dtype=int, backend='array') * Fraction(1, 2)
+        self.assertEqual(('array', float), (typed.backend, typed.dtype))
+        self.assertEqual([0.5, 1.0, 1.5, 2.0], typed[:])
+
+    def test_copy_keeps_backend_unless_given(self):
+        a = Matrix([[1, 2], [3, 4]], backend='array')
+        self.assertEqual('array', Matrix(a).backend)
+        self.assertEqual('list', Matrix(a, backend='list').backend)
+
+    def test_copy_converts_to_given_dtype(self):
+        a = Matrix([[1.0, 2.0], [3.0, 4.5]], backend='array')
+        self.assertIs(float, Matrix(a).dtype)
+        for backend in ('list', 'array'):
+            c = Matrix(a, dtype=int, backend=backend)
+            self.assertIs(int, c.dtype)
+            self.assertEqual(backend, c.backend)
+            self.assertEqual([1, 2, 3, 4], c[:])
+            self.assertIs(int, type(c[1, 1]))
+
+    def test_memoryview_shares_entries(self):
+        m = Matrix([[1, 2, 3], [4, 5, 6]], backend='array')
+        view = m.memoryview()
+        self.assertEqual((2, 3), view.shape)
+        self.assertEqual([[1, 2, 3], [4, 5, 6]], view.tolist())
+        view[1, 2] = 42
+        self.assertEqual(42, m[1, 2])
+
+    def test_list_backed_matrix_has_no_buffer(self):
+        with self.assertRaises(TypeError):
+            Matrix(2, 2).memoryview()
+
+    def test_unsupported_dtype_for_typed_backend(self):
+        from fractions import Fraction
+        with self.assertRaises(ValueError):
+            Matrix(2, 2, dtype=Fraction, backend='array')
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            Matrix(2, 2, backend='tape')
+
+    def test_product_of_int_and_float_matrices_is_float(self):
+        a = Matrix([[1, 2]], dtype=int, backend='array')
+        b = Matrix([[0.5], [0.25]], backend='array')
+        self.assertEqual(Matrix([[1.0]]), a @ b)
+        self.assertIs(float, (a @ b).dtype)
+
+
+class Views(unittest.TestCase):
+    def setUp(self):
+        self.m = Matrix([[1, 2, 3], [4, 5, 6], [7, 8, 9]])
+
+    def test_transpose_shares_entries(self):
+        t = self.m.T
+        self.assertTrue(t.is_view)
+        self.assertEqual(Matrix([[1, 4, 7], [2, 5, 8], [3, 6, 9]]), t)
+        t[0, 2] = 42
+        self.assertEqual(42, self.m[2, 0])
+
+    def test_row_and_column_views(self):
+        self.assertEqual(Matrix([[4, 5, 6]]), self.m[1, :])
+        self.assertEqual(Matrix([[3], [6], [9]]), self.m[:, 2])
+        self.m[:, 0][2, 0] = 0
+        self.assertEqual(0, self.m[2, 0])
+
+    def test_submatrix_slicing(self):
+        sub = self.m[1:3, 0:2]
+        self.assertEqual((2, 2), sub.shape)
+        self.assertEqual(Matrix([[4, 5], [7, 8]]), sub)
+        self.assertEqual([7, 8], sub[1])
+        self.assertEqual(Matrix([[4, 7], [5, 8]]), sub.T)
+        self.assertEqual(Matrix([[1, 3], [7, 9]]), self.m[::2, ::2])
+
+    def test_views_of_views(self):
+        sub = self.m.T[1:, 1:]
+        self.assertEqual(Matrix([[5, 8], [6, 9]]), sub)
+        self.assertEqual(Matrix([[9]]), sub[1:, 1:])
+        sub[1] = [60, 90]
+        self.assertEqual(Matrix([[1, 2, 3], [4, 5, 60], [7, 8, 90]]), self.m)
+
+    def test_block_assignment(self):
+        self.m[0:2, 1:3] = Matrix([[0, 0], [0, 0]])
+        self.assertEqual(Matrix([[1, 0, 0], [4, 0, 0], [7, 8, 9]]), self.m)
+        self.m[2, :] = 1
+        self.assertEqual([1, 1, 1], self.m[2])
+
+    def test_view_index_out_of_range(self):
+        with self.assertRaises(IndexError):
+            self.m[3, :]
+        with self.assertRaises(IndexError):
+            self.m[0:2, 0:2][2, 0]
+
+    def test_negative_indices_of_views(self):
+        t = self.m.T
+        self.assertEqual(3, t[-1, 0])
+        self.assertEqual(9, t[-1, -1])
+        self.assertEqual([3, 6, 9], t[-1])
+        t[0, -1] = 70
+        t[-2] = [20, 50, 80]
+        self.assertEqual(Matrix([[1, 20, 3], [4, 50, 6], [70, 80, 9]]), self.m)
+        with self.assertRaises(IndexError):
+            t[-4, 0]
+        with self.assertRaises(IndexError):
+            t[0, -4] = 1
+
+    def test_copy_materialises_view(self):
+        c = self.m.T.copy()
+        self.assertFalse(c.is_view)
+        c[0, 0] = 42
+        self.assertEqual(1, self.m[0, 0])
+
+    def test_views_take_part_in_arithmetic(self):
+        a = self.m[0:2, 0:2]
+        self.assertEqual(Matrix([[2, 4], [8, 10]]), a + a)
+        self.assertEqual(Matrix([[1, 2], [4, 5]]) @ Matrix([[1, 4], [2, 5]]), a @ a.T)
+
+    def test_flat_slices_of_views(self):
+        m = Matrix([[r * 10 + c for c in range(5)] for r in range(4)], backend='array')
+        for view in (m.T, m[1:, ::2], m[::3, 1:4]):
+            flat = view.copy()
+            for item in (slice(None), slice(1, 7), slice(2, None, 3), slice(None, None, view.shape.columns),
+                         slice(1, None, 2 * view.shape.columns), slice(None, None, -1), slice(-2, 0, -3),
+                         slice(5, 5)):
+                self.assertEqual(flat[item], view[item])
+            for c in range(view.shape.columns):
+                self.assertEqual(flat.column(c), view.column(c))
+
+    def test_view_columns_are_read_without_gathering(self):
+        from unittest import mock
+        from pymath.matrix import MatrixView
+        t = Matrix([[1, 2, 3], [4, 5, 6]]).T
+        with mock.patch.object(MatrixView, '_data', property(lambda view: self.fail('view gathered'))):
+            self.assertEqual([4, 5, 6], t.column(1))
+            self.assertEqual([2, 3], t[2:6:2])
+
+    def test_array_backed_views(self):
+        m = Matrix([[1, 2], [3, 4]], backend='array')
+        m.T[0, 1] = 30
+        self.assertEqual(Matrix([[1, 2], [30, 4]]), m)
+        self.assertEqual([2, 4], m.T[1])
+
+    def test_swap_rows_in_place(self):
+        self.m.swap_rows(0, 2)
+        self.assertEqual(Matrix([[7, 8, 9], [4, 5, 6], [1, 2, 3]]), self.m)
+
+
+class Elementwise(unittest.TestCase):
+    def setUp(self):
+        self.m = Matrix([[1, 2, 3], [4, 5, 6]])
+
+    def test_scalar_operands(self):
+        self.assertEqual(Matrix([[2, 3, 4], [5, 6, 7]]), self.m + 1)
+        self.assertEqual(Matrix([[2, 3, 4], [5, 6, 7]]), 1 + self.m)
+        self.assertEqual(Matrix([[0, -1, -2], [-3, -4, -5]]), 1 - self.m)
+        self.assertEqual(Matrix([[0.5, 1, 1.5], [2, 2.5, 3]]), self.m / 2)
+        self.assertEqual(Matrix([[1, 4, 9], [16, 25, 36]]), self.m ** 2)
+        self.assertEqual(Matrix([[2, 4, 8], [16, 32, 64]]), 2 ** self.m)
+
+    def test_row_and_column_broadcasting(self):
+        row = Matrix([[10, 20, 30]])
+        column = Matrix([[100], [200]])
+        self.assertEqual(Matrix([[11, 22, 33], [14, 25, 36]]), self.m + row)
+        self.assertEqual(Matrix([[11, 22, 33], [14, 25, 36]]), row + self.m)
+        self.assertEqual(Matrix([[101, 102, 103], [204, 205, 206]]), self.m + column)
+        self.assertEqual(Matrix([[110, 120, 130], [210, 220, 230]]), row + column)
+        self.assertEqual(Matrix([[2, 3, 4], [5, 6, 7]]), self.m + Matrix([[1]]))
+
+    def test_shapes_that_can_not_be_broadcast(self):
+        with self.assertRaises(ValueError):
+            self.m + Matrix([[1, 2]])
+
+    def test_hadamard_product_and_division(self):
+        self.assertEqual(Matrix([[1, 4, 9], [16, 25, 36]]), self.m.multiply(self.m))
+        self.assertEqual(Matrix([[1, 1, 1], [1, 1, 1]]), self.m.divide(self.m))
+
+    def test_integer_division_gives_float(self):
+        m = Matrix([[1, 2]], dtype=int, backend='array')
+        self.assertIs(float, (m / 2).dtype)
+        self.assertEqual(Matrix([[0.5, 1]]), m / 2)
+        self.assertIs(int, (m * 2).dtype)
+
+    def test_comparisons(self):
+        self.assertEqual(Matrix([[True, True, False], [False, False, False]], dtype=bool), self.m < 3)
+        self.assertEqual(Matrix([[False, True, True], [True, True, True]], dtype=bool), self.m >= 2)
+
+    def test_comparisons_on_typed_backends(self):
+        from pymath.storage import numpy
+        for backend in ('array', 'numpy') if numpy is not None else ('array',):
+            m = Matrix(self.m, backend=backend)
+            mask = m > Matrix([[2, 2, 2]])
+            self.assertEqual(backend, mask.backend)
+            self.assertIs(int, mask.dtype)
+            self.assertEqual(Matrix([[0, 0, 1], [1, 1, 1]]), mask)
+            self.assertEqual(Matrix([[1, 1, 0], [0, 0, 0]]), m <= 2.5)
+
+    def test_unary_operations(self):
+        import math
+        self.assertEqual(Matrix([[-1, -2, -3], [-4, -5, -6]]), -self.m)
+        self.assertEqual(self.m, abs(-self.m))
+        self.assertEqual(Matrix([[1, 2], [3, 4]]), Matrix([[1, 4], [9, 16]]).apply(math.sqrt))
+
+    def test_in_place_operations_reuse_storage(self):
+        m = Matrix([[1, 2], [3, 4]], backend='array')
+        data = m._data
+        m += 1
+        m *= 2
+        m -= Matrix([[1, 1]])
+        m /= 2
+        self.assertIs(data, m._data)
+        self.assertEqual(Matrix([[1.5, 2.5], [3.5, 4.5]]), m)
+
+    def test_in_place_operations_on_views(self):
+        self.m[:, 1] += 10
+        self.assertEqual(Matrix([[1, 12, 3], [4, 15, 6]]), self.m)
+
+    def test_in_place_operation_can_not_change_shape_or_dtype(self):
+        with self.assertRaises(ValueError):
+            row = Matrix([[1, 2, 3]])
+            row += self.m
+        with self.assertRaises(TypeError):
+            m = Matrix([[1, 2]], dtype=int, backend='array')
+            m /= 2
+
+    def test_int_and_fraction_operands(self):
+        from fractions import Fraction
+        m = Matrix([[1, 2], [3, 4]], dtype=int)
+        f = Matrix([[Fraction(1, 2), Fraction(1, 3)]], dtype=Fraction)
+        for result in (m + f, f + m):
+            self.assertIs(Fraction, result.dtype)
+            self.assertEqual([Fraction(3, 2), Fraction(7, 3), Fraction(7, 2), Fraction(13, 3)], result[:])
+        for out in (m, Matrix([[1, 2], [3, 4]], dtype=int, backend='array')):
+            with self.assertRaises(TypeError):
+                out.add(f, out=out)
+            with self.assertRaises(TypeError):
+                out *= Fraction(1, 2)
+            self.assertEqual([1, 2, 3, 4], out[:])
+
+    def test_out_argument(self):
+        out = Matrix(2, 3)
+        result = self.m.add(self.m, out=out)
+        self.assertIs(out, result)
+        self.assertEqual(self.m * 2, out)
+        with self.assertRaises(ValueError):
+            self.m.add(1, out=Matrix(3, 2))
+
+    def test_unsupported_operand(self):
+        with self.assertRaises(TypeError):
+            self.m + 'a'
+
+
+class ProductAlgorithms(unittest.TestCase):
+    def test_all_algorithms_agree(self):
+        a = Matrix([[(3 * r + 5 * c) % 7 - 3 for c in range(5)] for r in range(6)])
+        b = Matrix([[(2 * r + c) % 5 - 2 for c in range(4)] for r in range(5)])
+        expected = a @ b
+        for algorithm in ('naive', 'blocked', 'strassen'):
+            self.assertEqual(expected, a.matmul(b, algorithm, cutoff=2), algorithm)
+
+    def test_unknown_algorithm(self):
+        with self.assertRaises(ValueError):
+            Matrix(2, 2).matmul(Matrix(2, 2), 'magic')
@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+from pymath import lu, outofcore
+from pymath.matrix import Matrix
+from test.util import assert_matrix_almost_equal
+
+
+class TestOutOfCore(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.a = Matrix.random(23, 23, -1, 1, seed=1)
+        self.b = Matrix.random(23, 7, -1, 1, seed=2)
+        self.a.save(self.path('a.mat'))
+        self.b.save(self.path('b.mat'))
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.dir.name, name)
+
+    def test_tile_size_fits_budget(self):
+        self.assertEqual(1, outofcore.tile_size(10, 4))
+        t = outofcore.tile_size(1 << 20, 4)
+        self.assertLessEqual(4 * t * t * outofcore.ENTRY_BYTES, 1 << 20)
+
+    def test_matmul_writes_product_to_file(self):
+        A, B = Matrix.load(self.path('a.mat')), Matrix.load(self.path('b.mat'))
+        for memory in (1000, 20000, outofcore.DEFAULT_MEMORY):
+            C = outofcore.matmul(A, B, self.path('c.mat'), memory=memory)
+            assert_matrix_almost_equal(self, self.a @ self.b, C, places=10)
+            assert_matrix_almost_equal(self, self.a @ self.b, Matrix.load(self.path('c.mat'), mmap=False), places=10)
+
+    def test_matmul_checks_dimensions(self):
+        with self.assertRaises(ValueError):
+            outofcore.matmul(self.b, self.b, self.path('c.mat'))
+
+    def test_lu_factor_matches_in_memory_factorization(self):
+        A = Matrix.load(self.path('a.mat'))
+        expected = lu.lu_factor(self.a)
+        for memory in (1000, 10000, outofcore.DEFAULT_MEMORY):
+            factor = outofcore.lu_factor(A, self.path('lu.mat'), memory=memory)
+            self.assertEqual(expected.piv, factor.piv)
+            assert_matrix_almost_equal(self, expected.lu, factor.lu, places=10)
+
+    def test_solve(self):
+        A = Matrix.load(self.path('a.mat'))
+        for memory in (1000, outofcore.DEFAULT_MEMORY):
+            X = outofcore.solve(A, self.b, self.path('lu.mat'), memory=memory)
+            assert_matrix_almost_equal(self, self.b, self.a @ X, places=10)
+
+    def test_singular_matrix(self):
+        Matrix([[1, 2, 3], [2, 4, 6], [1, 0, 1]]).save(self.path('s.mat'))
+        with self.assertRaises(ValueError):
+            outofcore.lu_factor(Matrix.load(self.path('s.mat')), self.path('lu.mat'), memory=100)
+
+
+if __name__ == '__main__':
+    unittest.main()
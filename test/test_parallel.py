@@ -0,0 +1,53 @@
+import unittest
+from pymath import exact, lu, parallel, prime
+from pymath.matrix import Matrix
+from test.util import assert_matrix_almost_equal
+
+
+class TestParallelPrimes(unittest.TestCase):
+
+    def test_factors_in_input_order(self):
+        numbers = list(range(1, 300)) + [9999999943 * 9999999967]
+        expected = [prime.factors(n) for n in numbers]
+        self.assertEqual(expected, list(parallel.factors(iter(numbers), workers=2, chunksize=16)))
+
+    def test_factors_of_empty_input(self):
+        self.assertEqual([], list(parallel.factors([], workers=2)))
+
+    def test_primes_range_merges_windows_in_order(self):
+        expected = list(prime.primes_range(10, 5000))
+        self.assertEqual(expected, list(parallel.primes_range(10, 5000, workers=3, span=97)))
+
+
+class TestParallelMatrix(unittest.TestCase):
+
+    def setUp(self):
+        n = 23
+        self.A = Matrix([[((7 * r + 3 * c) % 13) - 6 + (20 if r == c else 0) for c in range(n)] for r in range(n)])
+        self.B = Matrix([[((5 * r + c) % 11) - 5 for c in range(4)] for r in range(n)])
+
+    def test_matmul_matches_serial_product(self):
+        self.assertEqual(self.A @ self.B, parallel.matmul(self.A, self.B, workers=3))
+        self.assertEqual(self.B.T @ self.A, parallel.matmul(self.B.T, self.A, workers=2))
+
+    def test_matmul_inner_dimensions_must_match(self):
+        with self.assertRaises(ValueError):
+            parallel.matmul(self.B, self.B, workers=2)
+
+    def test_blocked_lu_matches_serial_factorization(self):
+        LU, piv = lu.lu_factor(self.A)
+        parallel_factor = parallel.lu_factor(self.A, workers=3, block=5)
+        self.assertEqual(piv, parallel_factor.piv)
+        assert_matrix_almost_equal(self, LU, parallel_factor.lu, places=7)
+        assert_matrix_almost_equal(self, self.B, self.A @ lu.lu_solve(parallel_factor, self.B), places=7)
+
+    def test_blocked_lu_of_singular_matrix(self):
+        with self.assertRaises(ValueError):
+            parallel.lu_factor(Matrix([[1, 2, 3], [2, 4, 6], [0, 1, 1]]), workers=2, block=2)
+
+    def test_multimodular_matches_bareiss(self):
+        A = Matrix(self.A, dtype=int)
+        B = Matrix(self.B, dtype=int)
+        self.assertEqual((int, int), (A.dtype, B.dtype))
+        self.assertEqual(exact.det(A), parallel.det_modular(A, workers=2))
+        self.assertEqual(exact.solve(A, B), parallel.solve_modular(A, B, workers=2))
@@ -1,3 +1,5 @@
+import os
+import tempfile
 import unittest
 from pymath import prime
 
@@ -22,3 +24,209 @@ class TestPrimes(unittest.TestCase):
     def test_one_is_not_a_prime_number(self):
         ps = prime.primes(1)
         self.assertFalse(ps, 'one it not a prime number')
+
+    def test_primes_up_to_a_prime_includes_it(self):
+        self.assertEqual({2, 3, 5, 7, 11, 13}, prime.primes(13))
+
+
+class TestPrimesRange(unittest.TestCase):
+
+    def test_matches_trial_division(self):
+        for lo, hi in ((0, 200), (2, 3), (3, 4), (90, 97), (90, 98), (1000, 1300)):
+            expected = [n for n in range(lo, hi) if is_prime(n)]
+            self.assertEqual(expected, list(prime.primes_range(lo, hi)), 'primes_range({}, {})'.format(lo, hi))
+
+    def test_segment_boundaries(self):
+        expected = [n for n in range(50, 2000) if is_prime(n)]
+        for segment_size in (1, 2, 7, 64):
+            self.assertEqual(expected, list(prime.primes_range(50, 2000, segment_size)))
+
+    def test_empty_ranges(self):
+        self.assertEqual([], list(prime.primes_range(0, 2)))
+        self.assertEqual([], list(prime.primes_range(20, 10)))
+        self.assertEqual([], list(prime.primes_range(24, 29)))
+
+    def test_window_near_large_bound_is_lazy(self):
+        window = prime.primes_range(10 ** 12, 10 ** 12 + 200)
+        self.assertEqual(1000000000039, next(window))
+        self.assertTrue(all(1000000000039 < p < 10 ** 12 + 200 for p in window))
+
+
+class TestPrimeTable(unittest.TestCase):
+
+    def setUp(self):
+        self.expected = [n for n in range(3000) if is_prime(n)]
+
+    def test_extends_only_when_needed(self):
+        table = prime.PrimeTable(100)
+        self.assertEqual(100, table.limit)
+        self.assertEqual(25, len(table))
+        self.assertEqual(25, table.pi(97))
+        self.assertEqual(100, table.limit)
+        self.assertEqual(168, table.pi(1000))
+        self.assertEqual(1001, table.limit)
+        self.assertEqual(self.expected[:168], list(table[:168]))
+
+    def test_lookups_agree_with_trial_division(self):
+        table = prime.PrimeTable(2000)
+        for n in range(-2, 3000):
+            self.assertEqual(is_prime(n), table.is_prime(n), n)
+        for n in range(2, 2500):
+            self.assertEqual(min(p for p in self.expected if p > n), table.next_prime(n), n)
+            self.assertEqual(max(p for p in self.expected if p <= n), table.prev_prime(n + 1), n)
+
+    def test_nth_prime(self):
+        table = prime.PrimeTable()
+        for i, p in enumerate(self.expected, 1):
+            self.assertEqual(p, table.nth_prime(i))
+        self.assertEqual(7919, prime.PrimeTable().nth_prime(1000))
+        with self.assertRaises(ValueError):
+            table.nth_prime(0)
+
+    def test_no_prime_below_two(self):
+        with self.assertRaises(ValueError):
+            prime.PrimeTable(100).prev_prime(2)
+
+    def test_save_and_memory_map(self):
+        table = prime.PrimeTable(3000)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'primes.tbl')
+            table.save(path)
+            for mmap in (True, False):
+                loaded = prime.PrimeTable.load(path, mmap=mmap)
+                self.assertEqual(3000, loaded.limit)
+                self.assertEqual(self.expected, list(loaded[:]))
+                self.assertEqual(2999, loaded.next_prime(2971))
+                self.assertEqual(1229, loaded.pi(10000))
+                del loaded
+
+    def test_shared_table(self):
+        self.assertIs(prime.prime_table(), prime.prime_table())
+
+
+class TestFactors(unittest.TestCase):
+
+    def check_factorization(self, n):
+        fs = prime.factors(n)
+        product = 1
+        for p, power in fs:
+            self.assertTrue(prime.is_prime(p), '{} is not prime in factors({})'.format(p, n))
+            product *= p ** power
+        self.assertEqual(n, product)
+        self.assertEqual(sorted(fs), fs)
+
+    def test_small_numbers(self):
+        for n in range(1, 2000):
+            self.check_factorization(n)
+
+    def test_factorization_format(self):
+        self.assertEqual([(2, 3), (3, 2), (5, 1)], prime.factors(360))
+        self.assertEqual('2^3 * 3^2 * 5', prime.factor_str(prime.factors(360)))
+        self.assertEqual([], prime.factors(1))
+
+    def test_large_semiprimes_and_prime_powers(self):
+        self.assertEqual([(9999999943, 1), (9999999967, 1)], prime.factors(9999999943 * 9999999967))
+        self.assertEqual([(7, 1), (1000003, 2)], prime.factors(7 * 1000003 ** 2))
+        self.check_factorization(2 ** 64 - 1)
+
+    def test_non_positive_numbers_can_not_be_factored(self):
+        with self.assertRaises(ValueError):
+            prime.factors(0)
+
+    def test_factor_many(self):
+        numbers = [12, 97, 1001]
+        self.assertEqual([prime.factors(n) for n in numbers], list(prime.factor_many(iter(numbers))))
+
+
+class TestSmallestFactorTable(unittest.TestCase):
+
+    def test_factors_agree_with_factors(self):
+        table = prime.SmallestFactorTable(5000)
+        for n in range(1, 5001):
+            self.assertEqual(prime.factors(n), table.factors(n), n)
+
+    def test_smallest_prime_factor(self):
+        table = prime.SmallestFactorTable(100)
+        self.assertEqual([2, 3, 2, 5, 2, 7, 2, 3, 2], [table[n] for n in range(2, 11)])
+        self.assertEqual(7, table[91])
+
+    def test_numbers_outside_table(self):
+        table = prime.SmallestFactorTable(100)
+        for n in (0, 101):
+            with self.assertRaises(ValueError):
+                table.factors(n)
+
+
+class TestFactorCache(unittest.TestCase):
+
+    def test_hits_and_misses(self):
+        cache = prime.FactorCache(maxsize=10)
+        n = 9999999943 * 9999999967
+        self.assertEqual([(9999999943, 1), (9999999967, 1)], cache.factors(n))
+        self.assertEqual([(9999999943, 1), (9999999967, 1)], cache.factors(n))
+        self.assertEqual(prime.CacheInfo(hits=1, misses=1, maxsize=10, currsize=1), cache.cache_info())
+        cache.cache_clear()
+        self.assertEqual(prime.CacheInfo(hits=0, misses=0, maxsize=10, currsize=0), cache.cache_info())
+
+    def test_least_recently_used_are_evicted(self):
+        cache = prime.FactorCache(maxsize=3)
+        for n in (10 ** 12 + 1, 10 ** 12 + 2, 10 ** 12 + 3):
+            cache.factors(n)
+        cache.factors(10 ** 12 + 1)
+        cache.factors(10 ** 12 + 4)
+        self.assertIn(10 ** 12 + 1, cache)
+        self.assertNotIn(10 ** 12 + 2, cache)
+        self.assertEqual(3, cache.cache_info().currsize)
+
+    def test_multiples_of_cached_numbers(self):
+        cache = prime.FactorCache()
+        base = (2 ** 31 - 1) * 1000000007
+        cache.factors(base)
+        for k in (1, 6, 1009 * 1013, 10 ** 9 + 9):
+            self.assertEqual(prime.factors(k * base), cache.factors(k * base))
+
+    def test_known_primes_are_divided_out(self):
+        from unittest import mock
+        cache = prime.FactorCache()
+        p, q, r = 9999999943, 9999999967, 1000000007
+        cache.factors(p * q)
+        with mock.patch.object(prime, 'pollard_brent', side_effect=AssertionError('split again')):
+            self.assertEqual([(r, 1), (p, 1)], cache.factors(p * r))
+            self.assertEqual([(p, 2), (q, 1)], cache.factors(p * p * q))
+
+    def test_agrees_with_factors(self):
+        cache = prime.FactorCache(maxsize=50, table=prime.SmallestFactorTable(1000))
+        for n in list(range(1, 2000)) + list(range(10 ** 12, 10 ** 12 + 200)):
+            self.assertEqual(prime.factors(n), cache.factors(n), n)
+        with self.assertRaises(ValueError):
+            cache.factors(0)
+
+
+class TestFactorRange(unittest.TestCase):
+
+    def test_agrees_with_factors(self):
+        for lo, hi, segment_size in ((1, 3000, prime.SEGMENT_SIZE), (1, 100, 7), (999, 1200, 13),
+                                     (10 ** 12, 10 ** 12 + 100, 32)):
+            self.assertEqual([prime.factors(n) for n in range(lo, hi)],
+                             list(prime.factor_range(lo, hi, segment_size)), (lo, hi))
+
+    def test_empty_and_invalid_ranges(self):
+        self.assertEqual([], list(prime.factor_range(5, 5)))
+        with self.assertRaises(ValueError):
+            list(prime.factor_range(0, 10))
+
+
+class TestIsPrime(unittest.TestCase):
+
+    def test_agrees_with_trial_division(self):
+        for n in range(-5, 5000):
+            self.assertEqual(is_prime(n), prime.is_prime(n), n)
+
+    def test_strong_pseudoprimes_are_composite(self):
+        for n in (2047, 1373653, 25326001, 3215031751, 2152302898747, 3474749660383, 341550071728321,
+                  3825123056546413051):
+            self.assertFalse(prime.is_prime(n), n)
+
+    def test_large_primes(self):
+        for n in (2 ** 61 - 1, 10 ** 18 + 9, 2 ** 89 - 1):
+            self.assertTrue(prime.is_prime(n), n)
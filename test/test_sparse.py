@@ -0,0 +1,94 @@
+import unittest
+from pymath.matrix import Matrix
+from pymath.sparse import SparseMatrix
+from pymath.vector import Vector
+
+
+class TestConstruction(unittest.TestCase):
+
+    def test_from_coo_triplets(self):
+        s = SparseMatrix(3, 4, [(0, 1, 2.0), (2, 3, 5.0), (0, 1, 1.0), (1, 0, 0.0)])
+        self.assertEqual(2, s.nnz)
+        self.assertEqual(3.0, s[0, 1])
+        self.assertEqual(5.0, s[2, 3])
+        self.assertEqual(0.0, s[1, 0])
+
+    def test_from_coo_lists(self):
+        s = SparseMatrix.from_coo(2, 2, [0, 1], [1, 0], [4, 5])
+        self.assertEqual(Matrix([[0, 4], [5, 0]]), s.to_matrix())
+
+    def test_entries_must_be_in_range(self):
+        with self.assertRaises(IndexError):
+            SparseMatrix(2, 2, [(2, 0, 1.0)])
+
+    def test_round_trip_through_dense_matrix(self):
+        m = Matrix([[1, 0, 0], [0, 0, 2], [0, 3, 0]])
+        s = SparseMatrix.from_matrix(m)
+        self.assertEqual(3, s.nnz)
+        self.assertEqual(m, s.to_matrix())
+
+
+class TestArithmetic(unittest.TestCase):
+
+    def setUp(self):
+        self.a = Matrix([[1, 0, 2], [0, 0, 3], [4, 5, 0]])
+        self.b = Matrix([[0, 1, 0], [6, 0, 0], [0, 0, -3]])
+        self.sa = SparseMatrix.from_matrix(self.a)
+        self.sb = SparseMatrix.from_matrix(self.b)
+
+    def test_add_and_subtract(self):
+        self.assertEqual(self.a + self.b, (self.sa + self.sb).to_matrix())
+        self.assertEqual(self.a - self.b, (self.sa - self.sb).to_matrix())
+
+    def test_cancelled_entries_are_dropped(self):
+        self.assertEqual(0, (self.sa - self.sa).nnz)
+
+    def test_scalar_multiply(self):
+        self.assertEqual(self.a * 3, (self.sa * 3).to_matrix())
+        self.assertEqual(self.a * 3, (3 * self.sa).to_matrix())
+        self.assertEqual(0, (self.sa * 0).nnz)
+
+    def test_transpose(self):
+        self.assertEqual(self.a.T, self.sa.T.to_matrix())
+        rect = Matrix([[0, 1, 0, 2], [3, 0, 0, 0]])
+        self.assertEqual(rect.T, SparseMatrix.from_matrix(rect).T.to_matrix())
+
+    def test_sparse_times_dense(self):
+        self.assertEqual(self.a @ self.b, self.sa @ self.b)
+        self.assertEqual(self.a @ self.b, self.a @ self.sb)
+
+    def test_dense_times_sparse_is_contiguous(self):
+        rect = Matrix([[1, 2, 0], [0, -1, 3]], backend='array')
+        product = rect @ self.sb
+        self.assertFalse(product.is_view)
+        self.assertEqual('array', product.backend)
+        self.assertEqual(rect @ self.b, product)
+        self.assertEqual((2, 3), tuple(product.memoryview().shape))
+        with self.assertRaises(ValueError):
+            Matrix(2, 2) @ self.sb
+
+    def test_int_and_fraction_entries(self):
+        from fractions import Fraction
+        ints = SparseMatrix(2, 2, [(0, 0, 1), (1, 1, 3)], dtype=int)
+        fractions = SparseMatrix(2, 2, [(0, 1, Fraction(1, 2))], dtype=Fraction)
+        half = Matrix([[Fraction(1, 2), 0], [0, Fraction(1, 3)]], dtype=Fraction)
+        self.assertEqual([Fraction(1, 2), 0, 0, Fraction(3, 2)], (ints * Fraction(1, 2)).to_matrix()[:])
+        self.assertEqual([1, Fraction(1, 2), 0, 3], (ints + fractions).to_matrix()[:])
+        self.assertEqual([Fraction(1, 2), 0, 0, 1], (ints @ half)[:])
+        self.assertEqual([Fraction(1, 2), 0, 0, 1], (half @ ints)[:])
+        self.assertEqual([0, Fraction(1, 2), 0, 0], (ints @ fractions).to_matrix()[:])
+
+    def test_sparse_times_sparse(self):
+        self.assertEqual(self.a @ self.b, (self.sa @ self.sb).to_matrix())
+
+    def test_sparse_times_vector(self):
+        v = Vector([1, 2, 3])
+        product = self.sa @ v
+        self.assertIsInstance(product, Vector)
+        self.assertEqual([7, 9, 14], product)
+
+    def test_inner_dimensions_must_match(self):
+        with self.assertRaises(ValueError):
+            self.sa @ Matrix(2, 2)
+        with self.assertRaises(ValueError):
+            self.sa @ Vector([1, 2])
@@ -39,4 +39,93 @@ class TestVector(unittest.TestCase):
         v2 = 2 * v
         self.assertEqual(v2, [2, 4, 6])
 
+    def test_vector_uses_slots_and_typed_storage(self):
+        v = Vector([1, 2, 3])
+        with self.assertRaises(AttributeError):
+            v.extra = 1
+        self.assertEqual('d', v.typecode)
+        self.assertEqual('q', Vector([1, 2], typecode='q').typecode)
+
+    def test_can_subtract_and_divide(self):
+        self.assertEqual([0, 1, 2], Vector([1, 2, 3]) - 1)
+        self.assertEqual([2, 0, -2], Vector([3, 2, 1]) - Vector([1, 2, 3]))
+        self.assertEqual([0.5, 1, 1.5], Vector([1, 2, 3]) / 2)
+        self.assertEqual([-1, -2], -Vector([1, 2]))
+
+    def test_in_place_operations_reuse_storage(self):
+        v = Vector([1, 2, 3])
+        data = v._data
+        v += Vector([1, 1, 1])
+        v *= 2
+        v -= 1
+        v /= 2
+        self.assertIs(data, v._data)
+        self.assertEqual([1.5, 2.5, 3.5], v)
+
+    def test_object_storage_keeps_entries_exact(self):
+        from fractions import Fraction
+        self.assertEqual(0.3333333333333333, Vector([Fraction(1, 3)])[0])
+        v = Vector([Fraction(1, 3), 2 ** 70], typecode=None)
+        self.assertIsNone(v.typecode)
+        self.assertEqual([Fraction(2, 3), 2 ** 71], v * 2)
+        self.assertEqual([Fraction(1, 6), 2 ** 69], v / 2)
+        self.assertEqual(Fraction(1, 9) + 2 ** 140, v.dot(v))
+        self.assertEqual('d', (Vector([1], typecode='q') * Fraction(5, 6)).typecode)
+        data = v._data
+        v += Vector([1, 1], typecode='q')
+        self.assertIs(data, v._data)
+        self.assertEqual([Fraction(4, 3), 2 ** 70 + 1], v)
+        self.assertIsNone((Vector([1.5]) + v[:1]).typecode)
+
+    def test_matrix_products_keep_exact_dtypes(self):
+        from fractions import Fraction
+        from pymath.matrix import Matrix
+        m = Matrix([[Fraction(1, 3), 2 ** 70]], dtype=Fraction)
+        self.assertEqual([Fraction(1, 3) + 2 ** 70], m @ Vector([1, 1], typecode=None))
+        self.assertIsNone((m @ Vector([1, 1])).typecode)
+        self.assertEqual('d', (Matrix([[1, 2]]) @ Vector([1, 1])).typecode)
+
+    def test_int_vector_is_promoted_to_float(self):
+        v = Vector([1, 2], typecode='q')
+        self.assertEqual('d', (v * 0.5).typecode)
+        with self.assertRaises(TypeError):
+            v *= 0.5
+
+    def test_dot_product(self):
+        a = Vector([1, 2, 3])
+        b = Vector([4, 5, 6])
+        self.assertEqual(32, a.dot(b))
+        self.assertEqual(32, a @ b)
+        self.assertEqual(1.0, Vector([1e100, 1.0, -1e100]).dot([1, 1, 1], exact=True))
+        with self.assertRaises(ValueError):
+            a.dot([1, 2])
+
+    def test_norms(self):
+        import math
+        v = Vector([3, -4])
+        self.assertAlmostEqual(5, v.norm())
+        self.assertEqual(7, v.norm(1))
+        self.assertEqual(4, v.norm(math.inf))
+        self.assertAlmostEqual(5, Vector(v, typecode=None).norm())
+        self.assertEqual(0, Vector([]).norm())
+
+    def test_axpy_updates_in_place(self):
+        y = Vector([1, 1, 1])
+        self.assertIs(y, y.axpy(2, Vector([1, 2, 3])))
+        self.assertEqual([3, 5, 7], y)
+
+    def test_cross_product(self):
+        self.assertEqual([0, 0, 1], Vector([1, 0, 0]).cross(Vector([0, 1, 0])))
+        self.assertEqual([-3, 6, -3], Vector([1, 2, 3]).cross([4, 5, 6]))
+        with self.assertRaises(ValueError):
+            Vector([1, 2]).cross(Vector([3, 4]))
 
+    def test_matrix_vector_products(self):
+        from pymath.matrix import Matrix
+        m = Matrix([[1, 2, 3], [4, 5, 6]])
+        product = m @ Vector([1, 0, 1])
+        self.assertIsInstance(product, Vector)
+        self.assertEqual([4, 10], product)
+        self.assertEqual([9, 12, 15], Vector([1, 2]) @ m)
+        with self.assertRaises(ValueError):
+            m @ Vector([1, 2])
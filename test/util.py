@@ -0,0 +1,8 @@
+"""Helpers shared by the test modules"""
+
+
+def assert_matrix_almost_equal(test, expected, actual, places=9):
+    """Assert that two matrices have the same shape and entries equal up to the given number of decimal places"""
+    test.assertEqual(expected.shape, actual.shape)
+    for e, a in zip(expected._data, actual._data):
+        test.assertAlmostEqual(e, a, places=places)